@@ -7,6 +7,8 @@ import { useEffect, useRef, useState } from "react"
 
 import { Stats } from "@react-three/drei"
 
+import { ClockSync, localNow } from "./clockSync"
+
 function Arrow({ lane, position }) {
   const arrows = ['left-arrow.gif', 'down-arrow.gif', 'up-arrow.gif', 'right-arrow.gif']
   const texture = useLoader(THREE.TextureLoader, `/${arrows[lane]}`)
@@ -25,26 +27,41 @@ function App() {
   const [started, setStarted] = useState(false)
   const audioRef = useRef(null)
   const startTimeRef = useRef(null)
+  const wsRef = useRef(null)
+  const clockRef = useRef(null)
 
   useEffect(() => {
     const ws = new WebSocket('ws://localhost:8000/ws')
+    const clock = new ClockSync(ws)
+    wsRef.current = ws
+    clockRef.current = clock
     
     ws.onopen = () => {
       console.log('Connected to game server')
+      clock.start()
     }
     
     ws.onmessage = (event) => {
       const data = JSON.parse(event.data)
+
+      if (data.type === 'pong') {
+        clock.handlePong(data)
+      }
       
-      if (data.type === 'pose_update') {
-        // Process joint data for lane detection
-        const joints = data.joints
-        console.log('Ankle positions:', joints.left_ankle, joints.right_ankle)
-        // TODO: Map ankle X positions to lanes and trigger hits
+      if (data.type === 'judgement') {
+        // Steps are detected and scored on the server; e.t is when the foot
+        // landed, on the server clock
+        for (const e of data.events) {
+          const age = (localNow() - clock.toLocal(e.t)) * 1000
+          console.log(`${e.result} lane ${e.lane} (score ${e.score}, combo ${e.combo}, ${age.toFixed(0)} ms ago)`)
+        }
       }
     }
     
-    return () => ws.close()
+    return () => {
+      clock.stop()
+      ws.close()
+    }
   }, [])
 
   useEffect(() => {
@@ -73,6 +90,14 @@ function App() {
     setStarted(true)
     startTimeRef.current = performance.now()
     audioRef.current.play().catch(e => console.error('Audio play failed:', e))
+    // the server judges steps against the song start on its own clock
+    const ws = wsRef.current
+    if (ws && ws.readyState === WebSocket.OPEN) {
+      ws.send(JSON.stringify({
+        type: 'start_game',
+        start_time: clockRef.current.synced ? clockRef.current.toServer(startTimeRef.current / 1000) : undefined
+      }))
+    }
   }
 
   return (
@@ -1,6 +1,9 @@
 // Game.jsx - Minimal scrolling notes
 
 import { useEffect, useState } from 'react'
+import { Html } from '@react-three/drei'
+
+import { fetchBeatmapChunks } from './beatmapWire'
 
 const LANE_X = [-3, -1, 1, 3]
 const COLORS = ['#ff0066', '#00ffff', '#ffff00', '#00ff66']
@@ -8,11 +11,18 @@ const COLORS = ['#ff0066', '#00ffff', '#ffff00', '#00ff66']
 function Game() {
   const [notes, setNotes] = useState([])
   const [scroll, setScroll] = useState(0)
+  const [error, setError] = useState(null)
   
   useEffect(() => {
-    fetch('http://localhost:8000/api/beatmap')
-      .then(res => res.json())
-      .then(data => setNotes(data.notes))
+    // Binary pages: notes start scrolling as soon as the first page lands
+    let cancelled = false
+    fetchBeatmapChunks('http://localhost:8000/api/beatmap', chunk => {
+      if (!cancelled) setNotes(prev => prev.concat(chunk.notes))
+    }).catch(e => {
+      console.error('Beatmap load failed:', e)
+      if (!cancelled) setError(e.message || String(e))
+    })
+    return () => { cancelled = true }
   }, [])
   
   useEffect(() => {
@@ -24,6 +34,12 @@ function Game() {
     <>
       <color attach="background" args={['#000']} />
       <ambientLight />
+
+      {error && (
+        <Html center>
+          <div style={{ color: '#ff0066', fontFamily: 'monospace' }}>Beatmap failed to load: {error}</div>
+        </Html>
+      )}
       
       {notes.map((note, i) => {
         const y = note.time - scroll
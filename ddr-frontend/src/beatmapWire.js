@@ -0,0 +1,49 @@
+// beatmapWire.js - Decoder for the binary beatmap format (server/beatmap_wire.py)
+
+export const BEATMAP_MEDIA_TYPE = 'application/x-ddr-beatmap'
+
+const HEADER_SIZE = 24
+const MAGIC = 'DDRB'
+
+// Decode one chunk into { total, offset, count, notes: [{ time, lane, end? }] }
+export function decodeChunk(buffer) {
+  const view = new DataView(buffer)
+  const magic = String.fromCharCode(...new Uint8Array(buffer, 0, 4))
+  if (magic !== MAGIC) throw new Error('Not a DDR beatmap chunk')
+
+  const total = view.getUint32(8, true)
+  const offset = view.getUint32(12, true)
+  const count = view.getUint32(16, true)
+  const base = view.getInt32(20, true)
+
+  const deltas = new Uint32Array(buffer, HEADER_SIZE, count)
+  const durations = new Uint32Array(buffer, HEADER_SIZE + 4 * count, count)
+  const lanes = new Uint8Array(buffer, HEADER_SIZE + 8 * count, count)
+
+  const notes = new Array(count)
+  let t = base
+  for (let i = 0; i < count; i++) {
+    t += deltas[i]
+    const note = { time: t / 1000, lane: lanes[i] }
+    if (durations[i] > 0) note.end = (t + durations[i]) / 1000
+    notes[i] = note
+  }
+  return { total, offset, count, notes }
+}
+
+// Fetch a chart page by page, calling onChunk as each page arrives
+export async function fetchBeatmapChunks(baseUrl, onChunk, pageSize = 2048) {
+  let offset = 0
+  let total = Infinity
+  while (offset < total) {
+    const res = await fetch(`${baseUrl}?format=binary&offset=${offset}&limit=${pageSize}`, {
+      headers: { Accept: BEATMAP_MEDIA_TYPE }
+    })
+    if (!res.ok) throw new Error(`Beatmap request failed: HTTP ${res.status}`)
+    const chunk = decodeChunk(await res.arrayBuffer())
+    total = chunk.total
+    onChunk(chunk)
+    if (chunk.count === 0) break
+    offset += chunk.count
+  }
+}
@@ -0,0 +1,69 @@
+// clockSync.js - NTP-style offset to the game server's clock (server/clock_sync.py)
+
+const WINDOW = 16
+const BURST = 5
+const INTERVAL_MS = 2000
+const REPORT_EVERY = 5
+
+// Local clock in seconds; monotonic, and the one the game loop uses
+export const localNow = () => performance.now() / 1000
+
+// Pings the server over an open game WebSocket. Feed it 'pong' messages with
+// handlePong; offset is server clock minus localNow(), taken from the
+// lowest-RTT sample of the last WINDOW exchanges.
+export class ClockSync {
+  constructor(ws) {
+    this.ws = ws
+    this.samples = []
+    this.count = 0
+    this.timer = null
+  }
+
+  start() {
+    // a quick burst for a first estimate, then a slow refresh for drift
+    for (let i = 0; i < BURST; i++) setTimeout(() => this.ping(), i * 100)
+    this.timer = setInterval(() => this.ping(), INTERVAL_MS)
+  }
+
+  stop() {
+    clearInterval(this.timer)
+  }
+
+  ping() {
+    if (this.ws.readyState === WebSocket.OPEN) {
+      this.ws.send(JSON.stringify({ type: 'ping', t0: localNow() }))
+    }
+  }
+
+  handlePong({ t0, t1, t2 }) {
+    const t3 = localNow()
+    const rtt = (t3 - t0) - (t2 - t1)
+    if (rtt < 0) return
+    this.samples.push({ rtt, offset: ((t1 - t0) + (t2 - t3)) / 2 })
+    if (this.samples.length > WINDOW) this.samples.shift()
+    if (++this.count % REPORT_EVERY === 0) {
+      const best = this.best()
+      this.ws.send(JSON.stringify({
+        type: 'clock',
+        offset_ms: best.offset * 1000,
+        rtt_ms: best.rtt * 1000
+      }))
+    }
+  }
+
+  best() {
+    return this.samples.reduce((a, b) => (b.rtt < a.rtt ? b : a), { rtt: Infinity, offset: 0 })
+  }
+
+  get synced() {
+    return this.samples.length > 0
+  }
+
+  toServer(localSeconds) {
+    return localSeconds + this.best().offset
+  }
+
+  toLocal(serverSeconds) {
+    return serverSeconds - this.best().offset
+  }
+}
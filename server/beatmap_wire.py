@@ -0,0 +1,84 @@
+import struct
+
+import numpy as np
+
+MEDIA_TYPE = "application/x-ddr-beatmap"
+MAGIC = b"DDRB"
+VERSION = 1
+DEFAULT_CHUNK = 2048
+MAX_CHUNK = 1 << 16  # most notes per chunk a client may ask for
+
+# magic, version, reserved, total notes in chart, offset of this chunk,
+# notes in this chunk, absolute time (ms) the first delta is relative to
+HEADER = struct.Struct("<4sBxHIIIi")
+
+# Body, in this order so every array is 4-byte aligned for JS typed arrays:
+#   Uint32Array deltas     ms since the previous note (first: since base time)
+#   Uint32Array durations  ms, 0 for taps
+#   Uint8Array  lanes
+#   Uint8Array  types      osu hit object type bit
+
+
+def encode_chunk(chart, offset=0, limit=None):
+    """Pack chart[offset:offset+limit] (CHART_DTYPE columns) into one binary chunk"""
+    total = len(chart)
+    offset = min(max(offset, 0), total)
+    end = total if limit is None else min(total, offset + limit)
+    part = chart[offset:end]
+
+    times = np.rint(part['time']).astype(np.int64)
+    base = int(times[0]) if len(times) else 0
+    deltas = np.diff(times, prepend=base)
+    durations = np.rint(part['end_time']).astype(np.int64) - times
+
+    header = HEADER.pack(MAGIC, VERSION, 0, total, offset, len(part), base)
+    return b"".join([
+        header,
+        deltas.clip(0).astype('<u4').tobytes(),
+        durations.clip(0).astype('<u4').tobytes(),
+        part['lane'].astype(np.uint8).tobytes(),
+        part['type'].astype(np.uint8).tobytes(),
+    ])
+
+
+def clamp_chunk_size(size, default=DEFAULT_CHUNK):
+    """A client-supplied chunk size as an int in [1, MAX_CHUNK]; default if it is not a number"""
+    try:
+        size = int(size)
+    except (TypeError, ValueError):
+        return default
+    return min(max(size, 1), MAX_CHUNK)
+
+
+def iter_chunks(chart, chunk_size=DEFAULT_CHUNK):
+    """Encode a chart as consecutive chunks, so a client can start before the last one arrives"""
+    if len(chart) == 0:
+        yield encode_chunk(chart)
+        return
+    for offset in range(0, len(chart), chunk_size):
+        yield encode_chunk(chart, offset, chunk_size)
+
+
+def decode_chunk(data):
+    """Inverse of encode_chunk: (header dict, times_ms, durations_ms, lanes, types)"""
+    magic, version, _, total, offset, count, base = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("not a DDR beatmap chunk")
+    pos = HEADER.size
+    deltas = np.frombuffer(data, '<u4', count, pos)
+    pos += 4 * count
+    durations = np.frombuffer(data, '<u4', count, pos)
+    pos += 4 * count
+    lanes = np.frombuffer(data, np.uint8, count, pos)
+    pos += count
+    types = np.frombuffer(data, np.uint8, count, pos)
+    times = base + np.cumsum(deltas, dtype=np.int64)
+    header = {"total": total, "offset": offset, "count": count}
+    return header, times, durations, lanes, types
+
+
+def wants_binary(format=None, accept=None):
+    """Content negotiation: ?format=binary or an Accept header naming MEDIA_TYPE"""
+    if format is not None:
+        return format == "binary"
+    return accept is not None and MEDIA_TYPE in accept
@@ -0,0 +1,231 @@
+import hashlib
+import os
+import struct
+import threading
+import zipfile
+from collections import OrderedDict
+from pathlib import Path
+
+from osufile import LANES, OsuFile, to_notes
+
+AUDIO_EXTENSIONS = ('.mp3', '.ogg')
+AUDIO_MEDIA_TYPES = {'.mp3': 'audio/mpeg', '.ogg': 'audio/ogg'}
+# zip local file header: signature ... name length, extra length (30 bytes)
+LOCAL_HEADER = struct.Struct("<4s22xHH")
+
+
+def find_audio(osz_path):
+    """Name of the audio member in an .osz, or None"""
+    with zipfile.ZipFile(osz_path, 'r') as z:
+        return next((f for f in z.namelist() if f.endswith(AUDIO_EXTENSIONS)), None)
+
+
+def member_data_offset(zip_file, info):
+    """Where a member's (stored) bytes start in the archive file"""
+    zip_file.fp.seek(info.header_offset)
+    signature, name_length, extra_length = LOCAL_HEADER.unpack(zip_file.fp.read(LOCAL_HEADER.size))
+    if signature != b"PK\x03\x04":
+        raise zipfile.BadZipFile(f"bad local header for {info.filename}")
+    return info.header_offset + LOCAL_HEADER.size + name_length + extra_length
+
+
+def file_key(path):
+    """Cache key that changes whenever the file on disk changes"""
+    st = os.stat(path)
+    return (str(Path(path).resolve()), st.st_mtime_ns, st.st_size)
+
+
+class BeatmapStore:
+    """
+    Parsed-chart cache for .osz files.
+
+    Charts are kept in an LRU keyed by (path, mtime, size), so an edited or
+    replaced file is re-parsed but repeated requests are served from memory.
+    The audio lookups below are cached per chart key and evicted with it.
+    Concurrent requests for a chart that is not cached yet share one parse.
+    Audio is extracted once into cache_dir under a content hash, unless the
+    archive stores it uncompressed (usual for mp3 / ogg): then audio_source()
+    points straight at its bytes inside the .osz.
+    """
+
+    def __init__(self, cache_dir="temp", max_charts=32):
+        self.cache_dir = Path(cache_dir)
+        self.max_charts = max_charts
+        self.charts = OrderedDict()
+        self.audio_files = {}
+        self.audio_sources = {}
+        self.index = {}
+        self.lock = threading.Lock()
+        self.loading = {}  # key -> Event set when its parse is done
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, osz_path):
+        """Return {"notes", "chart", "audio", "count", "metadata"} for a beatmap"""
+        key = file_key(osz_path)
+        while True:
+            with self.lock:
+                chart = self.charts.get(key)
+                if chart is not None:
+                    self.charts.move_to_end(key)
+                    self.hits += 1
+                    return chart
+                loading = self.loading.get(key)
+                if loading is None:
+                    loading = self.loading[key] = threading.Event()
+                    break
+            # another thread is parsing this chart: wait for it and look again
+            # (if its parse failed, the next caller through tries itself)
+            loading.wait()
+
+        try:
+            # parse outside the lock so other charts can still be served
+            osu = OsuFile.from_osz(osz_path)
+            columns = osu.hit_objects(LANES)
+            chart = {
+                "notes": to_notes(columns),
+                "chart": columns,
+                "audio": find_audio(osz_path),
+                "count": len(columns),
+                "metadata": osu.metadata,
+            }
+
+            with self.lock:
+                self.misses += 1
+                self.charts[key] = chart
+                self.charts.move_to_end(key)
+                while len(self.charts) > self.max_charts:
+                    evicted, _ = self.charts.popitem(last=False)
+                    self.audio_files.pop(evicted, None)
+                    self.audio_sources.pop(evicted, None)
+            return chart
+        finally:
+            with self.lock:
+                del self.loading[key]
+            loading.set()
+
+    def cached(self, osz_path):
+        """The parsed beatmap if it is in memory, else None; never touches the disk"""
+        key = file_key(osz_path)
+        with self.lock:
+            chart = self.charts.get(key)
+            if chart is not None:
+                self.charts.move_to_end(key)
+                self.hits += 1
+            return chart
+
+    def audio_path(self, osz_path):
+        """Path to the beatmap's audio, extracting it on first use only"""
+        key = file_key(osz_path)
+        with self.lock:
+            cached = self.audio_files.get(key)
+        if cached is not None and cached.exists():
+            return cached
+
+        audio_file = self.get(osz_path)["audio"]
+        if audio_file is None:
+            return None
+
+        audio_dir = self.cache_dir / "audio"
+        audio_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = audio_dir / f".{os.getpid()}-{threading.get_ident()}.part"
+        digest = hashlib.sha1()
+        with zipfile.ZipFile(osz_path, 'r') as z, z.open(audio_file) as src, open(tmp_path, 'wb') as dst:
+            for chunk in iter(lambda: src.read(1 << 16), b''):
+                digest.update(chunk)
+                dst.write(chunk)
+
+        path = audio_dir / f"{digest.hexdigest()}{Path(audio_file).suffix}"
+        if path.exists():
+            tmp_path.unlink()
+        else:
+            os.replace(tmp_path, path)
+
+        with self.lock:
+            # only while the chart is cached, so eviction bounds this too
+            if key in self.charts:
+                self.audio_files[key] = path
+        return path
+
+    def audio_source(self, osz_path):
+        """
+        {"path", "offset", "size", "etag", "mtime", "media_type"} locating the
+        audio bytes on disk (inside the .osz when stored, else the extracted
+        copy), or None if the beatmap has no audio. The ETag is the member's
+        CRC and size, so it only changes with the audio itself.
+        """
+        key = file_key(osz_path)
+        with self.lock:
+            cached = self.audio_sources.get(key)
+        if cached is not None and os.path.exists(cached["path"]):
+            return cached
+
+        audio_file = self.get(osz_path)["audio"]
+        if audio_file is None:
+            return None
+        with zipfile.ZipFile(osz_path, 'r') as z:
+            info = z.getinfo(audio_file)
+            stored = info.compress_type == zipfile.ZIP_STORED and not info.flag_bits & 0x1
+            offset = member_data_offset(z, info) if stored else 0
+        source = {
+            "path": str(osz_path) if stored else str(self.audio_path(osz_path)),
+            "offset": offset,
+            "size": info.file_size,
+            "etag": f'"{info.CRC:08x}-{info.file_size:x}"',
+            "mtime": key[1] / 1e9,
+            "media_type": AUDIO_MEDIA_TYPES.get(Path(audio_file).suffix.lower(), "application/octet-stream"),
+        }
+        with self.lock:
+            if key in self.charts:
+                self.audio_sources[key] = source
+        return source
+
+    def index_directory(self, directory):
+        """Record metadata for every .osz in directory; unchanged files are not re-read"""
+        with self.lock:
+            previous = {entry["key"]: entry for entry in self.index.values()}
+
+        index = {}
+        for osz in sorted(Path(directory).glob("*.osz")):
+            try:
+                key = file_key(osz)
+                entry = previous.get(key)
+                if entry is None:
+                    osu = OsuFile.from_osz(osz)
+                    meta = osu.metadata
+                    entry = {
+                        "key": key,
+                        "name": osz.stem,
+                        "path": str(osz),
+                        "title": meta.get("Title"),
+                        "artist": meta.get("Artist"),
+                        "version": meta.get("Version"),
+                        "count": len(osu.section("HitObjects")),
+                    }
+            except Exception as e:
+                print(f"⚠️  Failed to index {osz.name}: {e}")
+                continue
+            index[str(osz)] = entry
+
+        with self.lock:
+            self.index = index
+        return index
+
+    def start_indexer(self, directory, interval=30.0):
+        """Re-index directory in a daemon thread every interval seconds"""
+        stop = threading.Event()
+
+        def run():
+            while not stop.is_set():
+                self.index_directory(directory)
+                stop.wait(interval)
+
+        threading.Thread(target=run, name="beatmap-indexer", daemon=True).start()
+        return stop
+
+    def listing(self):
+        with self.lock:
+            return [
+                {k: v for k, v in entry.items() if k != "key"}
+                for entry in self.index.values()
+            ]
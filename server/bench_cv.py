@@ -0,0 +1,182 @@
+"""
+Headless benchmark of the CV server stages on any frame source.
+
+Runs each stage back to back per frame (no pipeline threads, so the numbers
+are per-stage costs, not overlapped throughput) and reports latency
+percentiles, FPS and peak memory:
+
+  yolo       YOLOv8n-pose on the full frame
+  midas      MiDaS_small at network resolution, sampled at the joints
+             (both through the inference backend picked with --backend)
+  serialize  pack_pose (UDP) and json.dumps (HTTP) of the pose
+  publish    PoseSender.send to a local port
+
+Without yolo the pose is a fixed sample, so serialize/publish can be
+measured on a box without torch.
+
+Usage: python bench_cv.py [--source synthetic] [--frames 300] [--stages yolo,midas,serialize,publish]
+                          [--backend torch|onnx|onnx-int8|mediapipe]
+"""
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+
+from depth import sample_depth_at_points
+from frame_source import open_source
+from inference import BACKENDS, load_backend
+from pose_trace import joints_to_pose
+from transport import JOINT_NAMES, PoseSender, pack_pose
+
+STAGES = ("yolo", "midas", "serialize", "publish")
+JOINTS = {"left_ankle": 15, "right_ankle": 16, "left_knee": 13, "right_knee": 14}
+BENCH_PORT = 18002
+WARMUP = 5
+
+
+def peak_rss_mb():
+    """Peak resident memory so far, or None where the resource module is missing (Windows)"""
+    if sys.platform == "win32":
+        return None
+    import resource
+    # ru_maxrss is in KiB on Linux, bytes on macOS
+    scale = 2 ** 20 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+def percentiles(ms):
+    ms = np.asarray(ms)
+    return {
+        "p50": float(np.percentile(ms, 50)),
+        "p95": float(np.percentile(ms, 95)),
+        "p99": float(np.percentile(ms, 99)),
+        "max": float(ms.max()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--source", default="synthetic", help="anything frame_source.open_source accepts")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--stages", default=",".join(STAGES))
+    parser.add_argument("--backend", choices=BACKENDS, default="torch")
+    parser.add_argument("--json", metavar="PATH", help="also write the results as JSON")
+    args = parser.parse_args()
+
+    stages = [s for s in args.stages.split(",") if s]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(sorted(unknown))}")
+
+    rss_start = peak_rss_mb()
+    t0 = time.perf_counter()
+    # torch / onnxruntime are only imported for the model stages
+    model = midas = None
+    if "yolo" in stages or "midas" in stages:
+        pose, depth = load_backend(args.backend)
+        model = pose if "yolo" in stages else None
+        midas = depth if "midas" in stages else None
+    load_seconds = time.perf_counter() - t0
+    rss_loaded = peak_rss_mb()
+
+    source = open_source(args.source, loop=True)
+    if not source.isOpened():
+        print(f"⚠️  Could not open {args.source}")
+        return
+    sender = PoseSender("127.0.0.1", BENCH_PORT) if "publish" in stages else None
+
+    default_points = np.array([[300, 420], [340, 420], [305, 310], [335, 310]], dtype=np.float32)
+    timings = {stage: [] for stage in stages}
+    totals = []
+    detected = 0
+
+    for i in range(args.frames + WARMUP):
+        ok, frame = source.read()
+        if not ok:
+            break
+        frame_t0 = time.perf_counter()
+        times = {}
+        points, conf = default_points, np.full(len(JOINTS), 0.9, dtype=np.float32)
+
+        if model is not None:
+            t = time.perf_counter()
+            keypoints, keypoint_conf = model(frame)
+            times["yolo"] = time.perf_counter() - t
+            if keypoints is not None:
+                detected += 1
+                points = keypoints[list(JOINTS.values())]
+                conf = keypoint_conf[list(JOINTS.values())]
+
+        depths = np.full(len(JOINTS), 128)
+        if midas is not None:
+            t = time.perf_counter()
+            depth_small = midas(frame)
+            depths = sample_depth_at_points(depth_small, points, frame.shape)
+            times["midas"] = time.perf_counter() - t
+
+        joints = {
+            name: (float(p[0]), float(p[1]), int(d), float(c))
+            for name, p, d, c in zip(JOINTS, points, depths, conf)
+        }
+        capture_time = time.time()
+
+        if "serialize" in stages:
+            t = time.perf_counter()
+            pack_pose(i, capture_time, joints)
+            json.dumps(joints_to_pose(joints, capture_time))
+            times["serialize"] = time.perf_counter() - t
+
+        if sender is not None:
+            t = time.perf_counter()
+            sender.send({name: joints[name] for name in JOINT_NAMES}, timestamp=capture_time)
+            times["publish"] = time.perf_counter() - t
+
+        if i >= WARMUP:
+            for stage, seconds in times.items():
+                timings[stage].append(1000 * seconds)
+            totals.append(1000 * (time.perf_counter() - frame_t0))
+
+    source.release()
+    if sender is not None:
+        sender.close()
+    if not totals:
+        print("⚠️  No frames read")
+        return
+
+    results = {
+        "source": args.source,
+        "backend": args.backend,
+        "frames": len(totals),
+        "load_seconds": load_seconds,
+        "fps": 1000 * len(totals) / sum(totals),
+        "stages": {stage: percentiles(ms) for stage, ms in timings.items() if ms},
+        "total": percentiles(totals),
+        "peak_rss_mb": {"start": rss_start, "models_loaded": rss_loaded, "end": peak_rss_mb()},
+    }
+    if model is not None:
+        results["pose_detected"] = detected / len(totals)
+    if getattr(midas, "device", None) is not None and midas.device.type == "cuda":
+        results["cuda_peak_mb"] = midas.torch.cuda.max_memory_allocated() / 2 ** 20
+
+    print(f"🎥 {results['frames']} frames from {args.source} ({args.backend}), "
+          f"models loaded in {load_seconds:.1f}s")
+    for stage, p in list(results["stages"].items()) + [("total", results["total"])]:
+        print(f"  {stage:<10} p50 {p['p50']:8.3f} ms  p95 {p['p95']:8.3f} ms  "
+              f"p99 {p['p99']:8.3f} ms  max {p['max']:8.3f} ms")
+    print(f"  {results['fps']:.1f} fps (sequential)")
+    rss = results["peak_rss_mb"]
+    if rss["end"] is not None:
+        print(f"💾 peak RSS {rss['start']:.0f} MB at start, {rss['models_loaded']:.0f} MB with models, "
+              f"{rss['end']:.0f} MB at end")
+    if "pose_detected" in results:
+        print(f"  pose found in {100 * results['pose_detected']:.0f}% of frames")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Replay a synthetic ankle trajectory (still, quick steps, still) with
+detector noise through PoseFilter and report the latency/jitter tradeoff
+for a sweep of One Euro parameters.
+
+  jitter  - RMS of the filtered x while the foot stands still (px)
+  lag     - delay that best aligns filtered x with the true path while moving (ms)
+  error   - RMS of filtered x vs the true x at capture time while moving (px)
+  predict - RMS error of position + velocity * horizon vs the true position
+            `horizon` later, i.e. what the sent velocities are worth for
+            extrapolating past capture time
+  landing - mean delay from each true landing to the FootTracker landing,
+            fed the predicted position like StepDetector does (raw: the
+            detections themselves), and landings missed
+
+Usage: python bench_filter.py [--fps 30] [--noise 4] [--horizon 0.033]
+"""
+import argparse
+import math
+
+import numpy as np
+
+from judgement import PREDICT_HORIZON, FootTracker
+from keypoint_filter import PoseFilter
+
+JOINTS = ("left_ankle",)
+
+
+def trajectory(fps, seconds=12.0, step_every=0.5, step_px=120.0):
+    """True ankle x over time (3 s still, then steps back and forth, then 3 s still) and landing times"""
+    t = np.arange(0, seconds, 1 / fps)
+    x = np.full_like(t, 320.0)
+    moving = (t >= 3.0) & (t < seconds - 3.0)
+    phase = (t[moving] - 3.0) / step_every
+    # smooth out-and-back step every step_every seconds
+    x[moving] += step_px * np.sin(np.pi * np.clip(phase % 2, 0, 1)) ** 2 * np.where(phase % 4 < 2, 1, -1)
+    landings = np.arange(3.0 + step_every, seconds - 3.0, 2 * step_every)
+    return t, x, moving, landings
+
+
+def run(t, noisy, min_cutoff, beta, d_cutoff):
+    pose_filter = PoseFilter(JOINTS, min_cutoff, beta, d_cutoff)
+    pos = np.empty_like(noisy)
+    vel = np.empty_like(noisy)
+    for i, (ti, xi) in enumerate(zip(t, noisy)):
+        x, _, _, _, vx, _, _ = pose_filter.update(ti, {"left_ankle": (xi, 240.0, 100.0, 0.9)})["left_ankle"]
+        pos[i], vel[i] = x, vx
+    return pos, vel
+
+
+def landing_delay(t, x, landings, window=0.3):
+    """(mean delay in ms, missed) of FootTracker landings on path x vs the true landing times"""
+    foot = FootTracker()
+    detected = np.array([ti for ti, xi in zip(t, x) if foot.update(ti, xi, 240.0, 100.0)])
+    delays = []
+    for landing in landings:
+        hits = detected[(detected >= landing - 0.1) & (detected < landing + window)]
+        if len(hits):
+            delays.append(hits[0] - landing)
+    mean = 1000 * float(np.mean(delays)) if delays else float("nan")
+    return mean, len(landings) - len(delays)
+
+
+def lag_ms(t, x, pos, moving, max_lag_ms=150):
+    """Sub-frame delay of pos behind x, by interpolating the true path"""
+    lags = np.arange(max_lag_ms + 1)
+    errors = [np.mean((pos[moving] - np.interp(t[moving] - lag / 1000, t, x)) ** 2) for lag in lags]
+    return float(lags[int(np.argmin(errors))])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--noise", type=float, default=4.0, help="detector noise std in px")
+    parser.add_argument("--horizon", type=float, default=PREDICT_HORIZON, help="prediction horizon in seconds")
+    args = parser.parse_args()
+
+    t, x, moving, landings = trajectory(args.fps)
+    noisy = x + np.random.default_rng(0).normal(0, args.noise, len(x))
+    still = ~moving & (t > 0.5)
+    ahead = max(1, int(round(args.horizon * args.fps)))
+
+    def report(label, pos, vel, tracked):
+        jitter = math.sqrt(np.mean((pos[still] - x[still]) ** 2))
+        predicted = pos[:-ahead] + vel[:-ahead] * args.horizon
+        predict = math.sqrt(np.mean((predicted - x[ahead:])[moving[:-ahead]] ** 2))
+        stale = math.sqrt(np.mean((pos[:-ahead] - x[ahead:])[moving[:-ahead]] ** 2))
+        error = math.sqrt(np.mean((pos - x)[moving] ** 2))
+        delay, missed = landing_delay(t, tracked, landings)
+        print(f"{label:<34} jitter {jitter:5.2f}px  lag {lag_ms(t, x, pos, moving):4.0f}ms  error {error:5.2f}px  "
+              f"predict {predict:6.2f}px (no prediction {stale:6.2f}px)  landing {delay:5.1f}ms "
+              f"({missed} missed)")
+
+    print(f"🦶 {len(t)} frames at {args.fps:.0f}fps, noise {args.noise}px, horizon {1000 * args.horizon:.0f}ms\n")
+    # what FootTracker did before: finite differences of raw detections
+    diff = np.concatenate([[0.0], np.diff(noisy) / np.diff(t)])
+    report("raw", noisy, diff, noisy)
+    for d_cutoff in (1.0, 4.0):
+        for min_cutoff in (0.5, 1.0, 2.0):
+            for beta in (0.01, 0.05, 0.2):
+                pos, vel = run(t, noisy, min_cutoff, beta, d_cutoff)
+                report(f"min_cutoff {min_cutoff} beta {beta} d {d_cutoff}", pos, vel, pos + vel * args.horizon)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Replay a dense chart with simulated key presses through the osuparse.py
+judgement and draw loops, old linear scan vs LaneIndex.
+
+Usage: python bench_judgement.py [--notes 5000] [--fps 60]
+"""
+import argparse
+import random
+import time
+
+from note_index import LaneIndex
+
+LANES = 4
+HIT_WINDOW = 0.15
+NOTE_SPEED = 300
+HIT_Y = 500
+SCREEN_H = 600
+
+
+def dense_chart(n, seed=0):
+    rng = random.Random(seed)
+    notes, t = [], 1.0
+    for _ in range(n):
+        t += rng.choice([0.05, 0.1, 0.125, 0.25])
+        notes.append({'time': round(t, 3), 'lane': rng.randrange(LANES)})
+    return notes
+
+
+def key_events(notes, seed=1):
+    """One press per note with human-ish timing error, plus some stray presses"""
+    rng = random.Random(seed)
+    events = [(n['time'] + rng.gauss(0, 0.04), n['lane']) for n in notes]
+    events += [(rng.uniform(0, notes[-1]['time']), rng.randrange(LANES)) for _ in range(len(notes) // 10)]
+    return sorted(events)
+
+
+def legacy_judge(notes, hit_notes, lane, current_time):
+    closest_note = None
+    closest_delta = HIT_WINDOW + 1
+    for i, note in enumerate(notes):
+        if i in hit_notes or note['lane'] != lane:
+            continue
+        delta = current_time - note['time']
+        if abs(delta) < closest_delta:
+            closest_delta = abs(delta)
+            closest_note = i
+    if closest_note is not None and closest_delta <= HIT_WINDOW:
+        hit_notes.add(closest_note)
+        return closest_note, closest_delta
+    return None
+
+
+def legacy_draw(notes, hit_notes, current_time):
+    drawn = 0
+    for i, note in enumerate(notes):
+        if i in hit_notes:
+            continue
+        y = HIT_Y - NOTE_SPEED * (note['time'] - current_time)
+        if 0 <= y <= SCREEN_H:
+            drawn += 1
+    return drawn
+
+
+def index_draw(index, current_time):
+    t_start = current_time - (SCREEN_H - HIT_Y) / NOTE_SPEED
+    t_end = current_time + HIT_Y / NOTE_SPEED
+    return sum(1 for _ in index.visible(t_start, t_end))
+
+
+def replay(notes, events, fps, judge, draw):
+    """Interleave key events and frames in time order; returns results and per-op timings"""
+    judged, drawn = [], []
+    judge_time = draw_time = 0.0
+    frame_dt = 1.0 / fps
+    next_frame = 0.0
+    end = notes[-1]['time'] + 1
+    ei = 0
+    while next_frame < end:
+        while ei < len(events) and events[ei][0] <= next_frame:
+            t, lane = events[ei]
+            t0 = time.perf_counter()
+            judged.append(judge(lane, t))
+            judge_time += time.perf_counter() - t0
+            ei += 1
+        t0 = time.perf_counter()
+        drawn.append(draw(next_frame))
+        draw_time += time.perf_counter() - t0
+        next_frame += frame_dt
+    return judged, drawn, judge_time, draw_time
+
+
+def main(n, fps):
+    notes = dense_chart(n)
+    events = key_events(notes)
+    frames = int((notes[-1]['time'] + 1) * fps)
+    print(f"🎵 {n:,} notes, {len(events):,} key events, {frames:,} frames at {fps} fps")
+
+    hit_notes = set()
+    legacy = replay(
+        notes, events, fps,
+        lambda lane, t: legacy_judge(notes, hit_notes, lane, t),
+        lambda t: legacy_draw(notes, hit_notes, t),
+    )
+
+    index = LaneIndex(notes, LANES)
+    indexed = replay(
+        notes, events, fps,
+        lambda lane, t: index.judge(lane, t, HIT_WINDOW),
+        lambda t: index_draw(index, t),
+    )
+
+    for label, (_, _, judge_time, draw_time) in (("linear scan", legacy), ("LaneIndex", indexed)):
+        print(f"  {label:<12} judge {1e6 * judge_time / len(events):9.1f} us/event   "
+              f"draw {1e6 * draw_time / frames:9.1f} us/frame")
+
+    same = [a and a[0] for a in legacy[0]] == [b and b[0] for b in indexed[0]] and legacy[1] == indexed[1]
+    hits = sum(1 for j in indexed[0] if j is not None)
+    print(f"  {hits:,} hits, results {'match' if same else 'DIFFER'}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--notes", type=int, default=5000)
+    parser.add_argument("--fps", type=int, default=60)
+    args = parser.parse_args()
+    main(args.notes, args.fps)
@@ -0,0 +1,124 @@
+"""
+Benchmark the columnar .osu parser on synthetic marathon charts.
+
+Compares the old per-line dict parser with OsuFile.hit_objects, and JSON
+encoding of a dict-per-note list with encoding the columns.
+
+Usage: python bench_osu.py [--objects 100000]
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+import zipfile
+
+from osufile import LANES, OsuFile, iter_osz_lines, to_notes
+
+
+def legacy_parse_osu(osu_text):
+    """The original parser from game_server.py / osuparse.py (circles only)"""
+    section = ''
+    notes = []
+    for line in osu_text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith('['):
+            section = line
+            continue
+        if section == '[HitObjects]':
+            parts = line.split(',')
+            x = int(parts[0])
+            time_ms = int(parts[2])
+            type_flag = int(parts[3])
+            if not (type_flag & 1):
+                continue
+            lane = min(LANES - 1, int(x / 512 * LANES))
+            notes.append({'time': time_ms / 1000, 'lane': lane})
+    return notes
+
+
+def synthetic_chart(n, hold_ratio=0.2, seed=0):
+    rng = random.Random(seed)
+    lines = [
+        "osu file format v14",
+        "",
+        "[General]",
+        "Mode: 3",
+        "",
+        "[Metadata]",
+        "Title:Synthetic",
+        f"Version:{n} objects",
+        "",
+        "[Difficulty]",
+        "CircleSize:4",
+        "SliderMultiplier:1.4",
+        "",
+        "[TimingPoints]",
+    ]
+    for i in range(0, n // 100 + 1):
+        lines.append(f"{i * 10000},{rng.choice([400, 500, 600])},4,1,0,100,1,0")
+    lines += ["", "[HitObjects]"]
+    t = 1000
+    for _ in range(n):
+        t += rng.choice([50, 100, 150, 200])
+        x = 64 + 128 * rng.randrange(LANES)
+        if rng.random() < hold_ratio:
+            lines.append(f"{x},192,{t},128,0,{t + rng.randrange(100, 800)}:0:0:0:0:")
+        else:
+            lines.append(f"{x},192,{t},1,0,0:0:0:0:")
+    return "\n".join(lines) + "\n"
+
+
+def timed(label, fn):
+    t0 = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - t0
+
+    # second run for memory, tracemalloc slows everything down
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {label:<30} {1000 * elapsed:9.1f} ms  peak {peak / 1e6:7.1f} MB")
+    return result
+
+
+def main(n):
+    text = synthetic_chart(n)
+    print(f"📄 Synthetic chart: {n:,} objects, {len(text) / 1e6:.1f} MB")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        osz = os.path.join(tmp, "synthetic.osz")
+        with zipfile.ZipFile(osz, "w", zipfile.ZIP_DEFLATED) as z:
+            z.writestr("synthetic.osu", text)
+
+        print("⏱️  Parse")
+        legacy = timed("legacy parse_osu (circles)", lambda: legacy_parse_osu(text))
+        chart = timed("OsuFile.from_text + columns", lambda: OsuFile.from_text(text).hit_objects())
+        timed("OsuFile.from_osz + columns", lambda: OsuFile.from_osz(osz).hit_objects())
+        timed("stream lines from .osz", lambda: sum(1 for _ in iter_osz_lines(osz)))
+        notes = timed("to_notes (dict list)", lambda: to_notes(chart))
+
+    print(f"  legacy kept {len(legacy):,} objects, columnar kept {len(chart):,} "
+          f"({int((chart['end_time'] > chart['time']).sum()):,} long notes)")
+
+    print("⏱️  JSON encode")
+    timed("legacy dict list", lambda: json.dumps(legacy))
+    timed("dict list incl. long notes", lambda: json.dumps(notes))
+    timed("columns", lambda: json.dumps({
+        "time": chart["time"].tolist(),
+        "lane": chart["lane"].tolist(),
+        "type": chart["type"].tolist(),
+        "end_time": chart["end_time"].tolist(),
+    }))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--objects", type=int, default=100000)
+    args = parser.parse_args()
+    main(args.objects)
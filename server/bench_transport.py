@@ -0,0 +1,93 @@
+"""
+Benchmark the binary pose transport against the old JSON payload.
+
+Sender side: encode cost of pack_pose vs json.dumps.
+Receiver side: decode cost of unpack_pose vs json.loads.
+Loopback: UDP PoseSender -> PoseReceiver throughput and one-way latency.
+
+Usage: python bench_transport.py [--packets 20000] [--rate 0]
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from transport import JOINT_NAMES, PoseSender, pack_pose, start_pose_receiver, unpack_pose
+
+BENCH_PORT = 18001
+
+
+def sample_joints(i):
+    return {name: (100.0 + i % 50, 200.0 + j, 90.0, 0.9) for j, name in enumerate(JOINT_NAMES)}
+
+
+def sample_json(i):
+    data = {name: {"x": x, "y": y, "depth": d} for name, (x, y, d, _) in sample_joints(i).items()}
+    data["timestamp"] = time.time()
+    return data
+
+
+def bench(label, fn, n):
+    t0 = time.perf_counter()
+    for i in range(n):
+        fn(i)
+    elapsed = time.perf_counter() - t0
+    print(f"  {label:<24} {n / elapsed:>12,.0f} ops/s  {1e6 * elapsed / n:6.2f} us/op")
+
+
+def bench_codec(n):
+    joints = sample_joints(0)
+    packet = pack_pose(1, time.time(), joints)
+    body = json.dumps(sample_json(0)).encode()
+    print(f"📦 Payload: binary {len(packet)} B, json {len(body)} B")
+
+    print("🎥 Sender")
+    bench("pack_pose", lambda i: pack_pose(i, time.time(), joints), n)
+    bench("json.dumps", lambda i: json.dumps(sample_json(i)).encode(), n)
+
+    print("🎮 Receiver")
+    bench("unpack_pose", lambda i: unpack_pose(packet), n)
+    bench("json.loads", lambda i: json.loads(body), n)
+
+
+async def bench_loopback(n, rate):
+    latencies = []
+
+    def on_pose(data):
+        latencies.append(time.time() - data["timestamp"])
+
+    transport, receiver = await start_pose_receiver(on_pose, host="127.0.0.1", port=BENCH_PORT)
+    sender = PoseSender("127.0.0.1", BENCH_PORT)
+    interval = 1.0 / rate if rate > 0 else 0
+
+    t0 = time.perf_counter()
+    for i in range(n):
+        sender.send(sample_joints(i))
+        # yield so the receiver runs on the same loop
+        await asyncio.sleep(interval)
+    await asyncio.sleep(0.2)
+    elapsed = time.perf_counter() - t0 - 0.2
+
+    sender.close()
+    transport.close()
+
+    print(f"🔁 UDP loopback ({'unthrottled' if rate <= 0 else f'{rate} Hz'})")
+    print(f"  sent {sender.sent}, coalesced {sender.coalesced}, received {receiver.received}, "
+          f"dropped {receiver.dropped}, errors {sender.errors}")
+    print(f"  send rate {n / elapsed:,.0f} poses/s")
+    if latencies:
+        latencies.sort()
+        ms = [1000 * x for x in latencies]
+        print(f"  latency p50 {statistics.median(ms):.3f} ms  "
+              f"p99 {ms[int(0.99 * (len(ms) - 1))]:.3f} ms  max {ms[-1]:.3f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--packets", type=int, default=20000)
+    parser.add_argument("--rate", type=float, default=0, help="poses per second, 0 = as fast as possible")
+    args = parser.parse_args()
+
+    bench_codec(args.packets)
+    asyncio.run(bench_loopback(args.packets, args.rate))
@@ -0,0 +1,171 @@
+import asyncio
+import json
+import time
+from collections import deque
+
+
+class Subscriber:
+    """
+    One client's outbound state: a latest-value slot for state updates
+    (only the newest is kept) and a short queue for discrete events.
+    """
+
+    def __init__(self, ws, topics, max_events):
+        self.ws = ws
+        self.topics = set(topics)
+        self.events = deque(maxlen=max_events)
+        self.dropped_events = 0
+        self.pending = None
+        self.pending_origin = None
+        self.pending_since = None
+        self.ready = asyncio.Event()
+        self.task = None
+        self.sent = 0
+        self.coalesced = 0
+        self.skipped_in_a_row = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.clock = None  # the client's reported clock offset / RTT, if it syncs
+
+    def offer(self, text, origin=None):
+        if self.pending is not None:
+            self.coalesced += 1
+            self.skipped_in_a_row += 1
+        else:
+            self.pending_since = time.perf_counter()
+        self.pending = text
+        self.pending_origin = origin
+        self.ready.set()
+
+    def push(self, text, origin=None):
+        if len(self.events) == self.events.maxlen:
+            self.dropped_events += 1
+            self.skipped_in_a_row += 1
+        if self.pending is None and not self.events:
+            self.pending_since = time.perf_counter()
+        self.events.append((text, origin))
+        self.ready.set()
+
+    def stats(self):
+        return {
+            "topics": sorted(self.topics),
+            "sent": self.sent,
+            "dropped_events": self.dropped_events,
+            "coalesced": self.coalesced,
+            "lag_ms": round(1000 * self.last_lag, 3),
+            "max_lag_ms": round(1000 * self.max_lag, 3),
+            "clock": self.clock,
+        }
+
+
+class Broadcaster:
+    """
+    Fan-out of pose updates and game events to WebSocket clients.
+
+    publish() serializes a message once and hands it to every subscriber of
+    its topic without awaiting anything. Each subscriber has its own sender
+    task, so a slow client only falls behind itself: intermediate updates are
+    replaced by newer ones, and a client that stalls for send_timeout seconds
+    or skips max_skipped updates in a row is disconnected. publish_event()
+    is for messages that must not be coalesced (judgements); they are queued
+    per client, up to max_events.
+
+    A message may carry an `origin` (anything, e.g. the pose's capture time
+    and seq); on_delivered(topic, origin, send_seconds) is called after it
+    was written to a client.
+    """
+
+    def __init__(self, send_timeout=1.0, max_skipped=120, max_events=64, on_delivered=None):
+        self.send_timeout = send_timeout
+        self.max_skipped = max_skipped
+        self.max_events = max_events
+        self.on_delivered = on_delivered
+        self.subscribers = {}
+        self.published = 0
+        self.evicted = 0
+
+    def __len__(self):
+        return len(self.subscribers)
+
+    def subscribe(self, ws, topics=("pose",)):
+        sub = Subscriber(ws, topics, self.max_events)
+        sub.task = asyncio.create_task(self._sender(sub))
+        self.subscribers[ws] = sub
+        return sub
+
+    def unsubscribe(self, ws):
+        sub = self.subscribers.pop(ws, None)
+        if sub is not None and sub.task is not asyncio.current_task():
+            sub.task.cancel()
+
+    def has_subscribers(self, topic):
+        return any(topic in sub.topics for sub in self.subscribers.values())
+
+    def publish(self, message, topic="pose", origin=None):
+        self._fan_out(message, topic, Subscriber.offer, origin)
+
+    def publish_event(self, message, topic="judgement", origin=None):
+        self._fan_out(message, topic, Subscriber.push, origin)
+
+    def _fan_out(self, message, topic, deliver, origin):
+        text = None
+        for sub in list(self.subscribers.values()):
+            if topic not in sub.topics:
+                continue
+            if sub.skipped_in_a_row > self.max_skipped:
+                self._evict(sub, "too slow")
+                continue
+            if text is None:
+                text = json.dumps(message)
+                self.published += 1
+            deliver(sub, text, (topic, origin))
+
+    async def _sender(self, sub):
+        while True:
+            await sub.ready.wait()
+            sub.ready.clear()
+            if sub.events:
+                text, origin = sub.events.popleft()
+                if sub.events or sub.pending is not None:
+                    sub.ready.set()
+            else:
+                text, sub.pending = sub.pending, None
+                origin = sub.pending_origin
+            if text is None:
+                continue
+            sub.skipped_in_a_row = 0
+            t0 = time.perf_counter()
+            try:
+                await asyncio.wait_for(sub.ws.send_text(text), self.send_timeout)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self._evict(sub, "send failed")
+                return
+            sub.sent += 1
+            now = time.perf_counter()
+            sub.last_lag = now - sub.pending_since
+            sub.max_lag = max(sub.max_lag, sub.last_lag)
+            if self.on_delivered is not None:
+                topic, message_origin = origin
+                self.on_delivered(topic, message_origin, now - t0)
+
+    def _evict(self, sub, reason):
+        print(f"⚠️  Dropping subscriber ({reason})")
+        self.evicted += 1
+        self.unsubscribe(sub.ws)
+        asyncio.create_task(self._close(sub.ws))
+
+    async def _close(self, ws):
+        try:
+            await ws.close()
+        except Exception:
+            pass
+
+    def stats(self):
+        return {
+            "subscribers": len(self.subscribers),
+            "published": self.published,
+            "evicted": self.evicted,
+            "clients": [sub.stats() for sub in self.subscribers.values()],
+        }
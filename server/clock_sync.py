@@ -0,0 +1,72 @@
+"""
+NTP-style clock offset estimation between a client and the game server.
+
+The client sends its clock t0, the server answers with t1 (request received)
+and t2 (reply sent) on its own clock, and the client reads t3 when the reply
+arrives. Then
+
+  offset = ((t1 - t0) + (t2 - t3)) / 2     server clock minus client clock
+  rtt    = (t3 - t0) - (t2 - t1)
+
+The error of one sample is at most rtt / 2, and it grows with queueing delay,
+so the estimate is the offset of the lowest-RTT sample in a sliding window.
+The window also lets the estimate follow slow clock drift.
+
+The server clock (time.time() in game_server.py) is the shared timebase:
+senders convert capture times with to_server() before publishing them.
+"""
+import threading
+from collections import deque
+
+
+def ntp_sample(t0, t1, t2, t3):
+    """(offset, rtt) of one exchange"""
+    return ((t1 - t0) + (t2 - t3)) / 2, (t3 - t0) - (t2 - t1)
+
+
+class ClockEstimator:
+    def __init__(self, window=16):
+        self.samples = deque(maxlen=window)  # (rtt, offset)
+        self.lock = threading.Lock()
+        self.count = 0
+
+    def add(self, t0, t1, t2, t3):
+        offset, rtt = ntp_sample(t0, t1, t2, t3)
+        if rtt < 0:
+            return None  # clock stepped mid-exchange
+        with self.lock:
+            self.samples.append((rtt, offset))
+            self.count += 1
+        return offset, rtt
+
+    @property
+    def synced(self):
+        return bool(self.samples)
+
+    def best(self):
+        """(rtt, offset) of the lowest-RTT sample in the window, or (None, 0.0) before the first"""
+        with self.lock:
+            return min(self.samples) if self.samples else (None, 0.0)
+
+    @property
+    def offset(self):
+        return self.best()[1]
+
+    @property
+    def rtt(self):
+        return self.best()[0]
+
+    def to_server(self, t):
+        return t + self.offset
+
+    def stats(self):
+        rtt, offset = self.best()
+        with self.lock:
+            offsets = [o for _, o in self.samples]
+        return {
+            "samples": self.count,
+            "offset_ms": round(1000 * offset, 3),
+            "rtt_ms": None if rtt is None else round(1000 * rtt, 3),
+            # spread of the window's offsets, mostly path asymmetry and jitter
+            "jitter_ms": round(1000 * (max(offsets) - min(offsets)), 3) if offsets else None,
+        }
@@ -0,0 +1,60 @@
+import numpy as np
+
+
+def depth_range(depth):
+    """Min/max of a depth map, used to scale samples to 0-255 like cv2.NORM_MINMAX"""
+    lo = float(depth.min())
+    hi = float(depth.max())
+    return lo, hi
+
+
+def bilinear_sample(depth, u, v):
+    """Bilinear lookup of depth at fractional (u, v) pixel coords (arrays of equal shape)"""
+    h, w = depth.shape[:2]
+    u = np.clip(u, 0, w - 1)
+    v = np.clip(v, 0, h - 1)
+    u0 = np.floor(u).astype(np.int64)
+    v0 = np.floor(v).astype(np.int64)
+    u1 = np.minimum(u0 + 1, w - 1)
+    v1 = np.minimum(v0 + 1, h - 1)
+    fu = u - u0
+    fv = v - v0
+
+    top = depth[v0, u0] * (1 - fu) + depth[v0, u1] * fu
+    bottom = depth[v1, u0] * (1 - fu) + depth[v1, u1] * fu
+    return top * (1 - fv) + bottom * fv
+
+
+def sample_depth_at_points(depth, points, frame_shape, radius=1, value_range=None):
+    """
+    Sample a low-resolution depth prediction at frame-space points.
+
+    Each point is mapped into the depth map's grid (same convention as
+    interpolate(..., align_corners=False)), bilinearly sampled over a
+    (2*radius+1)^2 neighbourhood and reduced with a median. Values are
+    scaled to 0-255 with the min/max of the small map, so they line up
+    with the old full-frame normalize. Points outside the frame get 0.
+    """
+    points = np.asarray(points, dtype=np.float32).reshape(-1, 2)
+    fh, fw = frame_shape[:2]
+    dh, dw = depth.shape[:2]
+    lo, hi = value_range if value_range is not None else depth_range(depth)
+
+    u = (points[:, 0] + 0.5) * (dw / fw) - 0.5
+    v = (points[:, 1] + 0.5) * (dh / fh) - 0.5
+
+    offsets = np.arange(-radius, radius + 1, dtype=np.float32)
+    du, dv = np.meshgrid(offsets, offsets)
+    samples = bilinear_sample(
+        depth,
+        u[:, None] + du.ravel()[None, :],
+        v[:, None] + dv.ravel()[None, :],
+    )
+    values = np.median(samples, axis=1)
+
+    scaled = (values - lo) / (hi - lo) * 255 if hi > lo else np.zeros_like(values)
+    scaled = np.clip(scaled, 0, 255).astype(np.int32)
+
+    inside = (points[:, 0] >= 0) & (points[:, 0] < fw) & (points[:, 1] >= 0) & (points[:, 1] < fh)
+    scaled[~inside] = 0
+    return scaled
@@ -0,0 +1,97 @@
+import time
+
+import numpy as np
+
+
+class DepthScheduler:
+    """
+    Decides per frame whether MiDaS has to run.
+
+    Depth is refreshed when the tracked joints moved more than
+    motion_threshold pixels since the last run, when any joint's confidence
+    dropped by more than conf_drop, or when `interval` frames have passed.
+    In between, callers re-sample the last depth map at the current keypoints,
+    which follows the joints as they move at no inference cost.
+
+    `interval` adapts to the latency budget: it grows (up to max_interval)
+    while the smoothed frame time is over budget_ms and shrinks back to 1
+    when there is headroom.
+    """
+
+    def __init__(self, max_interval=6, budget_ms=50.0, motion_threshold=25.0, conf_drop=0.25):
+        self.max_interval = max_interval
+        self.budget = budget_ms / 1000
+        self.motion_threshold = motion_threshold
+        self.conf_drop = conf_drop
+        self.interval = 1
+        self.since_run = 0
+        self.last_points = None
+        self.last_conf = None
+        self.last_run_time = None
+        self.frame_time = None
+
+        self.frames = 0
+        self.runs = 0
+        self.stale_frames = 0
+        self.stale_seconds = 0.0
+        self.started_at = time.perf_counter()
+
+    def should_run(self, points=None, conf=None):
+        self.frames += 1
+        self.since_run += 1
+        if self.last_run_time is None:
+            return True
+        if points is None:
+            # nobody to sample; keep the old map
+            return False
+        if self.since_run >= self.interval:
+            return True
+
+        points = np.asarray(points, dtype=np.float32)
+        if self.last_points is not None:
+            motion = np.linalg.norm(points - self.last_points, axis=-1).max()
+            if motion > self.motion_threshold:
+                return True
+        if conf is not None and self.last_conf is not None:
+            if (self.last_conf - np.asarray(conf, dtype=np.float32)).max() > self.conf_drop:
+                return True
+        return False
+
+    def ran(self, points=None, conf=None):
+        """Call after MiDaS ran for this frame"""
+        self.runs += 1
+        self.since_run = 0
+        self.last_run_time = time.perf_counter()
+        self.last_points = None if points is None else np.asarray(points, dtype=np.float32)
+        self.last_conf = None if conf is None else np.asarray(conf, dtype=np.float32)
+
+    def skipped(self):
+        """Call when the previous depth map was reused for this frame"""
+        self.stale_frames += self.since_run
+        self.stale_seconds += time.perf_counter() - self.last_run_time
+
+    def observe(self, frame_seconds):
+        """Feed the end-to-end time of a frame to adapt the refresh interval"""
+        if self.frame_time is None:
+            self.frame_time = frame_seconds
+        else:
+            self.frame_time = 0.9 * self.frame_time + 0.1 * frame_seconds
+        if self.frame_time > self.budget:
+            self.interval = min(self.max_interval, self.interval + 1)
+        elif self.frame_time < 0.8 * self.budget:
+            self.interval = max(1, self.interval - 1)
+
+    def stats(self):
+        elapsed = time.perf_counter() - self.started_at
+        return {
+            "fps": self.frames / elapsed if elapsed > 0 else 0.0,
+            "depth_fps": self.runs / elapsed if elapsed > 0 else 0.0,
+            "interval": self.interval,
+            "avg_stale_frames": self.stale_frames / self.frames if self.frames else 0.0,
+            "avg_stale_ms": 1000 * self.stale_seconds / self.frames if self.frames else 0.0,
+        }
+
+    def format_stats(self):
+        s = self.stats()
+        return (f"{s['fps']:.1f}fps, depth {s['depth_fps']:.1f}fps (every {s['interval']}), "
+                f"staleness {s['avg_stale_frames']:.2f} frames / {s['avg_stale_ms']:.1f}ms")
@@ -0,0 +1,148 @@
+import glob
+import math
+import os
+import time
+
+import cv2
+import numpy as np
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+class VideoSource:
+    """Webcam index, video file or stream URL through cv2.VideoCapture"""
+
+    def __init__(self, spec, loop=False):
+        self.spec = spec
+        self.loop = loop and not isinstance(spec, int)
+        self.cap = cv2.VideoCapture(spec)
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def read(self):
+        ret, frame = self.cap.read()
+        if not ret and self.loop:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.cap.read()
+        return ret, frame
+
+    def release(self):
+        self.cap.release()
+
+
+class ImageDirSource:
+    """Sorted still images from a directory, one per read()"""
+
+    def __init__(self, path, loop=False):
+        self.paths = sorted(
+            p for p in glob.glob(os.path.join(path, "*")) if p.lower().endswith(IMAGE_EXTENSIONS)
+        )
+        self.loop = loop
+        self.index = 0
+
+    def isOpened(self):
+        return bool(self.paths)
+
+    def read(self):
+        if self.index >= len(self.paths):
+            if not self.loop or not self.paths:
+                return False, None
+            self.index = 0
+        frame = cv2.imread(self.paths[self.index])
+        self.index += 1
+        return frame is not None, frame
+
+    def release(self):
+        pass
+
+
+class SyntheticSource:
+    """
+    Generated frames: a stick figure stepping in place on a noisy background.
+    Deterministic for a given seed, so runs are comparable across machines.
+    frames=0 generates forever.
+    """
+
+    def __init__(self, width=640, height=480, frames=0, seed=0):
+        self.width = width
+        self.height = height
+        self.frames = frames
+        self.index = 0
+        rng = np.random.default_rng(seed)
+        self.background = rng.integers(40, 80, (height, width, 3), dtype=np.uint8)
+
+    def isOpened(self):
+        return True
+
+    def read(self):
+        if self.frames and self.index >= self.frames:
+            return False, None
+        frame = self.background.copy()
+        w, h = self.width, self.height
+        phase = self.index / 15 * math.pi
+        self.index += 1
+
+        hip = (w // 2, int(h * 0.45))
+        head = (hip[0], int(h * 0.15))
+        color = (220, 220, 220)
+        cv2.line(frame, head, hip, color, 12)
+        cv2.circle(frame, head, int(h * 0.06), color, -1)
+        for side, lift in ((-1, max(0.0, math.sin(phase))), (1, max(0.0, -math.sin(phase)))):
+            knee = (hip[0] + side * int(w * 0.06), int(h * (0.65 - 0.05 * lift)))
+            ankle = (hip[0] + side * int(w * 0.08), int(h * (0.88 - 0.1 * lift)))
+            cv2.line(frame, hip, knee, color, 10)
+            cv2.line(frame, knee, ankle, color, 10)
+        return True, frame
+
+    def release(self):
+        pass
+
+
+class Paced:
+    """Throttles read() of any source to fps, like a live camera would"""
+
+    def __init__(self, source, fps):
+        self.source = source
+        self.interval = 1.0 / fps
+        self.next_time = None
+
+    def isOpened(self):
+        return self.source.isOpened()
+
+    def read(self):
+        now = time.perf_counter()
+        if self.next_time is not None and now < self.next_time:
+            time.sleep(self.next_time - now)
+        self.next_time = max(now, self.next_time or now) + self.interval
+        return self.source.read()
+
+    def release(self):
+        self.source.release()
+
+
+def open_source(spec, loop=False, fps=None):
+    """
+    Open a frame source with the cv2.VideoCapture read()/isOpened()/release() API.
+
+      '0'                      webcam index 0
+      'synthetic[:WxH[:N]]'    generated stick figure, N frames (default: endless)
+      a directory              images in name order
+      anything else            video file or stream URL
+
+    loop restarts files and image directories at the end; fps paces reads
+    to that rate (useful for files, which otherwise read as fast as possible).
+    """
+    spec = str(spec).strip()
+    if spec.isdigit():
+        source = VideoSource(int(spec))
+    elif spec.startswith("synthetic"):
+        parts = spec.split(":")
+        width, height = map(int, parts[1].split("x")) if len(parts) > 1 and parts[1] else (640, 480)
+        frames = int(parts[2]) if len(parts) > 2 else 0
+        source = SyntheticSource(width, height, frames)
+    elif os.path.isdir(spec):
+        source = ImageDirSource(spec, loop)
+    else:
+        source = VideoSource(spec, loop)
+    return Paced(source, fps) if fps else source
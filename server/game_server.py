@@ -1,7 +1,9 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+import functools
 import json
+import os
 import time
 import zipfile
 from pathlib import Path
@@ -9,6 +11,15 @@ import asyncio
 from typing import Dict, List
 import shutil
 
+import beatmap_wire
+from beatmaps import BeatmapStore
+from http_range import serve_bytes
+from metrics import CONTENT_TYPE, REGISTRY, SPAN_SECONDS, TraceDump, observe_age, span
+from preview_stream import PreviewStream
+from pubsub import create_backbone
+from rooms import RoomRegistry, valid_room
+from transport import DEFAULT_ROOM, POSE_PORT, start_pose_receiver
+
 app = FastAPI()
 
 # CORS middleware for frontend
@@ -22,62 +33,72 @@ app.add_middleware(
 
 LANES = 4
 DEFAULT_OSZ = r"C:\Users\stringbot\Downloads\2466542 TM - Shinseikatsu.osz"
+BEATMAP_DIR = r"C:\Users\stringbot\Downloads"
+# Path for a JSON-lines dump of every pose's receive / delivery times, or None
+TRACE_DUMP = None
+# Shared-memory bus of the CV server (main_cv_server.py --shm ddr) behind the
+# camera preview stream; frames are only encoded while someone is watching
+PREVIEW_SHM = "ddr"
+PREVIEW_FPS = 10.0
+# uvicorn worker processes; with more than one, rooms are shared between them
+# over the "socket" backbone (see pubsub.py) instead of the in-process one
+WORKERS = int(os.environ.get("DDR_WORKERS", "1"))
+PUBSUB = os.environ.get("DDR_PUBSUB", "socket" if WORKERS > 1 else "local")
+PUBSUB_PORT = 8002
 
-# Store connected clients for CV streaming
-cv_subscribers: List[WebSocket] = []
-latest_joints = {}
+# Parsed charts and extracted audio, shared by all clients
+beatmap_store = BeatmapStore(cache_dir="temp")
 
-def extract_osu(osz_path):
-    """Extract .osu and audio from .osz"""
-    osu_content = None
-    audio_file_path = None
-    
-    with zipfile.ZipFile(osz_path, 'r') as z:
-        for file in z.namelist():
-            if file.endswith('.osu'):
-                osu_content = z.read(file).decode('utf-8')
-            elif file.endswith('.mp3') or file.endswith('.ogg'):
-                audio_file_path = file
-    return osu_content, audio_file_path
-
-def parse_osu(osu_text):
-    """Parse hit circles into a list of {time, lane}"""
-    lines = osu_text.splitlines()
-    section = ''
-    notes = []
-    
-    for line in lines:
-        line = line.strip()
-        if not line:
-            continue
-        if line.startswith('['):
-            section = line
-            continue
-        if section == '[HitObjects]':
-            parts = line.split(',')
-            x = int(parts[0])
-            time_ms = int(parts[2])
-            type_flag = int(parts[3])
-            is_circle = (type_flag & 1) != 0
-            if not is_circle:
-                continue
-            lane = min(LANES - 1, int(x / 512 * LANES))
-            notes.append({'time': time_ms / 1000, 'lane': lane})
-    return notes
+POSES_RECEIVED = REGISTRY.counter("ddr_poses_received_total", "Poses ingested", ("transport",))
+POSES_FAILED = REGISTRY.counter("ddr_poses_failed_total", "Ingested poses the backbone failed to apply", ("transport",))
+CLOCK_RTT = REGISTRY.histogram("ddr_clock_rtt_seconds", "Clock sync round trip reported by peers", ("peer",))
+# Latest clock estimate reported by each CV sender; browsers' are in /api/cv/subscribers
+cv_clocks = {}
+trace_dump = TraceDump(TRACE_DUMP) if TRACE_DUMP else None
+
+def on_delivered(topic, origin, send_seconds):
+    """Broadcaster callback once a message is written to a client"""
+    SPAN_SECONDS.observe(send_seconds, "ws_send")
+    if origin is None:
+        return
+    capture_time, player, seq = origin
+    observe_age(f"delivered_{topic}", capture_time)
+    if trace_dump is not None:
+        trace_dump.write({"event": "delivered", "topic": topic, "player": player, "seq": seq,
+                          "capture_time": capture_time, "t": time.time()})
+
+camera_preview = PreviewStream(PREVIEW_SHM, fps=PREVIEW_FPS)
+
+# One room per cabinet: its clients (each with its own sender task), latest
+# pose and judgement engine. Rooms only change through backbone messages.
+rooms = RoomRegistry(on_delivered=on_delivered)
+backbone = create_backbone(PUBSUB, port=PUBSUB_PORT)
 
 # HTTP endpoint to get beatmap
+# ?format=binary (or Accept: application/x-ddr-beatmap) returns the packed
+# wire format from beatmap_wire.py; offset/limit page through long charts
 @app.get("/api/beatmap")
-async def get_beatmap(path: str = None):
+async def get_beatmap(request: Request, path: str = None, format: str = None,
+                      offset: int = 0, limit: int = None):
     try:
         osz_path = path or DEFAULT_OSZ
-        osu_file, audio_file = extract_osu(osz_path)
-        notes = parse_osu(osu_file)
+        # parse off the event loop; cache hits return immediately
+        chart = await asyncio.to_thread(beatmap_store.get, osz_path)
+
+        if beatmap_wire.wants_binary(format, request.headers.get("accept")):
+            if limit is not None:
+                limit = beatmap_wire.clamp_chunk_size(limit)
+            body = beatmap_wire.encode_chunk(chart["chart"], offset, limit)
+            return Response(body, media_type=beatmap_wire.MEDIA_TYPE, headers={
+                "X-Total-Count": str(chart["count"]),
+                "Access-Control-Expose-Headers": "X-Total-Count",
+            })
         
         return JSONResponse({
             "success": True,
-            "notes": notes,
-            "audio": audio_file,
-            "count": len(notes)
+            "notes": chart["notes"],
+            "audio": chart["audio"],
+            "count": chart["count"]
         })
     except Exception as e:
         return JSONResponse({
@@ -85,36 +106,158 @@ async def get_beatmap(path: str = None):
             "error": str(e)
         }, status_code=500)
 
-# Serve audio file
-@app.get("/api/audio")
-async def get_audio():
+# Serve a beatmap's audio (?path= like /api/beatmap), straight from the .osz
+# when it is stored uncompressed; supports Range, ETag and conditional GETs
+@app.api_route("/api/audio", methods=["GET", "HEAD"])
+async def get_audio(request: Request, path: str = None):
     try:
-        _, audio_file = extract_osu(DEFAULT_OSZ)
-        if audio_file:
-            # Extract to temp location
-            temp_dir = Path("temp")
-            temp_dir.mkdir(exist_ok=True)
-            
-            with zipfile.ZipFile(DEFAULT_OSZ, 'r') as z:
-                z.extract(audio_file, temp_dir)
-            
-            return FileResponse(temp_dir / audio_file)
+        source = await asyncio.to_thread(beatmap_store.audio_source, path or DEFAULT_OSZ)
+    except FileNotFoundError:
+        return JSONResponse({"error": "beatmap not found"}, status_code=404)
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
+    if source is None:
+        return JSONResponse({"error": "beatmap has no audio"}, status_code=404)
+    return serve_bytes(request, source["path"], source["offset"], source["size"],
+                       source["etag"], source["mtime"], source["media_type"])
 
 # List available beatmaps
 @app.get("/api/beatmaps")
 async def list_beatmaps():
-    downloads = Path(r"C:\Users\stringbot\Downloads")
-    osz_files = list(downloads.glob("*.osz"))
-    
+    # filled in by the background indexer started at startup
     return JSONResponse({
-        "beatmaps": [{"name": f.stem, "path": str(f)} for f in osz_files]
+        "beatmaps": beatmap_store.listing()
     })
 
+@app.on_event("startup")
+async def start_beatmap_indexer():
+    app.state.beatmap_indexer = beatmap_store.start_indexer(BEATMAP_DIR)
+
+@app.on_event("shutdown")
+async def stop_beatmap_indexer():
+    app.state.beatmap_indexer.set()
+
+def ingest_pose(data, transport):
+    """Hand a received pose to its room through the backbone; False if the room id is invalid"""
+    capture_time, player, room = data.get("timestamp"), data.get("player", 0), data.get("room", DEFAULT_ROOM)
+    if not valid_room(room):
+        return False
+    POSES_RECEIVED.inc(transport)
+    observe_age("received", capture_time)
+    if trace_dump is not None:
+        trace_dump.write({"event": "received", "room": room, "player": player, "seq": data.get("seq"),
+                          "capture_time": capture_time, "t": time.time()})
+    future = backbone.publish(room, {"kind": "pose", "pose": data})
+    future.add_done_callback(functools.partial(pose_applied, transport, room, player))
+    return True
+
+def pose_applied(transport, room, player, future):
+    """Done-callback for a published pose: count failures (and retrieve the exception so it isn't lost)"""
+    if future.cancelled() or future.exception() is None:
+        return
+    POSES_FAILED.inc(transport)
+    print(f"⚠️  Pose from player {player} ({transport}) not applied to room {room}: {future.exception()!r}")
+
+def broadcast_pose(room, data):
+    """Judge the pose and queue results for the room's clients (serialized once, never blocks)"""
+    capture_time, player = data.get("timestamp"), data.get("player", 0)
+    origin = (capture_time, player, data.get("seq"))
+    room.poses += 1
+    if player == 0:
+        room.latest_joints = data
+
+    # the engine scores the cabinet's main player; others are relayed only
+    with span("judge"):
+        events = room.engine.on_pose(data) if player == 0 else []
+
+    with span("broadcast"):
+        if events:
+            room.subscribers.publish_event({
+                "type": "judgement",
+                "events": events,
+                "timestamp": time.time()
+            }, origin=origin)
+
+        # raw joints only go to clients that asked for them (/ws?pose=true)
+        if room.subscribers.has_subscribers("pose"):
+            room.subscribers.publish({
+                "type": "pose_update",
+                "joints": data,
+                "timestamp": time.time()
+            }, origin=origin)
+
+async def apply_room_message(room_id, message):
+    """Backbone handler: every worker applies the same messages in the same order"""
+    room = rooms.get(room_id)
+    if message["kind"] == "pose":
+        broadcast_pose(room, message["pose"])
+    elif message["kind"] == "start":
+        room.generation += 1
+        # the publishing worker loaded the chart before sending this, so it is
+        # usually cached; a cold parse must not hold up every room's poses
+        chart = beatmap_store.cached(message["path"])
+        if chart is not None:
+            start_room(room, chart, message)
+        else:
+            asyncio.create_task(load_and_start(room, message, room.generation))
+    elif message["kind"] == "stop":
+        room.generation += 1
+        room.engine.stop()
+
+def start_room(room, chart, message):
+    room.chart = message["path"]
+    room.engine.start(chart["notes"], message["start_time"])
+
+async def load_and_start(room, message, generation):
+    try:
+        chart = await asyncio.to_thread(beatmap_store.get, message["path"])
+    except Exception as e:
+        print(f"⚠️  Room {room.id}: failed to load {message['path']}: {e!r}")
+        return
+    # a later start / stop for the room wins over this one
+    if room.generation == generation:
+        start_room(room, chart, message)
+
+@app.on_event("startup")
+async def start_backbone():
+    await backbone.start(apply_room_message)
+
+@app.on_event("shutdown")
+async def stop_backbone():
+    await backbone.close()
+
+# CV Pose data over UDP - binary packets from main_cv_server.py
+def on_udp_pose(data):
+    ingest_pose(data, "udp")
+
+def on_udp_clock(addr, offset, rtt):
+    """A CV sender's clock ping, carrying its current estimate of our clock"""
+    CLOCK_RTT.observe(rtt, "cv")
+    cv_clocks[f"{addr[0]}:{addr[1]}"] = {
+        "offset_ms": round(1000 * offset, 3),
+        "rtt_ms": round(1000 * rtt, 3),
+        "t": time.time()
+    }
+
+@app.on_event("startup")
+async def start_udp_ingest():
+    try:
+        app.state.pose_transport, app.state.pose_receiver = await start_pose_receiver(on_udp_pose, on_clock=on_udp_clock)
+    except OSError:
+        # with several workers only one can own the port; the backbone spreads its poses
+        app.state.pose_transport = None
+        print(f"ℹ️  UDP port {POSE_PORT} taken by another worker, not ingesting UDP here")
+
+@app.on_event("shutdown")
+async def stop_udp_ingest():
+    if app.state.pose_transport is not None:
+        app.state.pose_transport.close()
+
 # CV Pose data endpoint - POST from main.py
+# ?room=ID (or a "room" field) picks the cabinet, "default" otherwise.
+# The reply's t1 / t2 let the sender estimate its clock offset like a ping
 @app.post("/api/cv/pose")
-async def receive_pose(data: dict):
+async def receive_pose(data: dict, room: str = None):
     """
     Receive pose data from main.py CV pipeline
     Expected format:
@@ -125,65 +268,166 @@ async def receive_pose(data: dict):
         "right_knee": {"x": 222, "y": 444, "depth": 91},
         "timestamp": 12345.67
     }
+    timestamp is the capture time on the server's clock (see clock_sync.py)
     """
-    global latest_joints
-    latest_joints = data
-    
-    # Broadcast to all connected game clients
-    disconnected = []
-    for ws in cv_subscribers:
-        try:
-            await ws.send_json({
-                "type": "pose_update",
-                "joints": data,
-                "timestamp": time.time()
-            })
-        except:
-            disconnected.append(ws)
-    
-    # Clean up disconnected clients
-    for ws in disconnected:
-        cv_subscribers.remove(ws)
+    t1 = time.time()
+    if room is not None:
+        data["room"] = room
+    if not ingest_pose(data, "http"):
+        return JSONResponse({"status": "error", "error": "invalid room id"}, status_code=400)
     
-    return {"status": "ok"}
+    return {"status": "ok", "t1": t1, "t2": time.time()}
+
+# Server clock for one-off NTP-style exchanges (?t0= is echoed back), and the
+# last estimates reported by CV senders
+@app.get("/api/clock")
+async def get_clock(t0: float = None):
+    t1 = time.time()
+    return JSONResponse({
+        "t0": t0,
+        "t1": t1,
+        "t2": time.time(),
+        "cv": cv_clocks
+    })
+
+# Prometheus scrape endpoint: span and pose-age histograms, ingest counters
+@app.get("/metrics")
+async def get_metrics():
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+# Per-client fan-out stats of one room (on this worker)
+@app.get("/api/cv/subscribers")
+async def subscriber_stats(room: str = DEFAULT_ROOM):
+    if room not in rooms.rooms:
+        return JSONResponse({"error": f"no room {room!r}"}, status_code=404)
+    return JSONResponse(rooms.get(room).subscribers.stats())
+
+# Rooms known to this worker and the state of the backbone between workers
+@app.get("/api/rooms")
+async def list_rooms():
+    return JSONResponse({
+        "worker": os.getpid(),
+        "rooms": rooms.stats(),
+        "backbone": backbone.stats()
+    })
+
+# Camera preview with the pose drawn on, as MJPEG (works in an <img> tag)
+@app.get("/preview.mjpg")
+async def preview_mjpeg():
+    async def parts():
+        async for jpeg in camera_preview.frames():
+            yield (b"--frame\r\nContent-Type: image/jpeg\r\n"
+                   b"Content-Length: " + str(len(jpeg)).encode() + b"\r\n\r\n" + jpeg + b"\r\n")
+    return StreamingResponse(parts(), media_type="multipart/x-mixed-replace; boundary=frame")
+
+@app.get("/api/preview")
+async def preview_stats():
+    return JSONResponse(camera_preview.stats())
+
+# Same preview over WebSocket, one binary JPEG message per frame
+@app.websocket("/ws/preview")
+async def preview_websocket(websocket: WebSocket):
+    await websocket.accept()
+    frames = camera_preview.frames()
+    try:
+        async for jpeg in frames:
+            await websocket.send_bytes(jpeg)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await frames.aclose()
 
 # WebSocket endpoint for game clients
+# Clients get judgement events; pass ?pose=true to also receive raw joints.
+# ?room=ID joins a cabinet's game, "default" otherwise
 @app.websocket("/ws")
-async def websocket_endpoint(websocket: WebSocket):
+async def websocket_endpoint(websocket: WebSocket, pose: bool = False, room: str = DEFAULT_ROOM):
+    if not valid_room(room):
+        await websocket.close(code=1008)
+        return
     await websocket.accept()
-    cv_subscribers.append(websocket)
-    print(f"✅ Client connected (Total: {len(cv_subscribers)})")
+    room = rooms.get(room)
+    subscriber = room.subscribers.subscribe(websocket, ("judgement", "pose") if pose else ("judgement",))
+    print(f"✅ Client connected to {room.id} (Total: {len(room.subscribers)})")
     
     try:
         while True:
             data = await websocket.receive_text()
+            received = time.time()
             msg = json.loads(data)
             
-            if msg['type'] == 'get_beatmap':
-                osu_file, _ = extract_osu(msg.get('path', DEFAULT_OSZ))
-                beatmap = parse_osu(osu_file)
+            if msg['type'] == 'ping':
+                # clock sync: t0 is the client's clock, t1 / t2 ours
                 await websocket.send_json({
-                    'type': 'beatmap',
-                    'notes': beatmap
+                    'type': 'pong',
+                    't0': msg.get('t0'),
+                    't1': received,
+                    't2': time.time()
                 })
+                continue
+
+            if msg['type'] == 'clock':
+                # the client's current estimate, for stats and the RTT histogram
+                subscriber.clock = {'offset_ms': msg.get('offset_ms'), 'rtt_ms': msg.get('rtt_ms')}
+                if msg.get('rtt_ms'):
+                    CLOCK_RTT.observe(msg['rtt_ms'] / 1000, "ws")
+                continue
+
+            if msg['type'] == 'get_beatmap':
+                chart = await asyncio.to_thread(beatmap_store.get, msg.get('path', DEFAULT_OSZ))
+                if msg.get('format') == 'binary':
+                    # header message, then one binary frame per chunk
+                    chunk_size = beatmap_wire.clamp_chunk_size(msg.get('chunk_size'))
+                    await websocket.send_json({
+                        'type': 'beatmap_binary',
+                        'count': chart['count'],
+                        'chunk_size': chunk_size
+                    })
+                    for chunk in beatmap_wire.iter_chunks(chart['chart'], chunk_size):
+                        await websocket.send_bytes(chunk)
+                else:
+                    await websocket.send_json({
+                        'type': 'beatmap',
+                        'notes': chart['notes']
+                    })
             
             elif msg['type'] == 'start_game':
+                # every worker starts its copy of the room at the same start_time;
+                # a synced client sends when its audio starts, on our clock
+                start_time = msg.get('start_time') or time.time()
+                path = msg.get('path', DEFAULT_OSZ)
+                # parse here, off the backbone's ordered dispatch
+                await asyncio.to_thread(beatmap_store.get, path)
+                await backbone.publish(room.id, {
+                    'kind': 'start',
+                    'path': path,
+                    'start_time': start_time
+                })
                 await websocket.send_json({
                     'type': 'game_started',
-                    'timestamp': time.time()
+                    'timestamp': start_time
+                })
+
+            elif msg['type'] == 'stop_game':
+                await backbone.publish(room.id, {'kind': 'stop'})
+                await websocket.send_json({
+                    'type': 'game_over',
+                    **room.engine.summary()
                 })
             
             elif msg['type'] == 'get_latest_pose':
                 # Send latest CV data on demand
                 await websocket.send_json({
                     'type': 'pose_update',
-                    'joints': latest_joints,
+                    'joints': room.latest_joints,
                     'timestamp': time.time()
                 })
                 
     except WebSocketDisconnect:
-        cv_subscribers.remove(websocket)
-        print(f"❌ Client disconnected (Remaining: {len(cv_subscribers)})")
+        pass
+    finally:
+        room.subscribers.unsubscribe(websocket)
+        print(f"❌ Client disconnected from {room.id} (Remaining: {len(room.subscribers)})")
 
 if __name__ == "__main__":
     import uvicorn
@@ -191,4 +435,12 @@ if __name__ == "__main__":
     print("📡 WebSocket: ws://localhost:8000/ws")
     print("🎵 Beatmap API: http://localhost:8000/api/beatmap")
     print("🎥 CV Pose API: POST http://localhost:8000/api/cv/pose")
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    print(f"🎥 CV Pose stream: UDP localhost:{POSE_PORT}")
+    print("📈 Metrics: http://localhost:8000/metrics")
+    print(f"🏠 Rooms: http://localhost:8000/api/rooms ({WORKERS} worker(s), {PUBSUB} backbone)")
+    print("👀 Camera preview: http://localhost:8000/preview.mjpg")
+    if WORKERS > 1:
+        # workers import this module themselves; DDR_WORKERS is inherited, so they pick the socket backbone
+        uvicorn.run("game_server:app", host="0.0.0.0", port=8000, workers=WORKERS)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -0,0 +1,123 @@
+"""
+HTTP byte-range and conditional-request handling for serving media.
+
+serve_bytes() answers a GET / HEAD for a byte span of a file on disk: it
+handles If-None-Match / If-Modified-Since (304), If-Range and a single
+Range (206, or 416 when unsatisfiable), and streams the body in CHUNK_SIZE
+reads done in worker threads so the event loop never waits on the disk.
+Multi-range requests are answered with the whole body, which RFC 9110 allows.
+"""
+import asyncio
+import email.utils
+
+from fastapi.responses import Response, StreamingResponse
+
+CHUNK_SIZE = 1 << 16
+
+
+class RangeNotSatisfiable(ValueError):
+    pass
+
+
+def parse_range(header, size):
+    """(start, end) inclusive for a single "bytes=" range, or None to send everything"""
+    if not header or not header.startswith("bytes="):
+        return None
+    spec = header[len("bytes="):].strip()
+    if "," in spec:
+        return None
+    first, _, last = spec.partition("-")
+    try:
+        if first == "":
+            # suffix range: the last N bytes
+            length = int(last)
+        else:
+            start = int(first)
+            end = int(last) if last else size - 1
+    except ValueError:
+        return None  # malformed: ignore it
+    if first == "":
+        if length <= 0:
+            raise RangeNotSatisfiable(header)
+        return max(0, size - length), size - 1
+    if start >= size or end < start:
+        raise RangeNotSatisfiable(header)
+    return start, min(end, size - 1)
+
+
+def _etag_matches(header, etag):
+    if header is None:
+        return False
+    if header.strip() == "*":
+        return True
+    # weak comparison, as If-None-Match requires
+    tags = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return etag in tags
+
+
+def not_modified(headers, etag, mtime):
+    """True if the client's cached copy is current (If-None-Match wins over If-Modified-Since)"""
+    if "if-none-match" in headers:
+        return _etag_matches(headers["if-none-match"], etag)
+    since = headers.get("if-modified-since")
+    if since:
+        try:
+            return int(mtime) <= email.utils.parsedate_to_datetime(since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _range_applies(headers, etag, mtime):
+    if_range = headers.get("if-range")
+    if if_range is None:
+        return True
+    if if_range.startswith('"') or if_range.startswith("W/"):
+        return if_range == etag  # strong comparison only
+    try:
+        return int(mtime) <= email.utils.parsedate_to_datetime(if_range).timestamp()
+    except (TypeError, ValueError):
+        return False
+
+
+async def iter_file(path, offset, length, chunk_size=CHUNK_SIZE):
+    f = await asyncio.to_thread(open, path, "rb")
+    try:
+        await asyncio.to_thread(f.seek, offset)
+        while length > 0:
+            chunk = await asyncio.to_thread(f.read, min(chunk_size, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        await asyncio.to_thread(f.close)
+
+
+def serve_bytes(request, path, offset, size, etag, mtime, media_type, cache_control="public, max-age=300"):
+    """Response for bytes [offset, offset + size) of path, honouring Range and conditional headers"""
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": etag,
+        "Last-Modified": email.utils.formatdate(mtime, usegmt=True),
+        "Cache-Control": cache_control,
+    }
+    if not_modified(request.headers, etag, mtime):
+        return Response(status_code=304, headers=headers)
+
+    status, start, end = 200, 0, size - 1
+    if _range_applies(request.headers, etag, mtime):
+        try:
+            span = parse_range(request.headers.get("range"), size)
+        except RangeNotSatisfiable:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+        if span is not None:
+            status, (start, end) = 206, span
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+    length = end - start + 1 if size else 0
+    headers["Content-Length"] = str(length)
+    if request.method == "HEAD":
+        return Response(status_code=status, headers=headers, media_type=media_type)
+    return StreamingResponse(iter_file(path, offset + start, length), status_code=status,
+                             headers=headers, media_type=media_type)
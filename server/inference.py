@@ -0,0 +1,229 @@
+"""
+Pluggable pose / depth inference backends.
+
+  torch      ultralytics YOLO and torch.hub MiDaS in eager fp32 (the original path)
+  onnx       both models exported once to ONNX, run by onnxruntime on the CPU
+  onnx-int8  same, with dynamically int8-quantized weights
+  mediapipe  MediaPipe pose landmarker (mapped to COCO keypoints) with torch MiDaS
+
+Every pose backend is called as pose(frame, offset=(0, 0), imgsz=None) and
+returns the first person's (17, 2) keypoints in frame coordinates and (17,)
+confidences, or (None, None). Every depth backend is called as
+depth(bgr, size=None) and returns the raw MiDaS prediction at network
+resolution; size=(w, h) picks a reduced input (see roi.midas_input).
+
+Weights come from model_registry's local cache. Exported models live in
+the same directory and are created on first use; onnx_export.py does the
+export up front and validates it against torch.
+"""
+import os
+
+import cv2
+import numpy as np
+
+import model_registry
+from roi import midas_input
+
+BACKENDS = ("torch", "onnx", "onnx-int8", "mediapipe")
+MODEL_DIR = model_registry.MODEL_DIR
+YOLO_IMGSZ = 640
+MIDAS_SIZE = 256  # MiDaS_small's long side
+CONF_THRESHOLD = 0.25  # ultralytics' default person threshold
+
+
+def default_threads():
+    # pose and depth run on separate pipeline threads, so split the cores
+    return max(1, (os.cpu_count() or 2) // 2)
+
+
+def onnx_paths(model_dir=MODEL_DIR):
+    return {
+        "pose": os.path.join(model_dir, "yolov8n-pose.onnx"),
+        "pose-int8": os.path.join(model_dir, "yolov8n-pose.int8.onnx"),
+        "depth": os.path.join(model_dir, "midas_small.onnx"),
+        "depth-int8": os.path.join(model_dir, "midas_small.int8.onnx"),
+    }
+
+
+def midas_size(shape, long_side=MIDAS_SIZE):
+    """(w, h) the torch.hub small transform resizes a frame to: fits in long_side, multiples of 32"""
+    h, w = shape[:2]
+    scale = long_side / max(h, w)
+    return (max(32, int(w * scale) // 32 * 32), max(32, int(h * scale) // 32 * 32))
+
+
+# ---- torch -------------------------------------------------------------------
+
+class TorchPose:
+    def __init__(self):
+        self.model = model_registry.yolo_pose()
+
+    def __call__(self, frame, offset=(0, 0), imgsz=None):
+        kwargs = {"imgsz": imgsz} if imgsz else {}
+        results = self.model(frame, verbose=False, **kwargs)
+        for result in results:
+            if result.keypoints is not None and len(result.keypoints.xy) > 0:
+                keypoints = result.keypoints.xy[0].cpu().numpy() + np.array(offset, dtype=np.float32)
+                conf = result.keypoints.conf
+                conf = conf[0].cpu().numpy() if conf is not None else np.ones(len(keypoints))
+                return keypoints, conf
+        return None, None
+
+
+class TorchDepth:
+    def __init__(self, threads=None):
+        import torch
+        self.torch = torch
+        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        if threads:
+            torch.set_num_threads(threads)
+        model, self.transform = model_registry.midas_small()
+        self.model = model.to(self.device)
+
+    def __call__(self, bgr, size=None):
+        if size is None:
+            input_batch = self.transform(cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB))
+        else:
+            input_batch = self.torch.from_numpy(midas_input(bgr, size))
+        with self.torch.no_grad():
+            prediction = self.model(input_batch.to(self.device))
+        return prediction.squeeze().cpu().numpy()
+
+
+# ---- onnxruntime -------------------------------------------------------------
+
+def ort_session(path, threads=None):
+    import onnxruntime as ort
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    options.intra_op_num_threads = threads or default_threads()
+    options.inter_op_num_threads = 1
+    return ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+
+
+def letterbox(frame, size):
+    """Resize into a size x size square keeping aspect, padded with 114 like ultralytics"""
+    h, w = frame.shape[:2]
+    r = min(size / h, size / w)
+    new_w, new_h = int(round(w * r)), int(round(h * r))
+    dw, dh = (size - new_w) / 2, (size - new_h) / 2
+    top, left = int(round(dh - 0.1)), int(round(dw - 0.1))
+    img = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR) if (new_w, new_h) != (w, h) else frame
+    img = cv2.copyMakeBorder(img, top, size - new_h - top, left, size - new_w - left,
+                             cv2.BORDER_CONSTANT, value=(114, 114, 114))
+    return img, r, (left, top)
+
+
+class OnnxPose:
+    """
+    YOLOv8-pose ONNX graph: input (1, 3, S, S) RGB in [0, 1], output
+    (1, 56, N) with rows cx, cy, w, h, person score, then x, y, visibility
+    for each of the 17 keypoints. Only the best-scoring person is needed,
+    so an argmax replaces NMS.
+    """
+
+    def __init__(self, path, threads=None):
+        self.session = ort_session(path, threads)
+        self.input_name = self.session.get_inputs()[0].name
+        self.size = self.session.get_inputs()[0].shape[-1]
+        if not isinstance(self.size, int):
+            self.size = YOLO_IMGSZ
+
+    def __call__(self, frame, offset=(0, 0), imgsz=None):
+        # the exported graph has a fixed input size, so imgsz is ignored: ROI crops
+        # (main_cv_server.ROI_POSE_SIZE) are letterboxed up to self.size instead
+        img, r, (left, top) = letterbox(frame, self.size)
+        blob = cv2.cvtColor(img, cv2.COLOR_BGR2RGB).transpose(2, 0, 1)[None].astype(np.float32) / 255.0
+        output = self.session.run(None, {self.input_name: blob})[0][0]
+
+        best = int(np.argmax(output[4]))
+        if output[4, best] < CONF_THRESHOLD:
+            return None, None
+        kpts = output[5:, best].reshape(17, 3)
+        keypoints = (kpts[:, :2] - np.array([left, top], dtype=np.float32)) / r
+        return keypoints.astype(np.float32) + np.array(offset, dtype=np.float32), kpts[:, 2]
+
+
+class OnnxDepth:
+    """MiDaS_small exported with dynamic height/width: (1, 3, h, w) -> (1, h, w)"""
+
+    def __init__(self, path, threads=None):
+        self.session = ort_session(path, threads)
+        self.input_name = self.session.get_inputs()[0].name
+
+    def __call__(self, bgr, size=None):
+        blob = midas_input(bgr, size or midas_size(bgr.shape))
+        return self.session.run(None, {self.input_name: blob})[0].squeeze()
+
+
+# ---- export --------------------------------------------------------------------
+
+def export_pose(path, imgsz=YOLO_IMGSZ):
+    from ultralytics import YOLO
+    # a fresh instance: export() changes the model's state
+    exported = YOLO(model_registry.yolo_weights()).export(format="onnx", imgsz=imgsz, dynamic=False, simplify=True)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    os.replace(exported, path)
+    return path
+
+
+def export_depth(path, opset=17):
+    import torch
+    model, _ = model_registry.midas_small()
+    dummy = torch.randn(1, 3, MIDAS_SIZE, MIDAS_SIZE, device=next(model.parameters()).device)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    torch.onnx.export(
+        model, dummy, path, opset_version=opset,
+        input_names=["image"], output_names=["depth"],
+        dynamic_axes={"image": {2: "height", 3: "width"}, "depth": {1: "height", 2: "width"}},
+    )
+    return path
+
+
+def quantize(src, dst):
+    """Dynamic int8 weight quantization; activations stay float, so no calibration set is needed"""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    quantize_dynamic(src, dst, weight_type=QuantType.QUInt8)
+    return dst
+
+
+def ensure_exported(backend, model_dir=MODEL_DIR):
+    """Export (and quantize) whatever `backend` needs that is not in model_dir yet"""
+    paths = onnx_paths(model_dir)
+    if not os.path.exists(paths["pose"]):
+        export_pose(paths["pose"])
+    if not os.path.exists(paths["depth"]):
+        export_depth(paths["depth"])
+    if backend == "onnx-int8":
+        for name in ("pose", "depth"):
+            if not os.path.exists(paths[f"{name}-int8"]):
+                quantize(paths[name], paths[f"{name}-int8"])
+    return paths
+
+
+def load_backend(backend="torch", threads=None, model_dir=MODEL_DIR):
+    """(pose, depth) callables for one of BACKENDS"""
+    if backend not in BACKENDS:
+        raise ValueError(f"unknown inference backend {backend!r}, expected one of {BACKENDS}")
+    threads = threads or default_threads()
+    if backend == "torch":
+        return TorchPose(), TorchDepth(threads)
+    if backend == "mediapipe":
+        from mediapipe_pose import MediaPipePose
+        return MediaPipePose(), TorchDepth(threads)
+    paths = ensure_exported(backend, model_dir)
+    suffix = "-int8" if backend == "onnx-int8" else ""
+    return OnnxPose(paths["pose" + suffix], threads), OnnxDepth(paths["depth" + suffix], threads)
+
+
+def warmup(pose, depth, frame_shape=(480, 640, 3), depth_sizes=(None,)):
+    """
+    One dummy inference per model (and per depth input size) before frames
+    arrive, so lazy allocation, kernel selection and graph optimization do not
+    land on the first real frame.
+    """
+    frame = np.zeros(frame_shape, dtype=np.uint8)
+    pose(frame)
+    for size in depth_sizes:
+        depth(frame, size)
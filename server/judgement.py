@@ -0,0 +1,224 @@
+import math
+
+from keypoint_filter import extrapolate
+from note_index import LaneIndex
+
+LANES = 4
+HIT_WINDOW = 0.15  # seconds, same as osuparse.py
+
+# Lane order matches the frontend arrows: left, down, up, right
+LEFT, DOWN, UP, RIGHT = range(LANES)
+
+FEET = ("left_ankle", "right_ankle")
+
+# Filtered joints are tracked where they will be this far past capture time,
+# which offsets the One Euro lag before a landing (see bench_filter.py)
+PREDICT_HORIZON = 1 / 30
+
+
+class FootTracker:
+    """
+    Turns one ankle's position stream into landing events.
+
+    A foot counts as lifted once its image-space speed goes above
+    lift_speed, and as landed when it drops back under land_speed.
+    Landings closer than debounce seconds to the previous one are ignored.
+    """
+
+    def __init__(self, lift_speed=400.0, land_speed=120.0, debounce=0.12, min_conf=0.3):
+        self.lift_speed = lift_speed
+        self.land_speed = land_speed
+        self.debounce = debounce
+        self.min_conf = min_conf
+        self.prev = None
+        self.lifted = False
+        self.last_step = -math.inf
+        self.rest_depth = None
+
+    def update(self, t, x, y, depth, conf=1.0):
+        """
+        Feed one sample; returns True when the foot lands.
+        x, y may be a predicted position: speed is the difference between
+        consecutive samples, so a prediction that leads also lands early.
+        """
+        if conf < self.min_conf:
+            return False
+        prev, self.prev = self.prev, (t, x, y)
+        if prev is None or t <= prev[0]:
+            return False
+
+        speed = math.hypot(x - prev[1], y - prev[2]) / (t - prev[0])
+        if speed > self.lift_speed:
+            self.lifted = True
+            return False
+        if not self.lifted:
+            # standing still: learn where this foot rests
+            self.rest_depth = depth if self.rest_depth is None else 0.9 * self.rest_depth + 0.1 * depth
+            return False
+        if speed < self.land_speed:
+            self.lifted = False
+            if t - self.last_step >= self.debounce:
+                self.last_step = t
+                return True
+        return False
+
+
+class StepDetector:
+    """
+    Maps ankle (and knee) positions to lane steps.
+
+    The body centre is the running midpoint of the knees while the player
+    stands still. A foot landing more than lane_offset pixels left/right of it
+    is a LEFT/RIGHT step, otherwise a depth change of more than depth_delta
+    from the foot's resting depth is an UP (closer to the camera) or DOWN step.
+
+    When the CV server sends filtered velocities, landings are detected on
+    the ankle position extrapolated horizon seconds ahead; lanes are still
+    chosen from the measured position.
+    """
+
+    def __init__(self, lane_offset=80.0, depth_delta=12.0, horizon=PREDICT_HORIZON, **foot_options):
+        self.lane_offset = lane_offset
+        self.depth_delta = depth_delta
+        self.horizon = horizon
+        self.feet = {name: FootTracker(**foot_options) for name in FEET}
+        self.center_x = None
+
+    def lane_for(self, foot, x, depth):
+        if self.center_x is not None:
+            if x < self.center_x - self.lane_offset:
+                return LEFT
+            if x > self.center_x + self.lane_offset:
+                return RIGHT
+        rest = foot.rest_depth
+        if rest is not None:
+            # MiDaS output is inverse depth: larger means closer
+            if depth > rest + self.depth_delta:
+                return UP
+            if depth < rest - self.depth_delta:
+                return DOWN
+        return None
+
+    def update(self, pose):
+        """Returns [(lane, t)] for feet that landed on a lane in this pose"""
+        t = pose.get("timestamp")
+        if t is None:
+            return []
+
+        knees = [pose.get("left_knee"), pose.get("right_knee")]
+        if all(knees) and not any(f.lifted for f in self.feet.values()):
+            mid = (knees[0]["x"] + knees[1]["x"]) / 2
+            self.center_x = mid if self.center_x is None else 0.9 * self.center_x + 0.1 * mid
+
+        steps = []
+        for name, foot in self.feet.items():
+            joint = pose.get(name)
+            if not joint:
+                continue
+            x, y, depth = joint["x"], joint["y"], joint.get("depth", 0)
+            tx, ty = extrapolate(joint, self.horizon)[:2] if "vx" in joint else (x, y)
+            if foot.update(t, tx, ty, depth, joint.get("conf", 1.0)):
+                lane = self.lane_for(foot, x, depth)
+                if lane is not None:
+                    steps.append((lane, t))
+        return steps
+
+
+class JudgementEngine:
+    """
+    Authoritative scoring of pose-driven steps against a chart.
+
+    Uses the same windows as osuparse.py: within HIT_WINDOW/3 is Perfect,
+    2*HIT_WINDOW/3 Great, HIT_WINDOW Good. Notes that pass the window
+    unhit are reported as misses, so counts["miss"] is a count of notes;
+    steps with no note in reach are "stray" (no note, combo reset).
+    """
+
+    def __init__(self, hit_window=HIT_WINDOW, **detector_options):
+        self.hit_window = hit_window
+        self.detector_options = detector_options
+        self.index = None
+        self.start_time = None
+        self.reset()
+
+    def reset(self):
+        self.detector = StepDetector(**self.detector_options)
+        self.score = 0
+        self.combo = 0
+        self.max_combo = 0
+        self.counts = {"perfect": 0, "great": 0, "good": 0, "miss": 0, "stray": 0}
+
+    @property
+    def running(self):
+        return self.index is not None
+
+    def start(self, notes, start_time):
+        """notes: [{time, lane}] in seconds; start_time: server clock (time.time()) of song time 0"""
+        self.reset()
+        self.index = LaneIndex(notes, LANES)
+        self.start_time = start_time
+
+    def stop(self):
+        self.index = None
+
+    def grade(self, delta):
+        if delta <= self.hit_window / 3:
+            return "perfect", 300
+        if delta <= self.hit_window * 2 / 3:
+            return "great", 100
+        return "good", 50
+
+    def _event(self, result, lane, song_time, delta=None, note=None):
+        self.counts[result] += 1
+        return {
+            "result": result,
+            "lane": lane,
+            "time": round(song_time, 4),
+            # when the step happened (capture time) on the server clock
+            "t": round(self.start_time + song_time, 4),
+            "delta": None if delta is None else round(delta, 4),
+            "note": note,
+            "score": self.score,
+            "combo": self.combo,
+        }
+
+    def on_pose(self, pose):
+        """Feed one pose; returns the judgement events it produced (often none)"""
+        if not self.running:
+            return []
+        # notes whose window has already closed are misses, whatever this pose steps on
+        events = self.expire(pose["timestamp"]) if "timestamp" in pose else []
+        for lane, t in self.detector.update(pose):
+            song_time = t - self.start_time
+            judged = self.index.judge(lane, song_time, self.hit_window)
+            if judged is None:
+                # stepping on an empty lane breaks the combo, like a key press in osuparse.py
+                self.combo = 0
+                events.append(self._event("stray", lane, song_time))
+                continue
+            note, delta = judged
+            result, points = self.grade(delta)
+            self.score += points
+            self.combo += 1
+            self.max_combo = max(self.max_combo, self.combo)
+            events.append(self._event(result, lane, song_time, delta, note))
+        return events
+
+    def expire(self, now):
+        """Miss events for notes whose window closed before wall-clock time `now`"""
+        if not self.running:
+            return []
+        song_time = now - self.start_time
+        events = []
+        for lane, note in self.index.expire(song_time - self.hit_window):
+            self.combo = 0
+            events.append(self._event("miss", lane, song_time, None, note))
+        return events
+
+    def summary(self):
+        return {
+            "score": self.score,
+            "combo": self.combo,
+            "max_combo": self.max_combo,
+            "counts": dict(self.counts),
+        }
@@ -0,0 +1,96 @@
+import math
+
+import numpy as np
+
+
+class OneEuroFilter:
+    """
+    One Euro filter (Casiez et al. 2012) over an array of values at once.
+
+    Each element gets a low-pass whose cutoff rises with its own speed:
+    min_cutoff sets smoothing when still (less jitter), beta how quickly the
+    cutoff opens up when moving (less lag). Also returns the filtered
+    derivative, which prediction extrapolates along.
+    """
+
+    def __init__(self, min_cutoff=1.0, beta=0.05, d_cutoff=1.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.t = None
+        self.x = None
+        self.dx = None
+
+    @staticmethod
+    def alpha(cutoff, dt):
+        tau = 1.0 / (2 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def reset(self):
+        self.t = self.x = self.dx = None
+
+    def __call__(self, t, x, mask=None):
+        """
+        Filter sample x (any shape) taken at time t (seconds).
+        Elements where mask is False keep their previous estimate.
+        Returns (x_hat, dx_hat).
+        """
+        x = np.asarray(x, dtype=np.float64)
+        if self.x is None:
+            self.t, self.x, self.dx = t, x.copy(), np.zeros_like(x)
+            return self.x.copy(), self.dx.copy()
+
+        dt = t - self.t
+        if dt <= 0:
+            return self.x.copy(), self.dx.copy()
+
+        dx = (x - self.x) / dt
+        dx_hat = self.dx + self.alpha(self.d_cutoff, dt) * (dx - self.dx)
+        cutoff = self.min_cutoff + self.beta * np.abs(dx_hat)
+        a = 1.0 / (1.0 + 1.0 / (2 * np.pi * cutoff * dt))
+        x_hat = self.x + a * (x - self.x)
+
+        if mask is not None:
+            keep = ~np.broadcast_to(np.asarray(mask, dtype=bool), x.shape)
+            x_hat[keep] = self.x[keep]
+            dx_hat[keep] = self.dx[keep]
+
+        self.t, self.x, self.dx = t, x_hat, dx_hat
+        return x_hat.copy(), dx_hat.copy()
+
+
+class PoseFilter:
+    """
+    Smooths (x, y, depth) of every joint in one vectorized One Euro pass.
+
+    Joints below min_conf hold their last estimate instead of pulling the
+    filter towards a bad detection.
+    """
+
+    def __init__(self, joint_names, min_cutoff=1.0, beta=0.05, d_cutoff=1.0, min_conf=0.3):
+        self.joint_names = list(joint_names)
+        self.min_conf = min_conf
+        self.filter = OneEuroFilter(min_cutoff, beta, d_cutoff)
+
+    def update(self, t, joints):
+        """
+        joints: {name: (x, y, depth, conf)} captured at time t.
+        Returns {name: (x, y, depth, conf, vx, vy, vdepth)} with velocities per second.
+        """
+        values = np.array([joints[name][:3] for name in self.joint_names], dtype=np.float64)
+        conf = np.array([joints[name][3] for name in self.joint_names], dtype=np.float64)
+        mask = (conf >= self.min_conf)[:, None]
+        pos, vel = self.filter(t, values, mask)
+        return {
+            name: (*pos[i], conf[i], *vel[i])
+            for i, name in enumerate(self.joint_names)
+        }
+
+
+def extrapolate(joint, dt):
+    """Predicted (x, y, depth) of a filtered joint dict dt seconds after its capture time"""
+    return (
+        joint["x"] + joint.get("vx", 0.0) * dt,
+        joint["y"] + joint.get("vy", 0.0) * dt,
+        joint["depth"] + joint.get("vdepth", 0.0) * dt,
+    )
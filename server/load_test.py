@@ -0,0 +1,604 @@
+"""
+Load test for game_server.py: WebSocket game clients plus pose publishers.
+
+Starts a local server (uvicorn, optionally with --workers) on a synthetic
+chart, or targets a running one with --url. Then for --duration seconds:
+
+  publishers  M simulated cabinets, one room each, sending poses at --rate
+              over UDP (transport.PoseSender) or HTTP POST /api/cv/pose
+  clients     N WebSocket clients spread over those rooms (/ws?pose=true).
+              Each sends get_beatmap; the first of each room sends
+              start_game; all poll get_latest_pose at --poll-rate and
+              ping once a second
+
+and reports:
+
+  delivery    capture -> client latency of each pose a client received
+  dropped     poses a client never saw (coalesced away by the broadcaster,
+              lost on UDP, or after its connection was dropped)
+  requests    get_beatmap / start_game / ping round trips, POST latency
+  resources   server CPU and peak RSS (local server or --server-pid, Linux
+              /proc), and this process's own CPU
+
+Nothing beyond the standard library and the repo is needed on the client
+side: WebSocket and HTTP/1.1 are spoken directly over asyncio streams.
+Every run is saved as JSON under --save; the newest earlier run with the same
+settings is compared against and the exit status is 1 if a latency, drop
+rate or resource figure got worse by more than --tolerance. A run where
+clients could not connect or received no poses exits 1 and is not saved,
+so it never becomes a baseline.
+
+Usage: python load_test.py [--clients 20] [--publishers 2] [--rate 60] [--duration 10]
+                           [--transport udp|http] [--workers 1] [--url http://host:8000]
+"""
+import argparse
+import asyncio
+import base64
+import json
+import math
+import os
+import random
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.parse
+import urllib.request
+import zipfile
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+from bench_osu import synthetic_chart
+from transport import POSE_PORT, PoseSender
+
+SERVER_DIR = Path(__file__).resolve().parent
+DEFAULT_PORT = 8010
+# (section, metric) pairs where bigger is worse, checked against the previous run
+COMPARED = [
+    ("delivery_ms", "p50"), ("delivery_ms", "p95"), ("delivery_ms", "p99"),
+    ("ping_ms", "p95"), ("post_ms", "p95"), ("get_beatmap_ms", "p95"),
+    ("dropped", "ratio"), ("server", "cpu_percent"), ("server", "peak_rss_mb"),
+]
+
+
+def percentiles(ms):
+    if not ms:
+        return None
+    ms = np.asarray(ms)
+    return {
+        "count": int(ms.size),
+        "p50": float(np.percentile(ms, 50)),
+        "p95": float(np.percentile(ms, 95)),
+        "p99": float(np.percentile(ms, 99)),
+        "max": float(ms.max()),
+    }
+
+
+# ---- minimal protocol clients --------------------------------------------------
+
+class ConnectionClosed(Exception):
+    pass
+
+
+class WsClient:
+    """Just enough RFC 6455 for a test client: masked text frames out, text/binary in"""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, host, port, path):
+        reader, writer = await asyncio.open_connection(host, port)
+        key = base64.b64encode(os.urandom(16)).decode()
+        writer.write((f"GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\nUpgrade: websocket\r\n"
+                      f"Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n").encode())
+        status = await reader.readline()
+        if b" 101 " not in status:
+            writer.close()
+            raise ConnectionError(f"WebSocket handshake failed: {status.decode().strip()}")
+        while (await reader.readline()) not in (b"\r\n", b""):
+            pass
+        return cls(reader, writer)
+
+    def _frame(self, opcode, payload):
+        mask = os.urandom(4)
+        n = len(payload)
+        if n < 126:
+            header = struct.pack("!BB", 0x80 | opcode, 0x80 | n)
+        elif n < 1 << 16:
+            header = struct.pack("!BBH", 0x80 | opcode, 0x80 | 126, n)
+        else:
+            header = struct.pack("!BBQ", 0x80 | opcode, 0x80 | 127, n)
+        key = int.from_bytes((mask * (n // 4 + 1))[:n], "big")
+        masked = (int.from_bytes(payload, "big") ^ key).to_bytes(n, "big") if n else b""
+        self.writer.write(header + mask + masked)
+
+    async def send_json(self, message):
+        self._frame(0x1, json.dumps(message).encode())
+        await self.writer.drain()
+
+    async def recv(self):
+        """(opcode, payload) of the next text (1) or binary (2) message"""
+        chunks, opcode = [], None
+        while True:
+            try:
+                b1, b2 = await self.reader.readexactly(2)
+                n = b2 & 0x7F
+                if n == 126:
+                    (n,) = struct.unpack("!H", await self.reader.readexactly(2))
+                elif n == 127:
+                    (n,) = struct.unpack("!Q", await self.reader.readexactly(8))
+                payload = await self.reader.readexactly(n)  # servers never mask
+            except (asyncio.IncompleteReadError, ConnectionError):
+                raise ConnectionClosed()
+            frame_opcode = b1 & 0x0F
+            if frame_opcode == 0x8:
+                raise ConnectionClosed()
+            if frame_opcode == 0x9:
+                self._frame(0xA, payload)
+                continue
+            if frame_opcode == 0xA:
+                continue
+            if frame_opcode:
+                opcode = frame_opcode
+            chunks.append(payload)
+            if b1 & 0x80:
+                return opcode, b"".join(chunks)
+
+    async def close(self):
+        try:
+            self._frame(0x8, struct.pack("!H", 1000))
+            await self.writer.drain()
+        except ConnectionError:
+            pass
+        self.writer.close()
+
+
+class HttpClient:
+    """Keep-alive HTTP/1.1 POST of JSON bodies, one request at a time"""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = self.writer = None
+
+    async def post_json(self, path, body):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        data = json.dumps(body).encode()
+        self.writer.write((f"POST {path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n"
+                           f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n\r\n").encode() + data)
+        try:
+            await self.writer.drain()
+            status = int((await self.reader.readline()).split()[1])
+            length = 0
+            while (line := await self.reader.readline()) not in (b"\r\n", b""):
+                name, _, value = line.decode("latin-1").partition(":")
+                if name.lower() == "content-length":
+                    length = int(value)
+            await self.reader.readexactly(length)
+        except (IndexError, ValueError, asyncio.IncompleteReadError, ConnectionError):
+            self.close()
+            raise ConnectionError("HTTP request failed")
+        return status
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+# ---- server process ------------------------------------------------------------
+
+def _process_tree(pid):
+    """pid and its descendants (uvicorn workers), from /proc"""
+    children = {}
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            children.setdefault(ppid, []).append(int(entry))
+    tree, todo = [], [pid]
+    while todo:
+        p = todo.pop()
+        tree.append(p)
+        todo += children.get(p, [])
+    return tree
+
+
+def process_usage(pid):
+    """(cpu seconds, RSS MB) of pid and its children, or None where /proc is unavailable"""
+    if not os.path.isdir("/proc"):
+        return None
+    ticks = os.sysconf("SC_CLK_TCK")
+    cpu = rss = 0.0
+    for p in _process_tree(pid):
+        try:
+            with open(f"/proc/{p}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            cpu += (int(fields[11]) + int(fields[12])) / ticks
+            with open(f"/proc/{p}/status") as f:
+                rss += next(int(line.split()[1]) for line in f if line.startswith("VmRSS:")) / 1024
+        except (OSError, StopIteration, IndexError, ValueError):
+            continue
+    return cpu, rss
+
+
+class ResourceSampler:
+    def __init__(self, pid, interval=0.5):
+        self.pid = pid
+        self.interval = interval
+        self.samples = []  # (time, cpu seconds, rss MB)
+
+    async def run(self):
+        while True:
+            usage = process_usage(self.pid)
+            if usage is None:
+                return
+            self.samples.append((time.perf_counter(), *usage))
+            await asyncio.sleep(self.interval)
+
+    def results(self):
+        if len(self.samples) < 2:
+            return None
+        (t0, cpu0, _), (t1, cpu1, _) = self.samples[0], self.samples[-1]
+        return {
+            "cpu_percent": 100 * (cpu1 - cpu0) / (t1 - t0),
+            "peak_rss_mb": max(rss for _, _, rss in self.samples),
+        }
+
+
+def write_synthetic_osz(directory, objects=2000):
+    path = os.path.join(directory, "load_test.osz")
+    with zipfile.ZipFile(path, "w") as z:
+        z.writestr("load_test.osu", synthetic_chart(objects), compress_type=zipfile.ZIP_DEFLATED)
+        z.writestr("audio.mp3", os.urandom(1 << 20))
+    return path
+
+
+def start_server(port, workers):
+    env = dict(os.environ, DDR_WORKERS=str(workers))
+    command = [sys.executable, "-m", "uvicorn", "game_server:app", "--host", "127.0.0.1",
+               "--port", str(port), "--log-level", "warning"]
+    if workers > 1:
+        command += ["--workers", str(workers)]
+    return subprocess.Popen(command, cwd=SERVER_DIR, env=env, stdout=subprocess.DEVNULL)
+
+
+def http_get_json(url, timeout=2.0):
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        return json.loads(response.read())
+
+
+async def wait_ready(base_url, timeout=30.0):
+    deadline = time.time() + timeout
+    while True:
+        try:
+            return await asyncio.to_thread(http_get_json, f"{base_url}/api/rooms")
+        except OSError:
+            if time.time() > deadline:
+                raise RuntimeError(f"game server at {base_url} did not come up")
+            await asyncio.sleep(0.25)
+
+
+# ---- load ------------------------------------------------------------------------
+
+class Stats:
+    def __init__(self):
+        self.delivery_ms = []
+        self.ping_ms = []
+        self.post_ms = []
+        self.get_beatmap_ms = []
+        self.start_game_ms = []
+        self.errors = Counter()
+        self.published = {}  # room -> last seq
+        self.judgements = 0
+        self.expected = 0
+        self.received = 0
+        self.disconnects = 0
+
+
+def fake_pose(t, phase):
+    # feet tap sideways twice a second so the step detector has something to do
+    swing = 80 * max(0.0, math.sin(2 * math.pi * (2 * t + phase)))
+    return {
+        "left_ankle": (280 - swing, 420, 120, 0.9),
+        "right_ankle": (360, 420, 120, 0.9),
+        "left_knee": (290, 320, 125, 0.9),
+        "right_knee": (350, 320, 125, 0.9),
+    }
+
+
+async def publisher(index, room, args, host, stats, stop):
+    interval = 1.0 / args.rate
+    phase = random.random()
+    sender = PoseSender(host, args.pose_port, room=room) if args.transport == "udp" else None
+    http = HttpClient(host, args.port) if args.transport == "http" else None
+    seq = 0
+    next_time = time.perf_counter()
+    try:
+        while not stop.is_set():
+            now = time.time()
+            joints = fake_pose(now, phase)
+            if sender is not None:
+                seq = sender.send(joints, timestamp=now)
+            else:
+                seq += 1
+                body = {name: {"x": x, "y": y, "depth": d, "conf": c} for name, (x, y, d, c) in joints.items()}
+                body.update(seq=seq, timestamp=now, player=0)
+                t0 = time.perf_counter()
+                try:
+                    status = await http.post_json(f"/api/cv/pose?room={room}", body)
+                    stats.post_ms.append(1000 * (time.perf_counter() - t0))
+                    if status != 200:
+                        stats.errors[f"post {status}"] += 1
+                except ConnectionError:
+                    stats.errors["post failed"] += 1
+            stats.published[room] = seq
+            next_time += interval
+            await asyncio.sleep(max(0.0, next_time - time.perf_counter()))
+    finally:
+        if sender is not None:
+            await asyncio.to_thread(sender.close)
+        if http is not None:
+            http.close()
+
+
+async def game_client(index, room, args, host, stats, stop, beatmap):
+    try:
+        ws = await WsClient.connect(host, args.port, f"/ws?pose=true&room={room}")
+    except (OSError, ConnectionError):
+        stats.errors["ws connect"] += 1
+        return
+    waiting = {}  # reply type -> future
+    seen = set()
+    first_seq = None
+
+    async def read():
+        nonlocal first_seq
+        try:
+            while True:
+                opcode, payload = await ws.recv()
+                if opcode != 0x1:
+                    continue  # binary beatmap chunks
+                now = time.time()
+                msg = json.loads(payload)
+                kind = msg.get("type")
+                if kind == "pose_update":
+                    joints = msg.get("joints") or {}
+                    seq = joints.get("seq")
+                    if seq is not None and seq not in seen:
+                        seen.add(seq)
+                        first_seq = seq if first_seq is None else first_seq
+                        stats.delivery_ms.append(1000 * (now - joints["timestamp"]))
+                elif kind == "pong":
+                    stats.ping_ms.append(1000 * (now - msg["t0"]))
+                elif kind == "judgement":
+                    stats.judgements += len(msg["events"])
+                if kind in waiting and not waiting[kind].done():
+                    waiting[kind].set_result(now)
+        except ConnectionClosed:
+            if not stop.is_set():
+                stats.disconnects += 1
+
+    async def request(message, reply, timings):
+        waiting[reply] = asyncio.get_running_loop().create_future()
+        t0 = time.time()
+        await ws.send_json(message)
+        try:
+            timings.append(1000 * (await asyncio.wait_for(waiting[reply], 10.0) - t0))
+        except asyncio.TimeoutError:
+            stats.errors[f"{message['type']} timeout"] += 1
+
+    reader = asyncio.create_task(read())
+    try:
+        await request({"type": "get_beatmap", "path": beatmap}, "beatmap", stats.get_beatmap_ms)
+        if index < args.publishers:
+            # the room's first client starts its game
+            await request({"type": "start_game", "path": beatmap}, "game_started", stats.start_game_ms)
+        last_ping = 0.0
+        while not stop.is_set() and not reader.done():
+            await ws.send_json({"type": "get_latest_pose"})
+            if time.time() - last_ping >= 1.0:
+                last_ping = time.time()
+                await ws.send_json({"type": "ping", "t0": last_ping})
+            await asyncio.sleep(1.0 / args.poll_rate)
+    except ConnectionError:
+        stats.errors["ws send"] += 1
+    finally:
+        # give in-flight poses a moment, then account for what this client missed
+        await asyncio.sleep(0.2)
+        reader.cancel()
+        await ws.close()
+        if first_seq is not None:
+            stats.expected += stats.published.get(room, first_seq) - first_seq + 1
+            stats.received += len(seen)
+
+
+async def run(args):
+    parsed = urllib.parse.urlparse(args.url or f"http://127.0.0.1:{args.port}")
+    host, args.port = parsed.hostname, parsed.port or 80
+    base_url = f"{parsed.scheme}://{host}:{args.port}"
+
+    tmp = tempfile.TemporaryDirectory()
+    beatmap = args.beatmap or write_synthetic_osz(tmp.name)
+    server = start_server(args.port, args.workers) if args.url is None else None
+    pid = server.pid if server is not None else args.server_pid
+    stats = Stats()
+    try:
+        await wait_ready(base_url)
+        sampler = ResourceSampler(pid) if pid else None
+        cpu_start = time.process_time()
+        stop = asyncio.Event()
+        rooms = [f"load{i}" for i in range(args.publishers)]
+        sampling = asyncio.create_task(sampler.run()) if sampler else None
+
+        print(f"🔥 {args.clients} clients, {args.publishers} publishers at {args.rate} Hz over "
+              f"{args.transport}, {args.duration:.0f}s against {base_url}")
+        publishers = [asyncio.create_task(publisher(i, room, args, host, stats, stop))
+                      for i, room in enumerate(rooms)]
+        clients = [asyncio.create_task(game_client(i, rooms[i % len(rooms)], args, host, stats, stop, beatmap))
+                   for i in range(args.clients)]
+        t0 = time.perf_counter()
+        await asyncio.sleep(args.duration)
+        stop.set()
+        elapsed = time.perf_counter() - t0
+        await asyncio.gather(*publishers, *clients)
+        if sampling is not None:
+            sampling.cancel()
+        own_cpu = time.process_time() - cpu_start
+        try:
+            server_rooms = await asyncio.to_thread(http_get_json, f"{base_url}/api/rooms")
+        except OSError:
+            server_rooms = None
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(10)
+        tmp.cleanup()
+
+    published = sum(stats.published.values())
+    return {
+        "published": published,
+        "publish_rate": published / elapsed,
+        "delivery_ms": percentiles(stats.delivery_ms),
+        "dropped": {
+            "expected": stats.expected,
+            "received": stats.received,
+            "ratio": 1 - stats.received / stats.expected if stats.expected else None,
+        },
+        "ping_ms": percentiles(stats.ping_ms),
+        "post_ms": percentiles(stats.post_ms),
+        "get_beatmap_ms": percentiles(stats.get_beatmap_ms),
+        "start_game_ms": percentiles(stats.start_game_ms),
+        "judgement_events": stats.judgements,
+        "disconnects": stats.disconnects,
+        "errors": dict(stats.errors),
+        "server": sampler.results() if sampler else None,
+        "load_generator_cpu_percent": 100 * own_cpu / elapsed,
+        "server_rooms": server_rooms,
+    }
+
+
+# ---- reporting -------------------------------------------------------------------
+
+def report(results):
+    for name in ("delivery_ms", "ping_ms", "post_ms", "get_beatmap_ms", "start_game_ms"):
+        p = results[name]
+        if p:
+            print(f"  {name:<15} p50 {p['p50']:8.2f}  p95 {p['p95']:8.2f}  p99 {p['p99']:8.2f}  "
+                  f"max {p['max']:8.2f}  (n={p['count']})")
+    dropped = results["dropped"]
+    if dropped["ratio"] is not None:
+        print(f"  dropped         {dropped['expected'] - dropped['received']:,} of {dropped['expected']:,} "
+              f"poses ({100 * dropped['ratio']:.1f}%)")
+    print(f"  published       {results['published']:,} poses ({results['publish_rate']:,.0f}/s), "
+          f"{results['judgement_events']:,} judgement events delivered")
+    if results["disconnects"] or results["errors"]:
+        print(f"⚠️  {results['disconnects']} disconnects, errors: {results['errors']}")
+    if results["server"]:
+        print(f"💻 server CPU {results['server']['cpu_percent']:.0f}%, peak RSS {results['server']['peak_rss_mb']:.0f} MB")
+    print(f"💻 load generator CPU {results['load_generator_cpu_percent']:.0f}%")
+
+
+def _metric(results, section, key):
+    value = results.get(section)
+    return value.get(key) if isinstance(value, dict) else None
+
+
+def compare(previous, results, tolerance):
+    """Print changes against a previous run; returns the metrics that regressed"""
+    regressions = []
+    print(f"📊 vs {previous['file']}")
+    for section, key in COMPARED:
+        old, new = _metric(previous["results"], section, key), _metric(results, section, key)
+        if old is None or new is None:
+            continue
+        change = (new - old) / old if old else 0.0
+        worse = change > tolerance and new - old > (0.005 if section == "dropped" else 1.0)
+        if worse:
+            regressions.append(f"{section}.{key}")
+        print(f"  {section + '.' + key:<24} {old:10.2f} -> {new:10.2f}  {100 * change:+6.1f}%{'  ⚠️' if worse else ''}")
+    return regressions
+
+
+def unusable(results, args):
+    """Why a run cannot serve as a baseline, or None"""
+    failed = results["errors"].get("ws connect", 0)
+    if failed:
+        return f"{failed} of {args.clients} clients could not connect"
+    if args.clients and results["delivery_ms"] is None:
+        return "no poses were delivered to any client"
+    return None
+
+
+def latest_run(directory, config):
+    runs = sorted(Path(directory).glob("load_*.json")) if Path(directory).is_dir() else []
+    for path in reversed(runs):
+        with open(path, encoding="utf-8") as f:
+            run = json.load(f)
+        if run.get("config") == config:
+            run["file"] = path.name
+            return run
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=20, help="WebSocket game clients")
+    parser.add_argument("--publishers", type=int, default=2, help="simulated cabinets, one room each")
+    parser.add_argument("--rate", type=float, default=60.0, help="poses per second per publisher")
+    parser.add_argument("--poll-rate", type=float, default=10.0, help="get_latest_pose per second per client")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument("--transport", choices=("udp", "http"), default="udp")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the local server")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="HTTP port for the local server")
+    parser.add_argument("--pose-port", type=int, default=POSE_PORT, help="the server's UDP pose port")
+    parser.add_argument("--url", help="test a running server instead of starting one")
+    parser.add_argument("--server-pid", type=int, help="with --url, sample this process's CPU / memory")
+    parser.add_argument("--beatmap", help=".osz path on the server (default: a synthetic chart)")
+    parser.add_argument("--save", default="load_results", metavar="DIR", help="where runs are stored")
+    parser.add_argument("--compare", metavar="PATH", help="compare with this run instead of the latest matching one")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="relative worsening that counts as a regression")
+    args = parser.parse_args()
+    if args.publishers < 1:
+        parser.error("need at least one publisher")
+
+    config = {
+        "clients": args.clients, "publishers": args.publishers, "rate": args.rate,
+        "poll_rate": args.poll_rate, "duration": args.duration, "transport": args.transport,
+        "workers": args.workers, "target": args.url or "local",
+    }
+    previous = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            previous = dict(json.load(f), file=args.compare)
+    else:
+        previous = latest_run(args.save, config)
+
+    results = asyncio.run(run(args))
+    report(results)
+    problem = unusable(results, args)
+    if problem is not None:
+        print(f"❌ {problem}; run not saved")
+        sys.exit(1)
+
+    os.makedirs(args.save, exist_ok=True)
+    path = os.path.join(args.save, time.strftime("load_%Y%m%d-%H%M%S.json"))
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"config": config, "time": time.time(), "results": results}, f, indent=2)
+    print(f"💾 {path}")
+
+    if previous is not None and compare(previous, results, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,31 @@
-from ultralytics import YOLO
+from startup import StartupProfile
+startup = StartupProfile()
+
+import argparse
 import cv2
 import torch
 import numpy as np
-
+import time
+
+import model_registry
+from depth_scheduler import DepthScheduler
+from frame_source import open_source
+from preview import Preview, draw_joints, draw_skeleton
+from shm_bus import ShmBus
+
+parser = argparse.ArgumentParser()
+parser.add_argument("source", nargs="?", default="0",
+                    help="webcam index, video file, image directory or synthetic[:WxH[:N]]")
+parser.add_argument("--no-display", action="store_true", help="run headless (no cv2 windows, no drawing)")
+parser.add_argument("--loop", action="store_true", help="restart files / image directories at the end")
+parser.add_argument("--fps", type=float, help="pace the source to this rate")
+args = parser.parse_args()
+startup.mark("imports")
 device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
 
-midas = torch.hub.load("intel-isl/MiDaS", "MiDaS_small")
+# weights, hub code and transforms come from the local cache (server/models)
+midas, transform = model_registry.midas_small()
 midas.to(device)
-midas.eval()
-
-midas_transforms = torch.hub.load("intel-isl/MiDaS", "transforms")
-transform = midas_transforms.small_transform
 
 def estimate_depth(frame):
     img = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
@@ -29,70 +44,94 @@ def estimate_depth(frame):
     depth = cv2.normalize(depth, None, 0, 255, cv2.NORM_MINMAX)
     return depth.astype(np.uint8)
 
-def draw_depth_at_point(frame, depth_map, point, label):
-    x, y = int(point[0]), int(point[1])
-    if 0 <= x < depth_map.shape[1] and 0 <= y < depth_map.shape[0]:
-        d = depth_map[y, x]
-        cv2.putText(
-            frame,
-            f"{label}: {d}",
-            (x + 5, y - 5),
-            cv2.FONT_HERSHEY_SIMPLEX,
-            0.5,
-            (255, 255, 255),
-            2
-        )
-
-
-# First run will download the model automatically
-model = YOLO('yolov8n-pose.pt')
-
-cap = cv2.VideoCapture(0)
+def draw_overlay(image, points, joints):
+    # hips-knees-ankles skeleton, then the depth-labelled knee and ankle dots
+    draw_skeleton(image, points, LEG_CONNECTIONS, color=(255, 255, 0), point_color=(255, 0, 0))
+    draw_joints(image, joints)
+
+
+# First run downloads the weights into the cache, later runs work offline
+model = model_registry.yolo_pose()
+startup.mark("load models")
+
+# one dummy pass each so the first camera frame is not the slow one
+model(np.zeros((480, 640, 3), dtype=np.uint8), verbose=False)
+estimate_depth(np.zeros((480, 640, 3), dtype=np.uint8))
+startup.mark("warmup")
+
+cap = open_source(args.source, loop=args.loop, fps=args.fps)
+startup.mark("open source")
+
+# MiDaS runs on motion, confidence drops or every few frames; in between the
+# previous depth map is read at the new keypoint positions
+depth_scheduler = DepthScheduler(max_interval=6, budget_ms=50.0)
+depth_map = None
+
+# Set to a name (e.g. "ddr") to publish frames, depth and poses to a
+# shared-memory bus that shm_preview.py can show from another process
+SHM_BUS = None
+BUS_JOINTS = {"left_ankle": 15, "right_ankle": 16, "left_knee": 13, "right_knee": 14}
+# indices into points (YOLO keypoints 11-16): hip-knee-ankle on each side
+LEG_CONNECTIONS = [(0, 2), (2, 4), (1, 3), (3, 5)]
+shm_bus = None
+# drawing and imshow run on their own thread at PREVIEW_FPS (off with --no-display)
+PREVIEW_FPS = 15.0
+preview = Preview(enabled=not args.no_display, fps=PREVIEW_FPS, title="Pose Tracking")
+frame_seq = 0
+last_stats = time.time()
 
 while cap.isOpened():
+    frame_start = time.time()
     ret, frame = cap.read()
     if not ret:
         break
-    depth_map = estimate_depth(frame)
     
     results = model(frame, verbose=False)
-    
-    annotated_frame = results[0].plot()
-    
-    for result in results:
-        if result.keypoints is not None:
-            keypoints = result.keypoints.xy[0] 
-            left_hip = keypoints[11]
-            right_hip = keypoints[12]
-            left_knee = keypoints[13]
-            right_knee = keypoints[14]
-            left_ankle = keypoints[15]
-            right_ankle = keypoints[16]
-            cv2.circle(frame, (int(left_hip[0]), int(left_hip[1])), 8, (255, 0, 0), -1)
-            cv2.circle(frame, (int(right_hip[0]), int(right_hip[1])), 8, (255, 0, 0), -1)
-            cv2.circle(frame, (int(left_knee[0]), int(left_knee[1])), 8, (0, 255, 0), -1)
-            cv2.circle(frame, (int(right_knee[0]), int(right_knee[1])), 8, (0, 255, 0), -1)
-            cv2.circle(frame, (int(left_ankle[0]), int(left_ankle[1])), 8, (0, 0, 255), -1)
-            cv2.circle(frame, (int(right_ankle[0]), int(right_ankle[1])), 8, (0, 0, 255), -1)
-            cv2.line(frame, tuple(left_hip.int().tolist()), tuple(left_knee.int().tolist()), (255, 255, 0), 3)
-            cv2.line(frame, tuple(left_knee.int().tolist()), tuple(left_ankle.int().tolist()), (255, 255, 0), 3)
-            cv2.line(frame, tuple(right_hip.int().tolist()), tuple(right_knee.int().tolist()), (255, 255, 0), 3)
-            cv2.line(frame, tuple(right_knee.int().tolist()), tuple(right_ankle.int().tolist()), (255, 255, 0), 3)
-
-            # depth
-            draw_depth_at_point(frame, depth_map, left_ankle, "LA")
-            draw_depth_at_point(frame, depth_map, right_ankle, "RA")
-            draw_depth_at_point(frame, depth_map, left_knee, "LK")
-            draw_depth_at_point(frame, depth_map, right_knee, "RK")
-
-            
-
-    cv2.imshow('Pose Tracking', frame)
-    cv2.imshow("Depth", depth_map)
-
-    if cv2.waitKey(1) & 0xFF == ord('q'):
+    if not startup.reported:
+        startup.mark("first pose")
+        startup.report()
+
+    points, conf = None, None
+    if results[0].keypoints is not None and len(results[0].keypoints.xy) > 0:
+        points = results[0].keypoints.xy[0][11:17].cpu().numpy()
+        if results[0].keypoints.conf is not None:
+            conf = results[0].keypoints.conf[0][11:17].cpu().numpy()
+    if depth_scheduler.should_run(points, conf):
+        depth_map = estimate_depth(frame)
+        depth_scheduler.ran(points, conf)
+    else:
+        depth_scheduler.skipped()
+
+    frame_seq += 1
+    joints = None
+    if points is not None:
+        # points are YOLO keypoints 11-16 (hips, knees, ankles)
+        joints = {}
+        for name, index in BUS_JOINTS.items():
+            x, y = points[index - 11]
+            d = depth_map[min(int(y), depth_map.shape[0] - 1), min(int(x), depth_map.shape[1] - 1)]
+            joints[name] = (x, y, d, conf[index - 11] if conf is not None else 1.0)
+
+    if SHM_BUS:
+        if shm_bus is None:
+            shm_bus = ShmBus(SHM_BUS, frame.shape, create=True)
+        shm_bus.publish(frame_seq, frame_start, frame, depth_map, joints)
+
+    # the frame is never drawn on here; the preview thread works on its own copy
+    overlay = None
+    if joints is not None:
+        overlay = lambda image, points=points, joints=joints: draw_overlay(image, points, joints)
+    preview.submit(frame, overlay, depth_map)
+
+    depth_scheduler.observe(time.time() - frame_start)
+    if time.time() - last_stats >= 5.0:
+        print(f"⏱️  {depth_scheduler.format_stats()}")
+        last_stats = time.time()
+
+    if preview.show() == ord('q'):
         break
-    
-cap.release()
 
-cv2.destroyAllWindows()
\ No newline at end of file
+cap.release()
+if shm_bus is not None:
+    shm_bus.close()
+preview.close()
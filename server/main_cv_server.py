@@ -1,137 +1,326 @@
-from ultralytics import YOLO
+# first, so the profile covers the heavy imports below
+from startup import StartupProfile
+startup = StartupProfile()
+
+import argparse
+import functools
 import cv2
-import torch
 import numpy as np
-import requests
+import sys
 import time
 
-device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+from clock_sync import ClockEstimator
+from depth import sample_depth_at_points
+from depth_scheduler import DepthScheduler
+from frame_source import open_source
+from inference import load_backend, warmup
+from keypoint_filter import PoseFilter
+from metrics import TraceDump, observe_age, span, start_http_server
+from pipeline import Pipeline
+from pose_trace import PoseRecorder, joints_to_pose
+from preview import Preview, draw_joints
+from roi import RoiTracker
+from shm_bus import ShmBus
+from transport import DEFAULT_ROOM, PoseSender
+
+parser = argparse.ArgumentParser()
+parser.add_argument("source", nargs="?", default="0",
+                    help="webcam index, video file, image directory or synthetic[:WxH[:N]]")
+parser.add_argument("--no-display", action="store_true", help="run headless (no cv2 windows, no drawing)")
+parser.add_argument("--loop", action="store_true", help="restart files / image directories at the end")
+parser.add_argument("--fps", type=float, help="pace the source to this rate")
+parser.add_argument("--record", metavar="PATH", help="write sent poses to a JSON-lines trace")
+parser.add_argument("--trace", metavar="PATH", help="write per-frame span timings as JSON lines")
+parser.add_argument("--room", default=DEFAULT_ROOM, help="game server room this cabinet plays in")
+parser.add_argument("--shm", metavar="NAME",
+                    help="publish frames, depth maps and poses to a shared-memory bus (see shm_preview.py)")
+args = parser.parse_args()
+startup.mark("imports")
 
-midas = torch.hub.load("intel-isl/MiDaS", "MiDaS_small")
-midas.to(device)
-midas.eval()
+# "torch" runs YOLO / MiDaS in eager PyTorch; "onnx" and "onnx-int8" run
+# them through onnxruntime (exported to models/ on first use, see onnx_export.py)
+INFERENCE_BACKEND = "torch"
+INFERENCE_THREADS = None  # per model; None splits the cores between pose and depth
 
-midas_transforms = torch.hub.load("intel-isl/MiDaS", "transforms")
-transform = midas_transforms.small_transform
+pose_model, depth_model = load_backend(INFERENCE_BACKEND, INFERENCE_THREADS)
+startup.mark("load models")
 
 def estimate_depth(frame):
-    img = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    input_batch = transform(img).to(device)
-
-    with torch.no_grad():
-        prediction = midas(input_batch)
-        prediction = torch.nn.functional.interpolate(
-            prediction.unsqueeze(1),
-            size=img.shape[:2],
-            mode="bicubic",
-            align_corners=False,
-        ).squeeze()
-
-    depth = prediction.cpu().numpy()
+    prediction = depth_model(frame)
+    depth = cv2.resize(prediction, (frame.shape[1], frame.shape[0]), interpolation=cv2.INTER_CUBIC)
     depth = cv2.normalize(depth, None, 0, 255, cv2.NORM_MINMAX)
     return depth.astype(np.uint8)
 
+def estimate_depth_small(frame):
+    """Raw MiDaS prediction at network resolution (no upsample, no normalize)"""
+    return depth_model(frame)
+
+def estimate_depth_roi(crop):
+    """Raw MiDaS prediction for a leg crop at the reduced ROI input size"""
+    return depth_model(crop, ROI_DEPTH_SIZE)
+
 def get_depth_at_point(depth_map, point):
     x, y = int(point[0]), int(point[1])
     if 0 <= x < depth_map.shape[1] and 0 <= y < depth_map.shape[0]:
         return int(depth_map[y, x])
     return 0
 
-def draw_depth_at_point(frame, depth_map, point, label):
-    """Draw depth value at a point on the frame"""
-    x, y = int(point[0]), int(point[1])
-    if 0 <= x < depth_map.shape[1] and 0 <= y < depth_map.shape[0]:
-        d = depth_map[y, x]
-        cv2.putText(
-            frame,
-            f"{label}: {d}",
-            (x + 5, y - 5),
-            cv2.FONT_HERSHEY_SIMPLEX,
-            0.5,
-            (255, 255, 255),
-            2
-        )
-
-model = YOLO('yolov8n-pose.pt')
-cap = cv2.VideoCapture(0)
+cap = open_source(args.source, loop=args.loop, fps=args.fps)
+startup.mark("open source")
 
 # Server endpoint
+# "udp" streams binary packets to the game server, "http" POSTs JSON per frame
+TRANSPORT = "udp"
 SERVER_URL = "http://localhost:8000/api/cv/pose"
+SERVER_HOST = "127.0.0.1"
 last_send_time = time.time()
 SEND_INTERVAL = 0.033  # ~30 FPS
 
-print("🎥 CV Server starting - sending pose data to game server")
+# "sparse" samples the low-res MiDaS output at the joints only,
+# "full" upsamples the whole map to camera resolution first
+DEPTH_MODE = "sparse"
+DEPTH_RADIUS = 1  # neighbourhood (in depth-map pixels) for the median
+# "adaptive" runs MiDaS only on motion / confidence drops / every few frames
+# and re-samples the previous map at the new keypoints in between
+DEPTH_SCHEDULE = "adaptive"
+DEPTH_MAX_INTERVAL = 6  # frames
+DEPTH_BUDGET_MS = 50.0  # capture-to-publish target
+# Crop depth (and optionally pose) to a box around hips/knees/ankles tracked
+# from the previous frame; full-frame inference resumes when tracking is lost
+ROI_DEPTH = True
+ROI_POSE = False
+ROI_DEPTH_SIZE = (128, 160)  # MiDaS input (w, h) for the crop, multiples of 32
+ROI_POSE_SIZE = 320  # YOLO imgsz for the crop (torch only; ONNX graphs have a fixed size)
+ROI_POSE_MARGIN = 0.5  # extra context around the legs for person detection
+JOINTS = {"left_ankle": 15, "right_ankle": 16, "left_knee": 13, "right_knee": 14}
+
+# One Euro smoothing of x/y/depth per joint; packets carry the filtered
+# position and velocity at capture time, which the step detector extrapolates
+FILTER_KEYPOINTS = True
+FILTER_MIN_CUTOFF = 1.0  # Hz, lower = less jitter when still
+FILTER_BETA = 0.05  # higher = less lag when moving
+FILTER_D_CUTOFF = 4.0  # Hz, velocity smoothing; see bench_filter.py
+
+QUEUE_SIZE = 2  # per-stage queue; the oldest frame is dropped when full
+STATS_INTERVAL = 5.0
+METRICS_PORT = 9101  # Prometheus scrape port for this process, None to disable
+PREVIEW_FPS = 15.0  # the debug window renders at its own rate, off the pipeline threads
 
-while cap.isOpened():
-    ret, frame = cap.read()
+frame_seq = 0
+sender = PoseSender(SERVER_HOST, room=args.room) if TRANSPORT == "udp" else None
+if TRANSPORT == "http":
+    import requests
+    session = requests.Session()  # keep-alive for the http fallback
+    # each POST reply doubles as a clock ping; the UDP sender syncs on its own
+    http_clock = ClockEstimator()
+recorder = PoseRecorder(args.record) if args.record else None
+trace_dump = TraceDump(args.trace) if args.trace else None
+shm_bus = None  # created on the first frame, once its shape is known
+preview = Preview(enabled=not args.no_display, fps=PREVIEW_FPS, title="CV Server")
+depth_scheduler = DepthScheduler(DEPTH_MAX_INTERVAL, DEPTH_BUDGET_MS)
+last_depth_map = None
+last_depth_offset = None  # (x0, y0, crop shape) when last_depth_map covers an ROI
+roi = RoiTracker()
+pose_filter = PoseFilter(JOINTS, FILTER_MIN_CUTOFF, FILTER_BETA, FILTER_D_CUTOFF)
+
+def capture_stage():
+    global frame_seq
+    if not cap.isOpened():
+        return StopIteration
+    trace = {}
+    with span("capture", trace):
+        ret, frame = cap.read()
     if not ret:
-        break
-    
-    depth_map = estimate_depth(frame)
-    results = model(frame, verbose=False)
-    
-    for result in results:
-        if result.keypoints is not None and len(result.keypoints.xy) > 0:
-            keypoints = result.keypoints.xy[0]
-            
-            left_ankle = keypoints[15]
-            right_ankle = keypoints[16]
-            left_knee = keypoints[13]
-            right_knee = keypoints[14]
-            
-            # Send pose data to server
-            current_time = time.time()
-            if current_time - last_send_time >= SEND_INTERVAL:
-                pose_data = {
-                    "left_ankle": {
-                        "x": float(left_ankle[0]),
-                        "y": float(left_ankle[1]),
-                        "depth": get_depth_at_point(depth_map, left_ankle)
-                    },
-                    "right_ankle": {
-                        "x": float(right_ankle[0]),
-                        "y": float(right_ankle[1]),
-                        "depth": get_depth_at_point(depth_map, right_ankle)
-                    },
-                    "left_knee": {
-                        "x": float(left_knee[0]),
-                        "y": float(left_knee[1]),
-                        "depth": get_depth_at_point(depth_map, left_knee)
-                    },
-                    "right_knee": {
-                        "x": float(right_knee[0]),
-                        "y": float(right_knee[1]),
-                        "depth": get_depth_at_point(depth_map, right_knee)
-                    },
-                    "timestamp": current_time
-                }
-                
-                # Log the data
-                print(f"📊 LA:{pose_data['left_ankle']['depth']} RA:{pose_data['right_ankle']['depth']} "
-                      f"LK:{pose_data['left_knee']['depth']} RK:{pose_data['right_knee']['depth']}")
-                
+        return StopIteration
+    frame_seq += 1
+    if frame_seq == 1:
+        startup.mark("first frame")
+    return {"seq": frame_seq, "frame": frame, "capture_time": time.time(), "trace": trace}
+
+def detect_pose(frame, offset=(0, 0), **kwargs):
+    """First person's (17, 2) keypoints in frame coordinates and (17,) confidences, or (None, None)"""
+    return pose_model(frame, offset, **kwargs)
+
+def pose_stage(packet):
+    frame = packet["frame"]
+    keypoints, conf = None, None
+    with span("inference", packet["trace"]):
+        if ROI_POSE:
+            crop, offset = roi.crop(frame, ROI_POSE_MARGIN)
+            if crop is not None:
+                keypoints, conf = detect_pose(crop, offset, imgsz=ROI_POSE_SIZE)
+        if keypoints is None:
+            keypoints, conf = detect_pose(frame)
+
+    packet["keypoints"] = None
+    if keypoints is not None:
+        packet["keypoints"] = [keypoints[i] for i in JOINTS.values()]
+        packet["conf"] = [float(conf[i]) for i in JOINTS.values()]
+        # hips, knees, ankles
+        roi.update(keypoints[11:17], conf[11:17], frame.shape)
+    else:
+        roi.update(None, None, frame.shape)
+    # the depth stage crops with this frame's box, the tracker may move on meanwhile
+    packet["roi_box"] = roi.box
+    return packet
+
+def depth_stage(packet):
+    global last_depth_map, last_depth_offset
+    frame = packet["frame"]
+    points = packet["keypoints"]
+    conf = packet.get("conf")
+
+    if depth_scheduler.should_run(points, conf) or DEPTH_SCHEDULE != "adaptive":
+        with span("depth", packet["trace"]):
+            crop, offset = (None, None)
+            if ROI_DEPTH and DEPTH_MODE == "sparse" and packet["roi_box"] is not None:
+                crop, offset = roi.crop(frame, box=packet["roi_box"])
+            if crop is not None:
+                last_depth_map = estimate_depth_roi(crop)
+                last_depth_offset = (offset, crop.shape)
+            elif DEPTH_MODE == "sparse":
+                last_depth_map = estimate_depth_small(frame)
+                last_depth_offset = None
+            else:
+                last_depth_map = estimate_depth(frame)
+                last_depth_offset = None
+            depth_scheduler.ran(points, conf)
+    else:
+        depth_scheduler.skipped()
+    packet["depth_map"] = last_depth_map
+
+    packet["joints"] = None
+    if points is not None:
+        if DEPTH_MODE == "sparse" and last_depth_offset is not None:
+            # map frame coordinates into the crop the depth map was computed on
+            (x0, y0), crop_shape = last_depth_offset
+            local = np.asarray(points, dtype=np.float32) - np.array([x0, y0], dtype=np.float32)
+            depths = sample_depth_at_points(last_depth_map, local, crop_shape, DEPTH_RADIUS)
+        elif DEPTH_MODE == "sparse":
+            depths = sample_depth_at_points(last_depth_map, points, frame.shape, DEPTH_RADIUS)
+        else:
+            depths = [get_depth_at_point(packet["depth_map"], p) for p in points]
+        packet["joints"] = {
+            name: (p, int(d), c) for name, p, d, c in zip(JOINTS, points, depths, packet["conf"])
+        }
+    return packet
+
+def publish_stage(packet):
+    global last_send_time, shm_bus
+    joints = packet["joints"]
+    frame = packet["frame"]
+    trace = packet["trace"]
+    sent_seq = None
+
+    if joints is not None:
+        joints = {name: (float(p[0]), float(p[1]), d, float(c)) for name, (p, d, c) in joints.items()}
+        if FILTER_KEYPOINTS:
+            # runs every frame so the filter sees the full-rate signal
+            joints = pose_filter.update(packet["capture_time"], joints)
+
+        # Send pose data to server
+        current_time = time.time()
+        if current_time - last_send_time >= SEND_INTERVAL:
+            with span("serialize", trace):
+                pose_data = joints_to_pose(joints, packet["capture_time"])
+            if recorder is not None:
+                recorder.write(pose_data)
+
+            # Log the data
+            print(f"📊 LA:{pose_data['left_ankle']['depth']:.0f} RA:{pose_data['right_ankle']['depth']:.0f} "
+                  f"LK:{pose_data['left_knee']['depth']:.0f} RK:{pose_data['right_knee']['depth']:.0f}")
+
+            if TRANSPORT == "udp":
+                # non-blocking: the sender thread only ever ships the newest pose
+                with span("publish", trace):
+                    sent_seq = sender.send(joints, timestamp=packet["capture_time"])
+                last_send_time = current_time
+            else:
                 try:
-                    requests.post(SERVER_URL, json=pose_data, timeout=0.1)
+                    with span("post", trace):
+                        # capture time on the server's clock, like the UDP sender does
+                        t0 = time.time()
+                        reply = session.post(SERVER_URL, params={"room": args.room}, timeout=0.1,
+                                             json=dict(pose_data, timestamp=http_clock.to_server(pose_data["timestamp"])))
+                        t3 = time.time()
+                    ack = reply.json()
+                    if "t1" in ack:
+                        http_clock.add(t0, ack["t1"], ack["t2"], t3)
                     last_send_time = current_time
                 except Exception as e:
                     print(f"⚠️  Server error: {e}")
-            
-            # Draw visualization with depth values
-            draw_depth_at_point(frame, depth_map, left_ankle, "LA")
-            draw_depth_at_point(frame, depth_map, right_ankle, "RA")
-            draw_depth_at_point(frame, depth_map, left_knee, "LK")
-            draw_depth_at_point(frame, depth_map, right_knee, "RK")
-            
-            cv2.circle(frame, tuple(left_ankle.int().tolist()), 8, (0, 0, 255), -1)
-            cv2.circle(frame, tuple(right_ankle.int().tolist()), 8, (0, 0, 255), -1)
-            cv2.circle(frame, tuple(left_knee.int().tolist()), 8, (0, 255, 0), -1)
-            cv2.circle(frame, tuple(right_knee.int().tolist()), 8, (0, 255, 0), -1)
-
-    cv2.imshow('CV Server', frame)
-    cv2.imshow('Depth', depth_map)
-    
-    if cv2.waitKey(1) & 0xFF == ord('q'):
+
+            if not startup.reported:
+                startup.mark("first packet")
+                startup.report()
+
+    if args.shm:
+        # the clean frame; readers draw their own overlay
+        if shm_bus is None:
+            shm_bus = ShmBus(args.shm, frame.shape, create=True)
+        with span("shm", trace):
+            depth = packet["depth_map"]
+            if depth.dtype != np.uint8:
+                depth = cv2.normalize(depth, None, 0, 255, cv2.NORM_MINMAX).astype(np.uint8)
+            shm_bus.publish(packet["seq"], packet["capture_time"], frame, depth, joints)
+
+    # drawing and depth normalization happen on the preview thread, if at all
+    preview.submit(frame, functools.partial(draw_joints, joints=joints) if joints else None,
+                   packet["depth_map"])
+
+    depth_scheduler.observe(time.time() - packet["capture_time"])
+    observe_age("published", packet["capture_time"])
+    if trace_dump is not None:
+        # sent_seq is the pose packet seq the game server's trace refers to
+        trace_dump.write({"frame": packet["seq"], "sent_seq": sent_seq,
+                          "capture_time": packet["capture_time"], "spans_ms": trace,
+                          "age_ms": round(1000 * (time.time() - packet["capture_time"]), 3)})
+    return packet
+
+pipeline = (
+    Pipeline(queue_size=QUEUE_SIZE)
+    .add_source("capture", capture_stage)
+    .add_stage("pose", pose_stage)
+    .add_stage("depth", depth_stage)
+    .add_stage("publish", publish_stage)
+)
+
+print("🎥 CV Server starting - sending pose data to game server")
+if METRICS_PORT:
+    start_http_server(METRICS_PORT)
+    print(f"📈 Metrics: http://localhost:{METRICS_PORT}/metrics")
+# the first real inference would otherwise pay for lazy allocation / graph optimization
+warmup(pose_model, depth_model, depth_sizes=(None, ROI_DEPTH_SIZE) if ROI_DEPTH else (None,))
+startup.mark("warmup")
+pipeline.start()
+last_stats = time.time()
+
+# cv2 windows stay on the main thread; with --no-display this just idles
+while pipeline.running:
+    key = preview.show(wait_ms=20)
+
+    if time.time() - last_stats >= STATS_INTERVAL:
+        print(f"⏱️  {pipeline.format_stats()}")
+        print(f"⏱️  depth: {depth_scheduler.format_stats()}")
+        clock = sender.clock.stats() if sender else http_clock.stats()
+        print(f"⏱️  clock: offset {clock['offset_ms']} ms, rtt {clock['rtt_ms']} ms over {clock['samples']} samples")
+        last_stats = time.time()
+
+    if key == ord('q'):
         break
 
+pipeline.stop()
+if sender is not None:
+    sender.close()
+if recorder is not None:
+    recorder.close()
+    print(f"💾 Recorded {recorder.written} poses to {args.record}")
+if trace_dump is not None:
+    trace_dump.close()
+if shm_bus is not None:
+    shm_bus.close()
 cap.release()
-cv2.destroyAllWindows()
\ No newline at end of file
+preview.close()
+
+if pipeline.errors():
+    sys.exit(1)
@@ -0,0 +1,128 @@
+"""
+MediaPipe pose landmarker as an alternative to YOLOv8-pose.
+
+BlazePose gives 33 landmarks per person; they are converted in one NumPy
+operation per result and mapped onto the 17 COCO keypoints the YOLO path
+uses, so callers (and bench_cv.py) see the same (17, 2) pixel keypoints and
+(17,) confidences whichever backend produced them.
+
+Two ways to run it:
+
+  pose(frame)              synchronous, VIDEO mode; the inference.py pose
+                           backend signature, returns the first person
+  pose.submit(frame, t)    LIVE_STREAM mode; MediaPipe drops frames while it
+                           is busy and calls on_result(keypoints, conf,
+                           landmarks, capture_time, frame) for the rest, with
+                           every detected person
+
+Timestamps handed to MediaPipe are real monotonic milliseconds, and results
+carry the capture time of the frame they came from.
+"""
+import threading
+import time
+
+import cv2
+import numpy as np
+
+import model_registry
+
+# BlazePose landmark index for each COCO keypoint (nose, eyes, ears,
+# shoulders, elbows, wrists, hips, knees, ankles)
+COCO_FROM_BLAZEPOSE = np.array([0, 2, 5, 7, 8, 11, 12, 13, 14, 15, 16, 23, 24, 25, 26, 27, 28])
+
+# BlazePose skeleton, for drawing the full 33 landmarks
+POSE_CONNECTIONS = [
+    (0, 1), (1, 2), (2, 3), (3, 7), (0, 4), (4, 5), (5, 6), (6, 8),
+    (9, 10), (11, 12), (11, 13), (13, 15), (15, 17), (15, 19), (15, 21),
+    (17, 19), (12, 14), (14, 16), (16, 18), (16, 20), (16, 22), (18, 20),
+    (11, 23), (12, 24), (23, 24), (23, 25), (24, 26), (25, 27), (26, 28),
+    (27, 29), (28, 30), (27, 31), (28, 32), (29, 31), (30, 32)
+]
+
+
+def landmarks_array(pose_landmarks, width, height):
+    """MediaPipe pose_landmarks -> (P, 33, 3) float32 of pixel x, pixel y, visibility"""
+    if not pose_landmarks:
+        return np.zeros((0, 33, 3), dtype=np.float32)
+    landmarks = np.array(
+        [[(lm.x, lm.y, lm.visibility) for lm in pose] for pose in pose_landmarks], dtype=np.float32
+    )
+    landmarks[..., :2] *= np.array([width, height], dtype=np.float32)
+    return landmarks
+
+
+def to_coco(landmarks):
+    """(P, 33, 3) landmarks -> (P, 17, 2) keypoints and (P, 17) confidences in YOLO's layout"""
+    coco = landmarks[:, COCO_FROM_BLAZEPOSE]
+    return coco[..., :2], coco[..., 2]
+
+
+class MediaPipePose:
+    def __init__(self, model_path=None, num_poses=1, live_stream=False, on_result=None,
+                 min_confidence=0.5):
+        import mediapipe as mp
+        self.mp = mp
+        vision = mp.tasks.vision
+        self.live_stream = live_stream
+        self.on_result = on_result
+        self.lock = threading.Lock()
+        self.pending = {}  # MediaPipe timestamp (ms) -> (capture time, frame), LIVE_STREAM only
+        self.last_ms = -1
+        self.latest = None  # last LIVE_STREAM result as passed to on_result
+        self.dropped = 0
+
+        options = vision.PoseLandmarkerOptions(
+            base_options=mp.tasks.BaseOptions(model_asset_path=model_path or model_registry.mediapipe_pose_task()),
+            running_mode=vision.RunningMode.LIVE_STREAM if live_stream else vision.RunningMode.VIDEO,
+            num_poses=num_poses,
+            min_pose_detection_confidence=min_confidence,
+            min_pose_presence_confidence=min_confidence,
+            min_tracking_confidence=min_confidence,
+            **({"result_callback": self._on_live_result} if live_stream else {}),
+        )
+        self.landmarker = vision.PoseLandmarker.create_from_options(options)
+
+    def _timestamp_ms(self):
+        # MediaPipe rejects timestamps that do not strictly increase
+        self.last_ms = max(int(time.monotonic() * 1000), self.last_ms + 1)
+        return self.last_ms
+
+    def _image(self, frame):
+        return self.mp.Image(image_format=self.mp.ImageFormat.SRGB, data=cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+
+    def detect(self, frame):
+        """(P, 17, 2) keypoints, (P, 17) confidences and (P, 33, 3) landmarks for every person (VIDEO mode)"""
+        result = self.landmarker.detect_for_video(self._image(frame), self._timestamp_ms())
+        landmarks = landmarks_array(result.pose_landmarks, frame.shape[1], frame.shape[0])
+        return (*to_coco(landmarks), landmarks)
+
+    def __call__(self, frame, offset=(0, 0), imgsz=None):
+        # same contract as inference.TorchPose; imgsz is fixed by the model bundle
+        keypoints, conf, _ = self.detect(frame)
+        if not len(keypoints):
+            return None, None
+        return keypoints[0] + np.array(offset, dtype=np.float32), conf[0]
+
+    def submit(self, frame, capture_time=None):
+        """Queue a frame for LIVE_STREAM detection; returns immediately"""
+        timestamp_ms = self._timestamp_ms()
+        with self.lock:
+            self.pending[timestamp_ms] = (capture_time if capture_time is not None else time.time(), frame)
+        self.landmarker.detect_async(self._image(frame), timestamp_ms)
+
+    def _on_live_result(self, result, output_image, timestamp_ms):
+        with self.lock:
+            # frames MediaPipe skipped while busy never get a callback
+            for ts in [ts for ts in self.pending if ts < timestamp_ms]:
+                del self.pending[ts]
+                self.dropped += 1
+            capture_time, frame = self.pending.pop(timestamp_ms, (None, None))
+        height, width = output_image.height, output_image.width
+        landmarks = landmarks_array(result.pose_landmarks, width, height)
+        keypoints, conf = to_coco(landmarks)
+        self.latest = (keypoints, conf, landmarks, capture_time, frame)
+        if self.on_result is not None:
+            self.on_result(*self.latest)
+
+    def close(self):
+        self.landmarker.close()
@@ -0,0 +1,155 @@
+"""
+Local cache of model weights so the CV scripts start without network access.
+
+Everything lives under MODEL_DIR (server/models by default, DDR_MODEL_DIR
+overrides it):
+
+  yolov8n-pose.pt                         ultralytics weights
+  hub/intel-isl_MiDaS_master/             torch.hub repo (code + transforms)
+  hub/checkpoints/midas_v21_small_*.pt    MiDaS_small weights
+  pose_landmarker_lite.task               MediaPipe pose landmarker bundle
+  *.onnx                                  exports made by inference.py
+
+Missing files are downloaded once, unless DDR_OFFLINE=1 is set, in which case
+ModelUnavailable is raised with the command that fills the cache. Loaded models
+are kept per process, so MiDaS and its transforms come from a single hub load.
+
+Usage: python model_registry.py [--fetch [--mediapipe]]
+"""
+import argparse
+import os
+import shutil
+import threading
+
+MODEL_DIR = os.environ.get("DDR_MODEL_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "models")
+YOLO_WEIGHTS = "yolov8n-pose.pt"
+MIDAS_REPO = "intel-isl/MiDaS"
+MIDAS_MODEL = "MiDaS_small"
+MEDIAPIPE_TASK = "pose_landmarker_lite.task"
+MEDIAPIPE_URL = ("https://storage.googleapis.com/mediapipe-models/pose_landmarker/"
+                 "pose_landmarker_lite/float16/latest/pose_landmarker_lite.task")
+
+_loaded = {}
+_lock = threading.Lock()
+
+
+class ModelUnavailable(RuntimeError):
+    pass
+
+
+def offline():
+    return os.environ.get("DDR_OFFLINE", "") not in ("", "0")
+
+
+def model_path(name):
+    return os.path.join(MODEL_DIR, name)
+
+
+def hub_dir():
+    return os.path.join(MODEL_DIR, "hub")
+
+
+def midas_repo_dir():
+    owner, name = MIDAS_REPO.split("/")
+    return os.path.join(hub_dir(), f"{owner}_{name}_master")
+
+
+def _missing(what):
+    return ModelUnavailable(f"{what} is not in {MODEL_DIR} and DDR_OFFLINE is set; "
+                            f"run `python model_registry.py --fetch` once with network access")
+
+
+def _once(key, load):
+    with _lock:
+        if key not in _loaded:
+            _loaded[key] = load()
+        return _loaded[key]
+
+
+def yolo_weights(name=YOLO_WEIGHTS):
+    """Path of the cached ultralytics weights, downloading them on first use"""
+    path = model_path(name)
+    if os.path.exists(path):
+        return path
+    if offline():
+        raise _missing(name)
+    from ultralytics.utils.downloads import attempt_download_asset
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    downloaded = attempt_download_asset(name)
+    shutil.move(downloaded, path)
+    return path
+
+
+def yolo_pose(name=YOLO_WEIGHTS):
+    """ultralytics YOLO pose model, loaded once per process"""
+    def load():
+        from ultralytics import YOLO
+        return YOLO(yolo_weights(name))
+    return _once(("yolo", name), load)
+
+
+def mediapipe_pose_task():
+    """Path of the cached MediaPipe pose landmarker bundle, downloading it on first use"""
+    path = model_path(MEDIAPIPE_TASK)
+    if os.path.exists(path):
+        return path
+    if offline():
+        raise _missing(MEDIAPIPE_TASK)
+    import urllib.request
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    urllib.request.urlretrieve(MEDIAPIPE_URL, path + ".part")
+    os.replace(path + ".part", path)
+    return path
+
+
+def midas_small():
+    """(MiDaS_small in eval mode, its small_transform), from the local hub cache when present"""
+    def load():
+        import torch
+        torch.hub.set_dir(hub_dir())
+        repo = midas_repo_dir()
+        if os.path.isdir(repo):
+            # source="local" skips the GitHub lookup torch.hub does for remote repos
+            model = torch.hub.load(repo, MIDAS_MODEL, source="local")
+            transforms = torch.hub.load(repo, "transforms", source="local")
+        elif offline():
+            raise _missing(f"torch.hub repo {MIDAS_REPO}")
+        else:
+            model = torch.hub.load(MIDAS_REPO, MIDAS_MODEL, trust_repo=True)
+            transforms = torch.hub.load(MIDAS_REPO, "transforms", trust_repo=True)
+        return model.eval(), transforms.small_transform
+    return _once(("midas", MIDAS_MODEL), load)
+
+
+def status():
+    """{artifact: path or None} for what is currently cached"""
+    checkpoints = os.path.join(hub_dir(), "checkpoints")
+    midas_weights = sorted(
+        f for f in (os.listdir(checkpoints) if os.path.isdir(checkpoints) else []) if "small" in f
+    )
+    return {
+        YOLO_WEIGHTS: model_path(YOLO_WEIGHTS) if os.path.exists(model_path(YOLO_WEIGHTS)) else None,
+        f"{MIDAS_REPO} hub repo": midas_repo_dir() if os.path.isdir(midas_repo_dir()) else None,
+        f"{MIDAS_MODEL} weights": os.path.join(checkpoints, midas_weights[0]) if midas_weights else None,
+        MEDIAPIPE_TASK: model_path(MEDIAPIPE_TASK) if os.path.exists(model_path(MEDIAPIPE_TASK)) else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fetch", action="store_true", help="download anything missing into the cache")
+    parser.add_argument("--mediapipe", action="store_true", help="with --fetch, also the MediaPipe pose bundle")
+    args = parser.parse_args()
+
+    if args.fetch:
+        yolo_weights()
+        midas_small()
+        if args.mediapipe:
+            mediapipe_pose_task()
+    print(f"📁 {MODEL_DIR}")
+    for name, path in status().items():
+        print(f"  {'✅' if path else '❌'} {name}{f'  {path}' if path else ''}")
+
+
+if __name__ == "__main__":
+    main()
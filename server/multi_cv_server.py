@@ -0,0 +1,221 @@
+"""
+Multi-camera / multi-player CV server.
+
+Reads N sources (webcam indices, video files, RTSP URLs), runs YOLO pose and
+MiDaS once per step on the stacked frames of all cameras, tracks every person
+with a stable player id and streams one pose per player to the game server.
+
+Sources may feed different rooms (cabinets): --room ROOM sets the room of
+every source, --room INDEX=ROOM that of the INDEX-th source. Player ids are
+numbered per room, so each room's first camera has the judged player 0.
+
+Usage: python multi_cv_server.py 0 1 cabinet3.mp4 rtsp://10.0.0.5/stream [--room 1=cab2] [--no-display]
+"""
+from startup import StartupProfile
+startup = StartupProfile()
+
+import argparse
+import cv2
+import torch
+import numpy as np
+import sys
+import time
+import os
+
+import model_registry
+from depth import sample_depth_at_points
+from keypoint_filter import PoseFilter
+from metrics import observe_age, span, start_http_server
+from frame_source import open_source
+from multicam import PlayerTracker, assign_rooms, person_centers
+from pipeline import Pipeline
+from transport import DEFAULT_ROOM, PoseSender
+
+parser = argparse.ArgumentParser()
+parser.add_argument("sources", nargs="+",
+                    help="webcam index, video file, stream URL, image directory or synthetic[:WxH[:N]]")
+parser.add_argument("--host", default="127.0.0.1", help="game server host")
+parser.add_argument("--room", action="append", default=[],
+                    help="game server room of every source (ROOM) or of one (INDEX=ROOM); repeatable")
+parser.add_argument("--no-display", action="store_true")
+parser.add_argument("--loop", action="store_true", help="restart files / image directories at the end")
+parser.add_argument("--fps", type=float, help="pace every source to this rate")
+parser.add_argument("--metrics-port", type=int, default=9101, help="Prometheus scrape port, 0 to disable")
+args = parser.parse_args()
+try:
+    source_rooms, room_cameras = assign_rooms(args.room, len(args.sources), DEFAULT_ROOM)
+except ValueError as e:
+    parser.error(str(e))
+startup.mark("imports")
+
+device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+
+# YOLO and MiDaS run on separate threads, so split the cores between them
+torch.set_num_threads(max(1, (os.cpu_count() or 2) // 2))
+
+# weights, hub code and transforms come from the local cache (server/models)
+midas, transform = model_registry.midas_small()
+midas.to(device)
+
+model = model_registry.yolo_pose()
+startup.mark("load models")
+
+JOINTS = {"left_ankle": 15, "right_ankle": 16, "left_knee": 13, "right_knee": 14}
+DEPTH_RADIUS = 1
+QUEUE_SIZE = 2
+STATS_INTERVAL = 5.0
+FILTER_MIN_CUTOFF = 1.0
+FILTER_BETA = 0.05
+FILTER_D_CUTOFF = 4.0
+
+caps = [open_source(s, loop=args.loop, fps=args.fps) for s in args.sources]
+startup.mark("open sources")
+trackers = [PlayerTracker(camera) for camera in room_cameras]
+live = list(range(len(caps)))
+senders = {room: PoseSender(args.host, room=room) for room in dict.fromkeys(source_rooms)}
+pose_filters = {}  # (room, player id) -> PoseFilter
+
+
+def estimate_depth_batch(frames):
+    """One MiDaS forward pass for all frames; returns (N, h, w) low-res predictions"""
+    h, w = frames[0].shape[:2]
+    batch = []
+    for frame in frames:
+        # the transform only gives equal tensor shapes for equal input shapes
+        if frame.shape[:2] != (h, w):
+            frame = cv2.resize(frame, (w, h))
+        batch.append(transform(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)))
+    input_batch = torch.cat(batch).to(device)
+
+    with torch.no_grad():
+        prediction = midas(input_batch)
+
+    return prediction.cpu().numpy()
+
+
+def capture_stage():
+    capture_time = time.time()
+    frames, cameras = [], []
+    for i in list(live):
+        with span("capture"):
+            ret, frame = caps[i].read()
+        if not ret:
+            print(f"⚠️  Source {args.sources[i]} ended")
+            live.remove(i)
+            continue
+        frames.append(frame)
+        cameras.append(i)
+    if not live:
+        return StopIteration
+    return {"frames": frames, "cameras": cameras, "capture_time": capture_time}
+
+
+def pose_stage(packet):
+    # a list input runs as one batch
+    with span("inference"):
+        results = model(packet["frames"], verbose=False)
+    people, released = [], []
+    for camera, result in zip(packet["cameras"], results):
+        room = source_rooms[camera]
+        if result.keypoints is None or len(result.keypoints.xy) == 0:
+            trackers[camera].update(np.zeros((0, 2)))
+            released += [(room, player) for player in trackers[camera].released]
+            people.append([])
+            continue
+        keypoints = result.keypoints.xy.cpu().numpy()
+        conf = result.keypoints.conf
+        conf = conf.cpu().numpy() if conf is not None else np.ones(keypoints.shape[:2])
+        boxes = result.boxes.xywh.cpu().numpy() if result.boxes is not None else None
+        players = trackers[camera].update(person_centers(keypoints, boxes))
+        released += [(room, player) for player in trackers[camera].released]
+        people.append([
+            (player, keypoints[p][list(JOINTS.values())], conf[p][list(JOINTS.values())])
+            for p, player in enumerate(players) if player is not None
+        ])
+    packet["people"] = people
+    packet["released"] = released
+    return packet
+
+
+def depth_stage(packet):
+    with span("depth"):
+        depth_maps = estimate_depth_batch(packet["frames"])
+    packet["depth_maps"] = depth_maps
+    for frame, depth_small, people in zip(packet["frames"], depth_maps, packet["people"]):
+        for k, (player, points, conf) in enumerate(people):
+            depths = sample_depth_at_points(depth_small, points, frame.shape, DEPTH_RADIUS)
+            people[k] = (player, points, conf, depths)
+    return packet
+
+
+def publish_stage(packet):
+    # a freed slot's next occupant is someone else: start their filter from scratch
+    for key in packet["released"]:
+        pose_filters.pop(key, None)
+    for camera, frame, people in zip(packet["cameras"], packet["frames"], packet["people"]):
+        room = source_rooms[camera]
+        for player, points, conf, depths in people:
+            if (room, player) not in pose_filters:
+                pose_filters[room, player] = PoseFilter(JOINTS, FILTER_MIN_CUTOFF, FILTER_BETA, FILTER_D_CUTOFF)
+            joints = pose_filters[room, player].update(packet["capture_time"], {
+                name: (float(p[0]), float(p[1]), int(d), float(c))
+                for name, p, c, d in zip(JOINTS, points, conf, depths)
+            })
+            with span("publish"):
+                senders[room].send(joints, timestamp=packet["capture_time"], player=player)
+            if not startup.reported:
+                startup.mark("first packet")
+                startup.report()
+
+            if not args.no_display:
+                for p in points:
+                    cv2.circle(frame, (int(p[0]), int(p[1])), 8, (0, 0, 255), -1)
+                x, y = points[0]
+                cv2.putText(frame, f"P{player}", (int(x) + 10, int(y) + 20),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+    observe_age("published", packet["capture_time"])
+    return packet
+
+
+pipeline = (
+    Pipeline(queue_size=QUEUE_SIZE)
+    .add_source("capture", capture_stage)
+    .add_stage("pose", pose_stage)
+    .add_stage("depth", depth_stage)
+    .add_stage("publish", publish_stage)
+)
+display = pipeline.output()
+
+print(f"🎥 Multi-camera CV server starting - {len(caps)} sources, rooms: {', '.join(senders)}")
+# one batched dummy pass per model so the first real step is not the slow one
+blank = [np.zeros((480, 640, 3), dtype=np.uint8)] * len(caps)
+model(blank, verbose=False)
+estimate_depth_batch(blank)
+startup.mark("warmup")
+if args.metrics_port:
+    start_http_server(args.metrics_port)
+pipeline.start()
+last_stats = time.time()
+
+while pipeline.running:
+    packet = display.get(timeout=0.1)
+    if packet is not None and not args.no_display:
+        for camera, frame in zip(packet["cameras"], packet["frames"]):
+            cv2.imshow(f'Camera {args.sources[camera]}', frame)
+
+    if time.time() - last_stats >= STATS_INTERVAL:
+        print(f"⏱️  {pipeline.format_stats()}")
+        last_stats = time.time()
+
+    if not args.no_display and cv2.waitKey(1) & 0xFF == ord('q'):
+        break
+
+pipeline.stop()
+for sender in senders.values():
+    sender.close()
+for cap in caps:
+    cap.release()
+cv2.destroyAllWindows()
+
+if pipeline.errors():
+    sys.exit(1)
@@ -0,0 +1,96 @@
+import numpy as np
+
+MAX_PLAYERS_PER_CAMERA = 4
+
+
+def person_centers(keypoints, boxes=None):
+    """
+    Hip midpoint of each detected person, (P, 17, 2) -> (P, 2).
+    YOLO reports missing keypoints as (0, 0); those people fall back to
+    their box centre when boxes (P, 4 xywh) are given.
+    """
+    keypoints = np.asarray(keypoints, dtype=np.float32).reshape(-1, 17, 2)
+    hips = keypoints[:, 11:13]
+    centers = hips.mean(axis=1)
+    if boxes is not None:
+        missing = (hips == 0).all(axis=2).any(axis=1)
+        centers[missing] = np.asarray(boxes, dtype=np.float32)[missing, :2]
+    return centers
+
+
+def assign_rooms(specs, count, default):
+    """
+    Room of each of count sources from --room values: "ROOM" is the room of
+    every source not named otherwise, "INDEX=ROOM" the room of source INDEX.
+    Returns (room per source, camera index within its room per source).
+    """
+    named = {}
+    for spec in specs:
+        index, sep, room = spec.rpartition("=")
+        if not sep:
+            default = room
+            continue
+        if not index.isdigit() or int(index) >= count:
+            raise ValueError(f"--room {spec!r}: no source {index!r} (sources are 0-{count - 1})")
+        named[int(index)] = room
+    rooms = [named.get(i, default) for i in range(count)]
+    return rooms, [rooms[:i].count(room) for i, room in enumerate(rooms)]
+
+
+class PlayerTracker:
+    """
+    Stable player ids for one camera.
+
+    Each frame's detections are matched greedily to the closest existing
+    track (within max_distance pixels). Unmatched detections take the lowest
+    free slot; tracks unseen for max_age frames free theirs. Player ids are
+    camera * MAX_PLAYERS_PER_CAMERA + slot, so they fit the 1-byte player
+    field of the pose packet and never collide across cameras. camera is the
+    index among the cameras of one room (see assign_rooms), so every room's
+    first camera has player 0, the one the game server judges.
+    """
+
+    def __init__(self, camera, max_distance=150.0, max_age=15):
+        self.camera = camera
+        self.max_distance = max_distance
+        self.max_age = max_age
+        self.tracks = {}  # slot -> [center, frames since seen]
+        self.released = []  # player ids freed by the last update()
+
+    def update(self, centers):
+        """centers: (P, 2). Returns a player id (or None if no slot is free) per detection"""
+        centers = np.asarray(centers, dtype=np.float32).reshape(-1, 2)
+        assigned = [None] * len(centers)
+
+        if self.tracks and len(centers):
+            slots = list(self.tracks)
+            previous = np.array([self.tracks[s][0] for s in slots])
+            dist = np.linalg.norm(centers[:, None, :] - previous[None, :, :], axis=2)
+            # closest pairs first
+            for flat in np.argsort(dist, axis=None):
+                i, j = np.unravel_index(flat, dist.shape)
+                if dist[i, j] > self.max_distance:
+                    break
+                if assigned[i] is not None or slots[j] in assigned:
+                    continue
+                assigned[i] = slots[j]
+
+        for slot in self.tracks:
+            self.tracks[slot][1] += 1
+        for i, slot in enumerate(assigned):
+            if slot is None:
+                free = [s for s in range(MAX_PLAYERS_PER_CAMERA) if s not in self.tracks]
+                if not free:
+                    continue
+                slot = assigned[i] = free[0]
+            self.tracks[slot] = [centers[i], 0]
+
+        self.released = [s for s, (_, age) in self.tracks.items() if age > self.max_age]
+        for slot in self.released:
+            del self.tracks[slot]
+        self.released = [self.camera * MAX_PLAYERS_PER_CAMERA + slot for slot in self.released]
+
+        return [
+            None if slot is None else self.camera * MAX_PLAYERS_PER_CAMERA + slot
+            for slot in assigned
+        ]
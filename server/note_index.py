@@ -0,0 +1,84 @@
+from bisect import bisect_left, bisect_right
+
+
+class LaneIndex:
+    """
+    Notes split by lane into sorted time arrays, with a per-lane cursor.
+
+    The cursor marks the first note not yet judged; everything before it is
+    hit or expired. Only expire() moves it past unhit notes, so each one is
+    reported as a miss exactly once. judge() bisects from the cursor to the
+    hit window and visible() bisects the lane arrays for the on-screen time
+    range; neither grows with chart length.
+    """
+
+    def __init__(self, notes, lanes):
+        self.lanes = lanes
+        self.times = [[] for _ in range(lanes)]
+        self.ids = [[] for _ in range(lanes)]
+        for i, note in sorted(enumerate(notes), key=lambda item: item[1]['time']):
+            self.times[note['lane']].append(note['time'])
+            self.ids[note['lane']].append(i)
+        self.hit = [[False] * len(t) for t in self.times]
+        self.cursor = [0] * lanes
+
+    def __len__(self):
+        return sum(len(t) for t in self.times)
+
+    def advance(self, lane):
+        """Move the lane's cursor past notes that are already hit"""
+        times, hit = self.times[lane], self.hit[lane]
+        c = self.cursor[lane]
+        while c < len(times) and hit[c]:
+            c += 1
+        self.cursor[lane] = c
+        return c
+
+    def expire(self, oldest):
+        """Advance every lane past notes older than `oldest`; returns (lane, note_id) of the unhit ones"""
+        missed = []
+        for lane in range(self.lanes):
+            times, hit = self.times[lane], self.hit[lane]
+            c = self.cursor[lane]
+            while c < len(times) and (hit[c] or times[c] < oldest):
+                if not hit[c]:
+                    hit[c] = True
+                    missed.append((lane, self.ids[lane][c]))
+                c += 1
+            self.cursor[lane] = c
+        return missed
+
+    def judge(self, lane, current_time, window):
+        """
+        Mark the closest unhit note within `window` of current_time as hit.
+        Returns (note_id, abs_delta), or None if nothing is in range.
+        """
+        times, hit = self.times[lane], self.hit[lane]
+        # unhit notes older than the window stay behind the cursor for expire()
+        start = bisect_left(times, current_time - window, lo=self.advance(lane))
+        end = bisect_right(times, current_time + window, lo=start)
+
+        best = None
+        best_delta = None
+        for j in range(start, end):
+            if hit[j]:
+                continue
+            delta = abs(current_time - times[j])
+            if best is None or delta < best_delta:
+                best, best_delta = j, delta
+            else:
+                break  # sorted, deltas only grow from here
+        if best is None:
+            return None
+        hit[best] = True
+        return self.ids[lane][best], best_delta
+
+    def visible(self, t_start, t_end):
+        """Yield (lane, time) for unhit notes with t_start <= time <= t_end"""
+        for lane in range(self.lanes):
+            times, hit = self.times[lane], self.hit[lane]
+            lo = bisect_left(times, t_start)
+            hi = bisect_right(times, t_end, lo=lo)
+            for j in range(lo, hi):
+                if not hit[j]:
+                    yield lane, times[j]
@@ -0,0 +1,181 @@
+import time
+from collections import deque
+
+import pygame
+
+_fonts = {}
+
+
+def get_font(name=None, size=36):
+    """SysFont lookups are slow (they scan the system font list); load each one once"""
+    key = (name, size)
+    if key not in _fonts:
+        _fonts[key] = pygame.font.SysFont(name, size)
+    return _fonts[key]
+
+
+class GlyphCache:
+    """
+    Text assembled from per-character surfaces rendered once each.
+
+    A score string only ever uses a handful of characters, so after the
+    first frames render() is a few blits instead of a font raster per frame.
+    """
+
+    def __init__(self, font, color=(255, 255, 255)):
+        self.font = font
+        self.color = color
+        self.glyphs = {}
+
+    def glyph(self, char):
+        surface = self.glyphs.get(char)
+        if surface is None:
+            surface = self.glyphs[char] = self.font.render(char, True, self.color)
+        return surface
+
+    def render(self, text):
+        glyphs = [self.glyph(char) for char in text]
+        width = sum(g.get_width() for g in glyphs)
+        surface = pygame.Surface((max(width, 1), self.font.get_height()), pygame.SRCALPHA)
+        x = 0
+        for g in glyphs:
+            surface.blit(g, (x, 0))
+            x += g.get_width()
+        return surface
+
+
+def _percentile(ordered, q):
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+class NoteRenderer:
+    """
+    Draws the note highway with dirty-rect updates.
+
+    The background (fill and hit line) and the note sprite are rendered once;
+    a frame restores the background under last frame's notes, blits the
+    visible notes in one Surface.blits() call and pushes only the changed
+    rectangles to the display. The HUD text is re-rendered when it changes
+    and re-blitted only when it changed or a note crossed it.
+    """
+
+    def __init__(self, screen, lanes, hit_y, note_speed, note_radius=20, note_color=(255, 200, 0),
+                 background=(30, 30, 30), line_color=(255, 255, 255), font_size=36, hud_pos=(10, 10),
+                 history=600):
+        self.screen = screen
+        self.hit_y = hit_y
+        self.note_speed = note_speed
+        self.radius = note_radius
+        width, height = screen.get_size()
+        lane_width = width / lanes
+        self.lane_x = [int(lane * lane_width + lane_width / 2) for lane in range(lanes)]
+        # notes whose y falls on screen: HIT_Y - NOTE_SPEED * (t - now) in [-r, height + r]
+        self.behind = (height - hit_y + note_radius) / note_speed
+        self.ahead = (hit_y + note_radius) / note_speed
+
+        self.background = pygame.Surface((width, height)).convert()
+        self.background.fill(background)
+        pygame.draw.line(self.background, line_color, (0, hit_y), (width, hit_y), 2)
+
+        self.sprite = pygame.Surface((2 * note_radius, 2 * note_radius), pygame.SRCALPHA).convert_alpha()
+        pygame.draw.circle(self.sprite, note_color, (note_radius, note_radius), note_radius)
+
+        self.text = GlyphCache(get_font(None, font_size))
+        self.hud_pos = hud_pos
+        self.hud_text = None
+        self.hud = None
+        self.hud_rect = pygame.Rect(hud_pos, (0, 0))
+        self.hud_changed = False
+
+        self.note_rects = []
+        self.full_redraw = True
+        self.render_times = deque(maxlen=history)
+        self.frame_times = deque(maxlen=history)
+        self.frames = 0
+
+    def set_hud(self, text):
+        if text != self.hud_text:
+            self.hud_text = text
+            self.hud = self.text.render(text)
+            self.hud_changed = True
+
+    def invalidate(self):
+        """Repaint the whole window next frame (after a resize or expose)"""
+        self.full_redraw = True
+
+    def draw(self, current_time, note_index):
+        t0 = time.perf_counter()
+        screen = self.screen
+
+        if self.full_redraw:
+            screen.blit(self.background, (0, 0))
+            dirty = []
+        else:
+            for rect in self.note_rects:
+                screen.blit(self.background, rect, rect)
+            dirty = self.note_rects
+
+        r, y0, speed, lane_x = self.radius, self.hit_y, self.note_speed, self.lane_x
+        notes = [
+            (self.sprite, (lane_x[lane] - r, int(y0 - speed * (note_time - current_time)) - r))
+            for lane, note_time in note_index.visible(current_time - self.behind, current_time + self.ahead)
+        ]
+        rects = screen.blits(notes)
+
+        if self.hud is not None:
+            touched = self.hud_rect.collidelist(dirty) != -1 or self.hud_rect.collidelist(rects) != -1
+            if self.hud_changed or touched or self.full_redraw:
+                old = self.hud_rect
+                self.hud_rect = self.hud.get_rect(topleft=self.hud_pos)
+                area = old.union(self.hud_rect)
+                screen.blit(self.background, area, area)
+                screen.blit(self.hud, self.hud_rect)
+                # notes under the old HUD area were just painted over
+                for surface, pos in notes:
+                    if area.colliderect(pygame.Rect(pos, surface.get_size())):
+                        screen.blit(surface, pos)
+                rects.append(area)
+                self.hud_changed = False
+
+        if self.full_redraw:
+            pygame.display.flip()
+            self.full_redraw = False
+        else:
+            pygame.display.update(dirty + rects)
+        self.note_rects = rects[:len(notes)]
+
+        t1 = time.perf_counter()
+        if self.frames:
+            self.frame_times.append(t1 - self.last_frame)
+        self.last_frame = t1
+        self.render_times.append(t1 - t0)
+        self.frames += 1
+        return t1 - t0
+
+    def stats(self):
+        """Frame rate and render cost over the last `history` frames"""
+        if not self.render_times:
+            return {"frames": 0}
+        render = sorted(self.render_times)
+        result = {
+            "frames": self.frames,
+            "render_ms": {
+                "mean": 1000 * sum(render) / len(render),
+                "p50": 1000 * _percentile(render, 50),
+                "p95": 1000 * _percentile(render, 95),
+                "p99": 1000 * _percentile(render, 99),
+                "max": 1000 * render[-1],
+            },
+        }
+        if self.frame_times:
+            intervals = sorted(self.frame_times)
+            result["fps"] = len(intervals) / sum(intervals)
+            result["frame_ms_p99"] = 1000 * _percentile(intervals, 99)
+        return result
+
+    def report(self):
+        s = self.stats()
+        if s["frames"]:
+            r = s["render_ms"]
+            print(f"🖼️  {s.get('fps', 0):.1f} fps over {s['frames']} frames, render "
+                  f"p50 {r['p50']:.2f} ms  p95 {r['p95']:.2f} ms  p99 {r['p99']:.2f} ms  max {r['max']:.2f} ms")
@@ -0,0 +1,152 @@
+"""
+Export YOLOv8n-pose and MiDaS_small to ONNX (plus int8 variants), check that
+they agree with the PyTorch models and report the CPU speedup.
+
+For every frame of the source, each backend's output is compared with
+torch:
+  pose   mean / max keypoint distance in px over confident joints
+  depth  mean / max absolute difference of the min-max normalized maps, in
+         0-255 units (MiDaS output is relative, so only the shape matters)
+
+Exits non-zero when a backend is outside --pose-tol / --depth-tol (int8 is
+allowed --int8-slack times more), or when fewer than --min-joints joints
+could be compared at all (a backend that finds nobody is not "in tolerance").
+Use a source with a person in it to check pose: on the synthetic source
+(the default) YOLO finds nobody, so --min-joints defaults to 0 there and
+only depth is really checked.
+
+The ONNX pose graphs have a fixed input size (inference.YOLO_IMGSZ) and ignore
+imgsz, so the ROI crop size main_cv_server.py asks for (ROI_POSE_SIZE) is only
+honoured by torch; ONNX crops are letterboxed up to the export size.
+
+Usage: python onnx_export.py [--source synthetic] [--frames 50] [--force] [--no-int8]
+"""
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+import inference
+from frame_source import open_source
+
+
+def normalized(depth):
+    return cv2.normalize(depth.astype(np.float32), None, 0, 255, cv2.NORM_MINMAX)
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    result = fn(*args)
+    return result, 1000 * (time.perf_counter() - t0)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--source", default="synthetic")
+    parser.add_argument("--frames", type=int, default=50)
+    parser.add_argument("--model-dir", default=inference.MODEL_DIR)
+    parser.add_argument("--threads", type=int, default=inference.default_threads())
+    parser.add_argument("--force", action="store_true", help="re-export even if the files exist")
+    parser.add_argument("--no-int8", action="store_true")
+    parser.add_argument("--pose-tol", type=float, default=2.0, help="mean keypoint error in px")
+    parser.add_argument("--depth-tol", type=float, default=2.0, help="mean depth error in 0-255 units")
+    parser.add_argument("--int8-slack", type=float, default=4.0)
+    parser.add_argument("--min-joints", type=int,
+                        help="fewest confident joints a backend must have matched with torch "
+                             "(default 20, 0 for the synthetic source)")
+    args = parser.parse_args()
+    if args.min_joints is None:
+        args.min_joints = 0 if args.source.startswith("synthetic") else 20
+
+    paths = inference.onnx_paths(args.model_dir)
+    if args.force:
+        for path in paths.values():
+            if os.path.exists(path):
+                os.remove(path)
+
+    backends = ["onnx"] if args.no_int8 else ["onnx", "onnx-int8"]
+    t0 = time.perf_counter()
+    for backend in backends:
+        inference.ensure_exported(backend, args.model_dir)
+    print(f"📦 Exported to {args.model_dir} in {time.perf_counter() - t0:.1f}s")
+    for name, path in paths.items():
+        if os.path.exists(path):
+            print(f"  {name:<11} {os.path.getsize(path) / 2 ** 20:6.1f} MB  {path}")
+
+    models = {"torch": inference.load_backend("torch", args.threads)}
+    for backend in backends:
+        models[backend] = inference.load_backend(backend, args.threads, args.model_dir)
+
+    source = open_source(args.source, loop=True)
+    frames = []
+    for _ in range(args.frames):
+        ok, frame = source.read()
+        if not ok:
+            break
+        frames.append(frame)
+    source.release()
+    if not frames:
+        print(f"⚠️  No frames from {args.source}")
+        return 1
+
+    # warm up every session once so lazy allocation is not timed
+    for pose, depth in models.values():
+        pose(frames[0])
+        depth(frames[0])
+
+    times = {name: {"pose": [], "depth": []} for name in models}
+    errors = {name: {"pose": [], "depth": [], "missed": 0} for name in backends}
+    for frame in frames:
+        reference = {}
+        for name, (pose, depth) in models.items():
+            (keypoints, conf), pose_ms = timed(pose, frame)
+            depth_map, depth_ms = timed(depth, frame)
+            times[name]["pose"].append(pose_ms)
+            times[name]["depth"].append(depth_ms)
+            if name == "torch":
+                reference = {"keypoints": keypoints, "conf": conf, "depth": normalized(depth_map)}
+                continue
+            if keypoints is None and reference["keypoints"] is not None:
+                errors[name]["missed"] += 1
+            if keypoints is not None and reference["keypoints"] is not None:
+                confident = (reference["conf"] > 0.5) & (conf > 0.5)
+                if confident.any():
+                    dist = np.linalg.norm(keypoints - reference["keypoints"], axis=1)[confident]
+                    errors[name]["pose"].extend(dist.tolist())
+            ours = normalized(depth_map)
+            if ours.shape != reference["depth"].shape:
+                ours = cv2.resize(ours, reference["depth"].shape[::-1])
+            errors[name]["depth"].append(np.abs(ours - reference["depth"]).mean())
+
+    print(f"\n⏱️  {len(frames)} frames from {args.source}, {args.threads} threads per model")
+    base = {kind: np.median(times["torch"][kind]) for kind in ("pose", "depth")}
+    for name in models:
+        cells = []
+        for kind in ("pose", "depth"):
+            ms = np.median(times[name][kind])
+            cells.append(f"{kind} {ms:7.2f} ms ({base[kind] / ms:4.2f}x)")
+        print(f"  {name:<10} " + "  ".join(cells))
+
+    print("\n🔍 Agreement with torch")
+    failed = False
+    for name in backends:
+        slack = args.int8_slack if name.endswith("int8") else 1.0
+        pose_err, depth_err = errors[name]["pose"], errors[name]["depth"]
+        pose_mean = float(np.mean(pose_err)) if pose_err else float("nan")
+        depth_mean = float(np.mean(depth_err))
+        enough = len(pose_err) >= args.min_joints
+        pose_ok = not pose_err or pose_mean <= args.pose_tol * slack
+        ok = enough and pose_ok and depth_mean <= args.depth_tol * slack
+        failed |= not ok
+        verdict = "✅" if ok else "❌ outside tolerance" if enough else f"❌ fewer than {args.min_joints} joints compared"
+        print(f"  {name:<10} pose {pose_mean:6.2f} px (max {max(pose_err, default=float('nan')):6.2f}, "
+              f"{len(pose_err)} joints, missed {errors[name]['missed']} frames)  "
+              f"depth {depth_mean:6.2f} (max {max(depth_err):6.2f})  {verdict}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,227 @@
+import io
+import zipfile
+
+import numpy as np
+
+LANES = 4
+
+# Hit object type bits
+CIRCLE = 1
+SLIDER = 2
+SPINNER = 8
+HOLD = 128  # osu!mania long note
+OBJECT_TYPES = CIRCLE | SLIDER | SPINNER | HOLD
+
+CHART_DTYPE = np.dtype([
+    ('time', np.float64),      # ms
+    ('lane', np.int8),
+    ('type', np.uint8),        # one of CIRCLE/SLIDER/SPINNER/HOLD
+    ('end_time', np.float64),  # ms, equal to time for taps
+])
+
+TIMING_DTYPE = np.dtype([
+    ('time', np.float64),
+    ('beat_length', np.float64),
+    ('meter', np.int32),
+    ('uninherited', np.bool_),
+])
+
+
+def iter_osz_lines(osz_path):
+    """Stream the lines of the first .osu in an .osz without reading it into one string"""
+    with zipfile.ZipFile(osz_path, 'r') as z:
+        name = next((f for f in z.namelist() if f.endswith('.osu')), None)
+        if name is None:
+            raise ValueError(f"no .osu file in {osz_path}")
+        with z.open(name) as raw:
+            for line in io.TextIOWrapper(raw, encoding='utf-8-sig'):
+                yield line
+
+
+class OsuFile:
+    """
+    Sections of an .osu file, split while streaming.
+
+    Each section keeps its raw lines; parsing happens on first access of
+    hit_objects / timing_points / a key-value section and is cached.
+    """
+
+    def __init__(self, lines):
+        self.sections = {}
+        current = None
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            first = line[0]
+            if first == '[' and line[-1] == ']':
+                current = self.sections.setdefault(line[1:-1], [])
+            elif current is not None and not (first == '/' and line.startswith('//')):
+                current.append(line)
+        self._cache = {}
+
+    @classmethod
+    def from_osz(cls, osz_path):
+        return cls(iter_osz_lines(osz_path))
+
+    @classmethod
+    def from_text(cls, osu_text):
+        return cls(osu_text.splitlines())
+
+    def section(self, name):
+        """Raw lines of a section, [] if missing"""
+        return self.sections.get(name, [])
+
+    def values(self, name):
+        """Key:value section (General, Metadata, Difficulty) as a dict"""
+        key = ('values', name)
+        if key not in self._cache:
+            values = {}
+            for line in self.section(name):
+                if ':' in line:
+                    k, v = line.split(':', 1)
+                    values[k.strip()] = v.strip()
+            self._cache[key] = values
+        return self._cache[key]
+
+    @property
+    def metadata(self):
+        return self.values('Metadata')
+
+    @property
+    def timing_points(self):
+        if 'timing' not in self._cache:
+            self._cache['timing'] = parse_timing_points(self.section('TimingPoints'))
+        return self._cache['timing']
+
+    def hit_objects(self, lanes=LANES):
+        key = ('hit_objects', lanes)
+        if key not in self._cache:
+            multiplier = float(self.values('Difficulty').get('SliderMultiplier', 1.4))
+            self._cache[key] = parse_hit_objects(
+                self.section('HitObjects'), self.timing_points, lanes, multiplier
+            )
+        return self._cache[key]
+
+
+def _split(lines, count, fill):
+    """Split lines into exactly `count` comma-separated fields; the last one keeps the remainder"""
+    rows = []
+    for line in lines:
+        parts = line.split(',', count - 1)
+        if len(parts) < count:
+            parts += [fill] * (count - len(parts))
+        rows.append(parts)
+    return rows
+
+
+def parse_timing_points(lines):
+    """[TimingPoints] -> structured array sorted by time"""
+    points = np.zeros(len(lines), dtype=TIMING_DTYPE)
+    if not lines:
+        return points
+    # time,beatLength,meter,sampleSet,sampleIndex,volume,uninherited,effects
+    cols = np.array([row[:7] for row in _split(lines, 8, fill='1')], dtype=np.float64)
+    points['time'] = cols[:, 0]
+    points['beat_length'] = cols[:, 1]
+    points['meter'] = cols[:, 2].astype(np.int32)
+    points['uninherited'] = cols[:, 6] != 0
+    return points[np.argsort(points['time'], kind='stable')]
+
+
+def _slider_end_times(times, lengths, slides, timing, multiplier):
+    """End time of sliders from their pixel length and the active timing points"""
+    red = timing[timing['uninherited']]
+    green = timing[~timing['uninherited']]
+
+    if len(red):
+        idx = np.clip(np.searchsorted(red['time'], times, side='right') - 1, 0, len(red) - 1)
+        beat_length = red['beat_length'][idx]
+    else:
+        beat_length = np.full(len(times), 500.0)
+
+    sv = np.ones(len(times))
+    if len(green):
+        idx = np.searchsorted(green['time'], times, side='right') - 1
+        active = idx >= 0
+        # inherited beatLength is -100 / slider-velocity-multiplier
+        sv[active] = -100.0 / green['beat_length'][idx[active]]
+
+    return times + lengths / (multiplier * 100 * sv) * beat_length * slides
+
+
+def parse_hit_objects(lines, timing=None, lanes=LANES, slider_multiplier=1.4):
+    """
+    [HitObjects] -> structured array with CHART_DTYPE columns.
+
+    Circles get end_time == time, mania holds and spinners read their end
+    time from the object params, sliders derive it from timing points.
+    """
+    chart = np.zeros(len(lines), dtype=CHART_DTYPE)
+    if not lines:
+        return chart
+
+    # x,y,time,type,hitSound,objectParams...
+    if all(line.count(',') == 5 for line in lines):
+        # every row has exactly six fields (all circles / mania holds):
+        # one flat split and strided column views, no per-row parsing
+        fields = ','.join(lines).split(',')
+        x = np.array(fields[0::6], dtype=np.float64)
+        chart['time'] = np.array(fields[2::6], dtype=np.float64)
+        kind = np.array(fields[3::6], dtype=np.float64).astype(np.int64)
+        params = fields[5::6]
+    else:
+        rows = _split(lines, 6, fill='')
+        head = np.array([row[:4] for row in rows], dtype=np.float64)
+        params = [row[5] for row in rows]
+        x = head[:, 0]
+        chart['time'] = head[:, 2]
+        kind = head[:, 3].astype(np.int64)
+    kind &= OBJECT_TYPES
+    # a well-formed object has exactly one type bit; prefer the long ones
+    kind = np.select(
+        [(kind & HOLD) != 0, (kind & SPINNER) != 0, (kind & SLIDER) != 0],
+        [HOLD, SPINNER, SLIDER],
+        default=CIRCLE,
+    )
+    chart['type'] = kind
+    chart['lane'] = np.clip((x * lanes / 512).astype(np.int64), 0, lanes - 1)
+    chart['end_time'] = chart['time']
+
+    holds = np.flatnonzero(kind == HOLD)
+    if len(holds):
+        # endTime:hitSample
+        chart['end_time'][holds] = [float(params[i].split(':', 1)[0]) for i in holds]
+
+    spinners = np.flatnonzero(kind == SPINNER)
+    if len(spinners):
+        # endTime,hitSample
+        chart['end_time'][spinners] = [float(params[i].split(',', 1)[0]) for i in spinners]
+
+    sliders = np.flatnonzero(kind == SLIDER)
+    if len(sliders):
+        # curve,slides,length,...
+        slider_params = [params[i].split(',', 3) for i in sliders]
+        slides = np.array([float(p[1]) for p in slider_params])
+        lengths = np.array([float(p[2]) for p in slider_params])
+        if timing is None:
+            timing = np.zeros(0, dtype=TIMING_DTYPE)
+        chart['end_time'][sliders] = _slider_end_times(
+            chart['time'][sliders], lengths, slides, timing, slider_multiplier
+        )
+
+    return chart[np.argsort(chart['time'], kind='stable')]
+
+
+def to_notes(chart):
+    """Columnar chart -> list of {time, lane} dicts in seconds (long notes add 'end')"""
+    times = (chart['time'] / 1000).tolist()
+    lanes = chart['lane'].tolist()
+    ends = (chart['end_time'] / 1000).tolist()
+    notes = []
+    for t, lane, end in zip(times, lanes, ends):
+        note = {'time': t, 'lane': lane}
+        if end > t:
+            note['end'] = end
+        notes.append(note)
+    return notes
@@ -4,6 +4,10 @@ import time
 import math
 import sys
 
+from note_index import LaneIndex
+from note_renderer import NoteRenderer
+from osufile import OsuFile, to_notes
+
 # -----------------------------
 # 1. CONFIG
 # -----------------------------
@@ -13,6 +17,9 @@ HIT_Y = 500  # y coordinate for "hit line"
 WINDOW_SIZE = (800, 600)
 KEYS = [pygame.K_d, pygame.K_f, pygame.K_j, pygame.K_k]  # 4-lane keys
 HIT_WINDOW = 0.15  # seconds
+INPUT_HZ = 1000  # fixed step for input polling and judgement
+RENDER_FPS = 60
+STATS_EVERY = 10.0  # seconds between frame-time reports
 
 # -----------------------------
 # 2. HELPER FUNCTIONS
@@ -32,29 +39,8 @@ def extract_osu(osz_path):
     return osu_content, audio_file_path
 
 def parse_osu(osu_text):
-    """Parse hit circles into a list of {time, lane}"""
-    lines = osu_text.splitlines()
-    section = ''
-    notes = []
-
-    for line in lines:
-        line = line.strip()
-        if not line:
-            continue
-        if line.startswith('['):
-            section = line
-            continue
-        if section == '[HitObjects]':
-            parts = line.split(',')
-            x = int(parts[0])
-            time_ms = int(parts[2])
-            type_flag = int(parts[3])
-            is_circle = (type_flag & 1) != 0
-            if not is_circle:
-                continue
-            lane = min(LANES - 1, int(x / 512 * LANES))
-            notes.append({'time': time_ms / 1000, 'lane': lane})
-    return notes
+    """Parse hit objects into a list of {time, lane} (long notes add 'end')"""
+    return to_notes(OsuFile.from_text(osu_text).hit_objects(LANES))
 
 # -----------------------------
 # 3. INITIALIZE PYGAME
@@ -62,13 +48,13 @@ def parse_osu(osu_text):
 pygame.init()
 screen = pygame.display.set_mode(WINDOW_SIZE)
 pygame.display.set_caption("Python Rhythm Prototype")
-clock = pygame.time.Clock()
 
 # -----------------------------
 # 4. LOAD BEATMAP
 # -----------------------------
 osu_file, audio_file = extract_osu(r"C:\\Users\\stringbot\\Downloads\\2466542 TM - Shinseikatsu.osz")
 notes = parse_osu(osu_file)
+note_index = LaneIndex(notes, LANES)
 
 # -----------------------------
 # 5. LOAD AUDIO
@@ -79,36 +65,36 @@ pygame.mixer.music.load("output.ogg")
 # -----------------------------
 # 6. GAME LOOP
 # -----------------------------
-start_time = None
+# Input is polled and judged every 1 / INPUT_HZ seconds; a frame is drawn
+# between steps only when one is due, so a key press is timed to within a
+# step plus one (dirty-rect) render, however slow drawing gets.
+renderer = NoteRenderer(screen, LANES, HIT_Y, NOTE_SPEED)
 running = True
 score = 0
 combo = 0
-hit_notes = set()
 
 pygame.mixer.music.play()
-start_time = time.time()
+start_time = time.perf_counter()
+step = 1 / INPUT_HZ
+frame_time = 1 / RENDER_FPS
+next_step = next_frame = 0.0
+next_report = STATS_EVERY
 
 while running:
-    current_time = time.time() - start_time
+    current_time = time.perf_counter() - start_time
 
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
             running = False
+        elif event.type == pygame.VIDEOEXPOSE:
+            renderer.invalidate()
         elif event.type == pygame.KEYDOWN:
             if event.key in KEYS:
                 lane = KEYS.index(event.key)
-                # find the closest note in this lane that is not hit
-                closest_note = None
-                closest_delta = HIT_WINDOW + 1
-                for i, note in enumerate(notes):
-                    if i in hit_notes or note['lane'] != lane:
-                        continue
-                    delta = current_time - note['time']
-                    if abs(delta) < closest_delta:
-                        closest_delta = abs(delta)
-                        closest_note = i
-                if closest_note is not None and closest_delta <= HIT_WINDOW:
-                    hit_notes.add(closest_note)
+                # closest unhit note in this lane, via bisect on the lane index
+                judged = note_index.judge(lane, current_time, HIT_WINDOW)
+                if judged is not None:
+                    _, closest_delta = judged
                     # judgement
                     if closest_delta <= HIT_WINDOW/3:
                         print("Perfect!")
@@ -129,28 +115,26 @@ while running:
     # -----------------------------
     # 7. DRAW NOTES
     # -----------------------------
-    screen.fill((30, 30, 30))
-
-    lane_width = WINDOW_SIZE[0] / LANES
-    for i, note in enumerate(notes):
-        if i in hit_notes:
-            continue
-        # vertical position: notes scroll down towards HIT_Y
-        y = HIT_Y - NOTE_SPEED * (note['time'] - current_time)
-        x = note['lane'] * lane_width + lane_width / 2
-        if 0 <= y <= WINDOW_SIZE[1]:
-            pygame.draw.circle(screen, (255, 200, 0), (int(x), int(y)), 20)
-
-    # Draw hit line
-    pygame.draw.line(screen, (255,255,255), (0,HIT_Y), (WINDOW_SIZE[0],HIT_Y), 2)
-
-    # Draw score and combo
-    font = pygame.font.SysFont(None, 36)
-    score_text = font.render(f"Score: {score}  Combo: {combo}", True, (255,255,255))
-    screen.blit(score_text, (10,10))
-
-    pygame.display.flip()
-    clock.tick(60)
-
+    if current_time >= next_frame:
+        # only re-rendered when the text changes
+        renderer.set_hud(f"Score: {score}  Combo: {combo}")
+        renderer.draw(current_time, note_index)
+        next_frame += frame_time
+        if next_frame <= current_time:
+            # drawing fell behind: skip the missed frames rather than render every step
+            next_frame = current_time + frame_time
+
+    if current_time >= next_report:
+        renderer.report()
+        next_report += STATS_EVERY
+
+    next_step += step
+    delay = next_step - (time.perf_counter() - start_time)
+    if delay > 0:
+        time.sleep(delay)
+    else:
+        next_step = time.perf_counter() - start_time
+
+renderer.report()
 pygame.quit()
 sys.exit()
@@ -0,0 +1,156 @@
+import threading
+import time
+import traceback
+from collections import deque
+
+
+class DropOldestQueue:
+    """Bounded queue that discards the oldest item instead of blocking the producer"""
+
+    def __init__(self, maxsize=2):
+        self.maxsize = maxsize
+        self.items = deque()
+        self.dropped = 0
+        self.cond = threading.Condition()
+
+    def put(self, item):
+        with self.cond:
+            if len(self.items) >= self.maxsize:
+                self.items.popleft()
+                self.dropped += 1
+            self.items.append(item)
+            self.cond.notify()
+
+    def get(self, timeout=None):
+        """Return the next item, or None if nothing arrived within timeout"""
+        with self.cond:
+            if not self.items:
+                self.cond.wait(timeout)
+            if not self.items:
+                return None
+            return self.items.popleft()
+
+    def __len__(self):
+        return len(self.items)
+
+
+class Stage:
+    """
+    One worker thread: pulls from inbox, runs fn, pushes the result to outbox.
+
+    An exception from fn is logged with the stage name, kept in `error`, and
+    stops the whole pipeline rather than silently killing this one thread.
+    """
+
+    def __init__(self, name, fn, inbox=None, outbox=None):
+        self.name = name
+        self.fn = fn
+        self.inbox = inbox
+        self.outbox = outbox
+        self.processed = 0
+        self.busy_time = 0.0
+        self.started_at = None
+        self.thread = None
+        self.error = None
+
+    def run(self, stop_event):
+        self.started_at = time.perf_counter()
+        while not stop_event.is_set():
+            if self.inbox is None:
+                item = None
+            else:
+                item = self.inbox.get(timeout=0.1)
+                if item is None:
+                    continue
+
+            t0 = time.perf_counter()
+            try:
+                result = self.fn() if self.inbox is None else self.fn(item)
+            except Exception as e:
+                self.error = e
+                print(f"❌ Stage {self.name} failed: {e!r}")
+                traceback.print_exc()
+                stop_event.set()
+                break
+            self.busy_time += time.perf_counter() - t0
+
+            if result is StopIteration:
+                stop_event.set()
+                break
+            if result is None:
+                continue
+            self.processed += 1
+            if self.outbox is not None:
+                self.outbox.put(result)
+
+    def stats(self):
+        elapsed = time.perf_counter() - self.started_at if self.started_at else 0
+        return {
+            "fps": self.processed / elapsed if elapsed > 0 else 0.0,
+            "avg_ms": 1000 * self.busy_time / self.processed if self.processed else 0.0,
+            "queue": len(self.inbox) if self.inbox is not None else 0,
+            "dropped": self.inbox.dropped if self.inbox is not None else 0,
+        }
+
+
+class Pipeline:
+    """
+    Chain of stages, each on its own thread, linked by drop-oldest queues.
+
+    The first stage is a source: fn() takes no arguments and returns an item,
+    None to skip, or StopIteration to shut the pipeline down. Every later stage
+    is fn(item) -> item (or None to drop the item). Throughput is bounded by the
+    slowest stage instead of the sum of all of them. A stage that raises stops
+    the pipeline; `running` goes False and `errors()` names the stage.
+    """
+
+    def __init__(self, queue_size=2):
+        self.queue_size = queue_size
+        self.stages = []
+        self.stop_event = threading.Event()
+
+    def add_source(self, name, fn):
+        self.stages.append(Stage(name, fn))
+        return self
+
+    def add_stage(self, name, fn):
+        queue = DropOldestQueue(self.queue_size)
+        self.stages[-1].outbox = queue
+        self.stages.append(Stage(name, fn, inbox=queue))
+        return self
+
+    def output(self):
+        """Queue fed by the last stage, for a consumer on the calling thread"""
+        if self.stages[-1].outbox is None:
+            self.stages[-1].outbox = DropOldestQueue(self.queue_size)
+        return self.stages[-1].outbox
+
+    def start(self):
+        for stage in self.stages:
+            stage.thread = threading.Thread(
+                target=stage.run, args=(self.stop_event,), name=stage.name, daemon=True
+            )
+            stage.thread.start()
+        return self
+
+    def stop(self, timeout=1.0):
+        self.stop_event.set()
+        for stage in self.stages:
+            if stage.thread is not None:
+                stage.thread.join(timeout)
+
+    @property
+    def running(self):
+        return not self.stop_event.is_set()
+
+    def errors(self):
+        return {stage.name: stage.error for stage in self.stages if stage.error is not None}
+
+    def stats(self):
+        return {stage.name: stage.stats() for stage in self.stages}
+
+    def format_stats(self):
+        return " | ".join(
+            f"{name}: {s['fps']:.1f}fps {s['avg_ms']:.1f}ms q={s['queue']} drop={s['dropped']}"
+            for name, s in self.stats().items()
+        )
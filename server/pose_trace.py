@@ -0,0 +1,58 @@
+import json
+import threading
+
+
+class PoseRecorder:
+    """
+    Appends pose payloads (the JSON body of POST /api/cv/pose, with
+    "timestamp" and "player") to a JSON-lines file for later replay.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "w", encoding="utf-8")
+        self.lock = threading.Lock()
+        self.written = 0
+
+    def write(self, pose):
+        line = json.dumps(pose, separators=(",", ":"))
+        with self.lock:
+            self.file.write(line + "\n")
+            self.written += 1
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+
+def joints_to_pose(joints, timestamp, player=0):
+    """{name: (x, y, depth, conf[, vx, vy, vdepth])} -> pose payload dict"""
+    pose = {}
+    for name, values in joints.items():
+        joint = {"x": values[0], "y": values[1], "depth": values[2], "conf": values[3]}
+        if len(values) > 4:
+            joint.update(vx=values[4], vy=values[5], vdepth=values[6])
+        pose[name] = joint
+    pose["timestamp"] = timestamp
+    pose["player"] = player
+    return pose
+
+
+def pose_to_joints(pose, names):
+    """Inverse of joints_to_pose for the names given (the order the transport packs them in)"""
+    joints = {}
+    for name in names:
+        j = pose[name]
+        values = (j["x"], j["y"], j["depth"], j.get("conf", 1.0))
+        if "vx" in j:
+            values += (j["vx"], j["vy"], j["vdepth"])
+        joints[name] = values
+    return joints
+
+
+def read_trace(path):
+    """Pose payloads of a recorded trace, sorted by timestamp"""
+    with open(path, encoding="utf-8") as f:
+        poses = [json.loads(line) for line in f if line.strip()]
+    poses.sort(key=lambda p: p["timestamp"])
+    return poses
@@ -0,0 +1,111 @@
+import threading
+import time
+
+import cv2
+import numpy as np
+
+LABELS = {"left_ankle": "LA", "right_ankle": "RA", "left_knee": "LK", "right_knee": "RK"}
+
+
+class Preview:
+    """
+    Debug view kept off the inference loop.
+
+    submit() only stores references to the newest frame, its overlay callback
+    and depth map (nothing is copied or drawn). A render thread wakes at most
+    `fps` times a second, draws the overlay on a private copy and normalizes
+    the depth map for display. show() is called from the main thread, where
+    cv2 windows have to live, and displays whatever was rendered last.
+
+    With enabled=False every call is a no-op, so production runs pay nothing.
+    Callers must not modify a frame after submitting it.
+    """
+
+    def __init__(self, enabled=True, fps=15.0, title="Preview", depth_title="Depth"):
+        self.enabled = enabled
+        self.interval = 1.0 / fps
+        self.title = title
+        self.depth_title = depth_title
+        self.lock = threading.Lock()
+        self.submitted = None  # (frame, draw, depth)
+        self.rendered = None  # (image, depth image)
+        self.shown = None
+        self.rendered_frames = 0
+        self.skipped = 0
+        self.running = enabled
+        self.thread = None
+        if enabled:
+            self.thread = threading.Thread(target=self._run, name="preview", daemon=True)
+            self.thread.start()
+
+    def submit(self, frame, draw=None, depth=None):
+        if not self.enabled:
+            return
+        with self.lock:
+            if self.submitted is not None:
+                self.skipped += 1
+            self.submitted = (frame, draw, depth)
+
+    def _run(self):
+        while self.running:
+            t0 = time.perf_counter()
+            with self.lock:
+                submitted, self.submitted = self.submitted, None
+            if submitted is not None:
+                frame, draw, depth = submitted
+                image = frame.copy()
+                if draw is not None:
+                    draw(image)
+                if depth is not None and depth.dtype != np.uint8:
+                    depth = cv2.normalize(depth, None, 0, 255, cv2.NORM_MINMAX).astype(np.uint8)
+                self.rendered = (image, depth)
+                self.rendered_frames += 1
+            time.sleep(max(0.0, self.interval - (time.perf_counter() - t0)))
+
+    def show(self, wait_ms=1):
+        """Display the latest render; returns the pressed key (or -1). Main thread only."""
+        if not self.enabled:
+            time.sleep(wait_ms / 1000)
+            return -1
+        rendered = self.rendered
+        if rendered is not None and rendered is not self.shown:
+            image, depth = rendered
+            cv2.imshow(self.title, image)
+            if depth is not None:
+                cv2.imshow(self.depth_title, depth)
+            self.shown = rendered
+        return cv2.waitKey(wait_ms) & 0xFF
+
+    def close(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(1.0)
+        if self.enabled:
+            cv2.destroyAllWindows()
+
+
+def draw_joints(image, joints, labels=LABELS):
+    """Dots and depth labels for {name: (x, y, depth, ...)}; ankles red, knees green"""
+    for name, (x, y, d, *_) in joints.items():
+        x, y = int(x), int(y)
+        color = (0, 0, 255) if "ankle" in name else (0, 255, 0)
+        cv2.circle(image, (x, y), 8, color, -1)
+        if 0 <= x < image.shape[1] and 0 <= y < image.shape[0]:
+            cv2.putText(image, f"{labels.get(name, name)}: {int(d)}", (x + 5, y - 5),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 2)
+
+
+def draw_skeleton(image, points, connections, color=(0, 255, 0), point_color=(0, 0, 255), radius=5):
+    """
+    Lines between pixel points for each (i, j) in connections, then the points.
+    points is (N, 2) for one person or (P, N, 2) for several; everything is drawn
+    in two batched polylines calls (a zero-length segment is a filled dot).
+    """
+    points = np.asarray(points, dtype=np.float32)
+    points = points.reshape(-1, *points.shape[-2:]).astype(np.int32)
+    connections = np.asarray([(i, j) for i, j in connections if max(i, j) < points.shape[1]], dtype=np.intp)
+    if len(connections):
+        segments = np.ascontiguousarray(points[:, connections].reshape(-1, 2, 2))
+        cv2.polylines(image, segments, False, color, 2)
+    dots = np.ascontiguousarray(np.repeat(points.reshape(-1, 1, 2), 2, axis=1))
+    cv2.polylines(image, dots, False, point_color, 2 * radius)
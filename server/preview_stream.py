@@ -0,0 +1,112 @@
+"""
+JPEG preview stream for game_server.py, read from a CV server's shared-memory bus.
+
+Nothing is attached or encoded until the first viewer connects: one encoder
+task then reads the newest frame from the bus at `fps`, draws the pose on a
+copy, encodes it once and hands the same bytes to every viewer. When the
+last viewer leaves the task stops and the bus is released again.
+
+Viewers that fall behind just skip frames; they always get the newest one.
+"""
+import asyncio
+import time
+
+import cv2
+
+from preview import draw_joints
+from shm_bus import ShmBus
+from transport import JOINT_NAMES
+
+
+class PreviewStream:
+    def __init__(self, bus_name="ddr", fps=10.0, quality=70, retry=1.0, stale=5.0):
+        self.bus_name = bus_name
+        self.interval = 1.0 / fps
+        self.quality = quality
+        self.retry = retry
+        self.stale = stale
+        self.bus = None
+        self.viewers = 0
+        self.task = None
+        self.jpeg = None
+        self.frame_id = 0
+        self.encoded = 0
+        self.changed = asyncio.Condition()
+
+    def _attach(self):
+        if self.bus is None:
+            try:
+                self.bus = ShmBus(self.bus_name)
+            except (FileNotFoundError, ValueError):
+                return False
+        return True
+
+    def _detach(self):
+        if self.bus is not None:
+            self.bus.close()
+            self.bus = None
+
+    def _encode(self, last_seq):
+        """(seq, jpeg bytes) of the newest bus frame after last_seq, or None"""
+        view = self.bus.frames.latest(newer_than=last_seq)
+        if view is None:
+            return None
+        frame = view.data.copy()
+        if not view.valid():
+            return None  # overwritten while copying; the next tick gets a newer one
+        pose = self.bus.poses.latest()
+        if pose is not None and pose.seq == view.seq:
+            draw_joints(frame, dict(zip(JOINT_NAMES, pose.data["joints"].tolist())))
+        ok, jpeg = cv2.imencode(".jpg", frame, (cv2.IMWRITE_JPEG_QUALITY, self.quality))
+        return (view.seq, jpeg.tobytes()) if ok else None
+
+    async def _run(self):
+        last_seq = -1
+        last_frame = time.perf_counter()
+        try:
+            while self.viewers:
+                t0 = time.perf_counter()
+                if not self._attach():
+                    await asyncio.sleep(self.retry)
+                    continue
+                result = await asyncio.to_thread(self._encode, last_seq)
+                if result is None:
+                    if t0 - last_frame > self.stale:
+                        # a restarted CV server creates new segments; ours stay mapped but silent
+                        self._detach()
+                        last_seq, last_frame = -1, t0
+                else:
+                    last_seq, jpeg = result
+                    last_frame = t0
+                    async with self.changed:
+                        self.jpeg = jpeg
+                        self.frame_id += 1
+                        self.encoded += 1
+                        self.changed.notify_all()
+                await asyncio.sleep(max(0.0, self.interval - (time.perf_counter() - t0)))
+        finally:
+            self._detach()
+            self.jpeg = None
+
+    async def frames(self):
+        """JPEG bytes of each new frame for one viewer; encoding runs while any viewer iterates"""
+        self.viewers += 1
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
+        seen = self.frame_id
+        try:
+            while True:
+                async with self.changed:
+                    await self.changed.wait_for(lambda: self.frame_id != seen)
+                    seen, jpeg = self.frame_id, self.jpeg
+                yield jpeg
+        finally:
+            self.viewers -= 1
+
+    def stats(self):
+        return {
+            "bus": self.bus_name,
+            "attached": self.bus is not None,
+            "viewers": self.viewers,
+            "frames_encoded": self.encoded,
+        }
@@ -0,0 +1,226 @@
+"""
+Room message backbone shared by game_server.py workers.
+
+Everything that changes a room (poses, game start / stop) is published here
+instead of being applied directly, and every worker applies what it receives
+in the order the backbone delivers it. With one worker that is the in-process
+LocalPubSub; with several, SocketPubSub relays messages between them over a
+loopback TCP socket so a pose ingested by one worker reaches the WebSocket
+clients of the same room on all the others.
+
+  backbone.start(handler)       handler(room, message) is an async function
+  backbone.publish(room, msg)   never blocks; returns a future that resolves
+                                once this worker has applied the message
+"""
+import asyncio
+import itertools
+import json
+import os
+import struct
+
+FRAME = struct.Struct("<I")
+DEFAULT_PORT = 8002
+
+
+class LocalPubSub:
+    """Single-process backbone: messages are applied in publish order by one dispatcher task"""
+
+    def __init__(self):
+        self.queue = None
+        self.handler = None
+        self.task = None
+        self.delivered = 0
+
+    async def start(self, handler):
+        self.handler = handler
+        self.queue = asyncio.Queue()
+        self.task = asyncio.create_task(self._dispatch())
+
+    def publish(self, room, message):
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((room, message, future))
+        return future
+
+    async def _dispatch(self):
+        while True:
+            room, message, future = await self.queue.get()
+            await _apply(self.handler, room, message, future)
+            self.delivered += 1
+
+    async def close(self):
+        if self.task is not None:
+            self.task.cancel()
+
+    def stats(self):
+        return {"backbone": "local", "delivered": self.delivered, "queued": self.queue.qsize() if self.queue else 0}
+
+
+async def _apply(handler, room, message, future=None):
+    try:
+        await handler(room, message)
+    except Exception as e:
+        print(f"⚠️  Room {room}: failed to apply {message.get('kind')}: {e!r}")
+        if future is not None and not future.done():
+            future.set_exception(e)
+        return
+    if future is not None and not future.done():
+        future.set_result(None)
+
+
+def _encode(frame):
+    body = json.dumps(frame, separators=(",", ":")).encode()
+    return FRAME.pack(len(body)) + body
+
+
+async def _read_frame(reader):
+    (size,) = FRAME.unpack(await reader.readexactly(FRAME.size))
+    return json.loads(await reader.readexactly(size))
+
+
+class SocketPubSub(LocalPubSub):
+    """
+    Multi-process backbone over a local TCP socket.
+
+    The first worker to bind host:port becomes the hub; the others connect to
+    it. A worker sends what it publishes to the hub, and the hub forwards every
+    message to all workers, the sender included, so each one applies the same
+    stream in the same order. The sender's future resolves when its own
+    message comes back. If the hub goes away the others elect a new one and
+    carry on; messages published while disconnected are applied locally only.
+    Workers whose socket buffer grows past max_buffer are disconnected and
+    reconnect.
+    """
+
+    def __init__(self, host="127.0.0.1", port=DEFAULT_PORT, max_buffer=4 << 20, retry=0.5):
+        super().__init__()
+        self.host = host
+        self.port = port
+        self.max_buffer = max_buffer
+        self.retry = retry
+        self.node = f"{os.getpid()}-{id(self):x}"
+        self.counter = itertools.count()
+        self.waiting = {}  # message number -> (room, message, future) until the hub echoes it back
+        self.server = None
+        self.peers = set()  # hub only: StreamWriters of connected workers
+        self.writer = None  # non-hub: connection to the hub
+        self.link = None
+        self.relayed = 0
+        self.dropped_peers = 0
+
+    async def start(self, handler):
+        await super().start(handler)
+        self.link = asyncio.create_task(self._maintain())
+
+    @property
+    def is_hub(self):
+        return self.server is not None
+
+    async def _maintain(self):
+        # become the hub, or connect to it; repeat whenever the link drops
+        while True:
+            try:
+                self.server = await asyncio.start_server(self._serve_peer, self.host, self.port)
+                print(f"🔗 Room backbone hub on {self.host}:{self.port}")
+                await self.server.serve_forever()
+            except OSError:
+                self.server = None
+            try:
+                reader, self.writer = await asyncio.open_connection(self.host, self.port)
+            except OSError:
+                await asyncio.sleep(self.retry)
+                continue
+            try:
+                while True:
+                    frame = await _read_frame(reader)
+                    self._deliver(frame)
+            except (asyncio.IncompleteReadError, ConnectionError):
+                pass
+            finally:
+                self.writer.close()
+                self.writer = None
+                self._release_waiting()
+            await asyncio.sleep(self.retry)
+
+    async def _serve_peer(self, reader, writer):
+        self.peers.add(writer)
+        try:
+            while True:
+                frame = await _read_frame(reader)
+                self._relay(frame)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.peers.discard(writer)
+            writer.close()
+
+    def _relay(self, frame):
+        """Hub: forward to every worker and apply locally, in one order"""
+        data = _encode(frame)
+        for peer in list(self.peers):
+            if peer.transport.get_write_buffer_size() > self.max_buffer:
+                self.dropped_peers += 1
+                self.peers.discard(peer)
+                peer.close()
+                continue
+            peer.write(data)
+        self.relayed += 1
+        self._deliver(frame)
+
+    def _deliver(self, frame):
+        future = None
+        if frame["node"] == self.node:
+            _, _, future = self.waiting.pop(frame["n"], (None, None, None))
+        self.queue.put_nowait((frame["room"], frame["msg"], future))
+
+    def _release_waiting(self):
+        # the hub is gone and may not have relayed these; at least apply them here
+        for pending in self.waiting.values():
+            self.queue.put_nowait(pending)
+        self.waiting.clear()
+
+    def publish(self, room, message):
+        future = asyncio.get_running_loop().create_future()
+        frame = {"node": self.node, "n": next(self.counter), "room": room, "msg": message}
+        if self.is_hub:
+            self.waiting[frame["n"]] = (room, message, future)
+            self._relay(frame)
+        elif self.writer is not None:
+            self.waiting[frame["n"]] = (room, message, future)
+            self.writer.write(_encode(frame))
+        else:
+            self.queue.put_nowait((room, message, future))
+        return future
+
+    async def close(self):
+        await super().close()
+        if self.link is not None:
+            self.link.cancel()
+        if self.server is not None:
+            self.server.close()
+            for peer in list(self.peers):
+                peer.close()
+            # let the peer handlers see EOF and finish before the loop goes away
+            await asyncio.sleep(0.05)
+        if self.writer is not None:
+            self.writer.close()
+
+    def stats(self):
+        return {
+            "backbone": "socket",
+            "address": f"{self.host}:{self.port}",
+            "hub": self.is_hub,
+            "connected": self.is_hub or self.writer is not None,
+            "peers": len(self.peers),
+            "relayed": self.relayed,
+            "dropped_peers": self.dropped_peers,
+            "delivered": self.delivered,
+            "queued": self.queue.qsize() if self.queue else 0,
+        }
+
+
+def create_backbone(kind="local", host="127.0.0.1", port=DEFAULT_PORT):
+    if kind == "local":
+        return LocalPubSub()
+    if kind == "socket":
+        return SocketPubSub(host, port)
+    raise ValueError(f"unknown room backbone {kind!r}, expected 'local' or 'socket'")
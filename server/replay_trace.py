@@ -0,0 +1,90 @@
+"""
+Replay a recorded pose trace (main_cv_server.py --record) into the game
+server, at the recorded pace or faster, without a camera or any model.
+
+Timestamps are shifted to the replay clock (and compressed by --speed), so
+the server judges them like live poses.
+
+Usage: python replay_trace.py poses.jsonl [--speed 1] [--transport udp|http] [--loop] [--room ID]
+"""
+import argparse
+import time
+
+from pose_trace import pose_to_joints, read_trace
+from transport import DEFAULT_ROOM, JOINT_NAMES, POSE_PORT, PoseSender
+
+
+def replay(poses, send, speed):
+    """Sends every pose at its (scaled) offset from the first one; returns (sent, late)"""
+    t0 = poses[0]["timestamp"]
+    start = time.time()
+    sent = late = 0
+    for pose in poses:
+        due = start + (pose["timestamp"] - t0) / speed if speed > 0 else time.time()
+        wait = due - time.time()
+        if wait > 0:
+            time.sleep(wait)
+        elif wait < -0.005:
+            late += 1
+        send(dict(pose, timestamp=due))
+        sent += 1
+    return sent, late
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("trace", help="JSON-lines pose trace")
+    parser.add_argument("--speed", type=float, default=1.0, help="playback rate, 0 = as fast as possible")
+    parser.add_argument("--transport", choices=("udp", "http"), default="udp")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=POSE_PORT)
+    parser.add_argument("--url", default="http://localhost:8000/api/cv/pose")
+    parser.add_argument("--loop", action="store_true")
+    parser.add_argument("--room", default=DEFAULT_ROOM, help="game server room to replay into")
+    args = parser.parse_args()
+
+    poses = read_trace(args.trace)
+    if not poses:
+        print(f"⚠️  {args.trace} has no poses")
+        return
+
+    if args.transport == "udp":
+        sender = PoseSender(args.host, args.port, room=args.room)
+
+        def send(pose):
+            sender.send(pose_to_joints(pose, JOINT_NAMES), timestamp=pose["timestamp"],
+                        player=pose.get("player", 0))
+    else:
+        # only the http transport needs requests
+        import requests
+        session = requests.Session()
+
+        def send(pose):
+            try:
+                session.post(args.url, params={"room": args.room}, json=pose, timeout=1.0)
+            except Exception as e:
+                print(f"⚠️  Server error: {e}")
+
+    duration = poses[-1]["timestamp"] - poses[0]["timestamp"]
+    print(f"▶️  Replaying {len(poses)} poses ({duration:.1f}s recorded) at "
+          f"{'max speed' if args.speed <= 0 else f'{args.speed}x'} over {args.transport}")
+    try:
+        while True:
+            t0 = time.perf_counter()
+            sent, late = replay(poses, send, args.speed)
+            elapsed = time.perf_counter() - t0
+            print(f"  sent {sent} in {elapsed:.2f}s ({sent / elapsed:,.0f} poses/s), {late} late")
+            if not args.loop:
+                break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if args.transport == "udp":
+            # let the sender thread flush the last pose
+            time.sleep(0.05)
+            sender.close()
+            print(f"  udp sent {sender.sent}, coalesced {sender.coalesced}, errors {sender.errors}")
+
+
+if __name__ == "__main__":
+    main()
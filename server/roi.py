@@ -0,0 +1,86 @@
+import cv2
+import numpy as np
+
+# MiDaS small input normalization (ImageNet mean/std, RGB in [0, 1])
+MIDAS_MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+MIDAS_STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+
+
+class RoiTracker:
+    """
+    Box around the player's legs, carried over from the previous frame.
+
+    update() takes the hip/knee/ankle keypoints (YOLO indices 11-16) and
+    grows their bounding box by `margin` of its size. Once fewer than
+    min_points joints are confidently found for max_lost frames in a row,
+    the box is dropped and callers go back to full-frame inference.
+    """
+
+    def __init__(self, margin=0.25, min_size=96, min_points=3, min_conf=0.3, max_lost=5):
+        self.margin = margin
+        self.min_size = min_size
+        self.min_points = min_points
+        self.min_conf = min_conf
+        self.max_lost = max_lost
+        self.box = None  # x0, y0, x1, y1 in frame pixels
+        self.lost_frames = 0
+
+    def update(self, leg_points, conf, frame_shape):
+        if leg_points is None:
+            self.lost()
+            return
+        points = np.asarray(leg_points, dtype=np.float32).reshape(-1, 2)
+        valid = (points != 0).any(axis=1)
+        if conf is not None:
+            valid &= np.asarray(conf, dtype=np.float32) >= self.min_conf
+        if valid.sum() < self.min_points:
+            self.lost()
+            return
+
+        (x0, y0), (x1, y1) = points[valid].min(axis=0), points[valid].max(axis=0)
+        self.box = self._grow((x0, y0, x1, y1), self.margin, frame_shape)
+        self.lost_frames = 0
+
+    def lost(self):
+        self.lost_frames += 1
+        if self.lost_frames > self.max_lost:
+            self.box = None
+
+    def _grow(self, box, margin, frame_shape):
+        h, w = frame_shape[:2]
+        x0, y0, x1, y1 = box
+        bw = max(x1 - x0, self.min_size)
+        bh = max(y1 - y0, self.min_size)
+        cx, cy = (x0 + x1) / 2, (y0 + y1) / 2
+        half_w = bw * (0.5 + margin)
+        half_h = bh * (0.5 + margin)
+        return (
+            int(max(0, cx - half_w)),
+            int(max(0, cy - half_h)),
+            int(min(w, cx + half_w)),
+            int(min(h, cy + half_h)),
+        )
+
+    def crop(self, frame, extra_margin=0.0, box=None):
+        """(crop view, (x0, y0)) of `box` (default: the current box), or (None, None) without one"""
+        box = self.box if box is None else box
+        if box is None:
+            return None, None
+        if extra_margin:
+            x0, y0, x1, y1 = box
+            box = self._grow((x0, y0, x1, y1), extra_margin, frame.shape)
+        x0, y0, x1, y1 = box
+        if x1 - x0 < 2 or y1 - y0 < 2:
+            return None, None
+        return frame[y0:y1, x0:x1], (x0, y0)
+
+
+def midas_input(crop, size=(128, 160)):
+    """
+    BGR crop -> (1, 3, h, w) float32 MiDaS input at a reduced size (w, h),
+    both multiples of 32. A leg crop needs far fewer pixels than the
+    256-wide full frame the stock transform produces.
+    """
+    img = cv2.cvtColor(cv2.resize(crop, size, interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2RGB)
+    img = (img.astype(np.float32) / 255.0 - MIDAS_MEAN) / MIDAS_STD
+    return np.ascontiguousarray(img.transpose(2, 0, 1)[None])
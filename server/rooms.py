@@ -0,0 +1,78 @@
+import re
+import time
+
+from broadcaster import Broadcaster
+from judgement import JudgementEngine
+from transport import DEFAULT_ROOM, ROOM_BYTES
+
+ROOM_ID = re.compile(rf"[A-Za-z0-9_-]{{1,{ROOM_BYTES}}}")
+
+
+def valid_room(room_id):
+    return room_id is not None and ROOM_ID.fullmatch(room_id) is not None
+
+
+class Room:
+    """
+    One cabinet's game: its pose stream, running chart and connected clients.
+
+    Each worker keeps its own copy of a room, rebuilt from the messages on the
+    room backbone, and its own subscribers (the clients connected to it).
+    """
+
+    def __init__(self, room_id, on_delivered=None):
+        self.id = room_id
+        self.subscribers = Broadcaster(on_delivered=on_delivered)
+        self.engine = JudgementEngine()
+        self.latest_joints = {}
+        self.chart = None
+        self.generation = 0  # bumped by every start / stop, to drop superseded chart loads
+        self.poses = 0
+        self.last_active = time.time()
+
+    def stats(self):
+        return {
+            "room": self.id,
+            "subscribers": len(self.subscribers),
+            "poses": self.poses,
+            "chart": self.chart,
+            "running": self.engine.running,
+            **({"score": self.engine.summary()} if self.engine.running else {}),
+        }
+
+
+class RoomRegistry:
+    """
+    Rooms by ID, created on first use. Rooms without clients that have not
+    seen a pose or command for idle_seconds are dropped on the next lookup.
+    """
+
+    def __init__(self, on_delivered=None, idle_seconds=600.0):
+        self.on_delivered = on_delivered
+        self.idle_seconds = idle_seconds
+        self.rooms = {}
+
+    def __len__(self):
+        return len(self.rooms)
+
+    def __iter__(self):
+        return iter(list(self.rooms.values()))
+
+    def get(self, room_id=DEFAULT_ROOM):
+        room = self.rooms.get(room_id)
+        if room is None:
+            if not valid_room(room_id):
+                raise ValueError(f"invalid room id {room_id!r}")
+            self.reap()
+            room = self.rooms[room_id] = Room(room_id, self.on_delivered)
+        room.last_active = time.time()
+        return room
+
+    def reap(self):
+        cutoff = time.time() - self.idle_seconds
+        for room_id, room in list(self.rooms.items()):
+            if not len(room.subscribers) and room.last_active < cutoff:
+                del self.rooms[room_id]
+
+    def stats(self):
+        return [room.stats() for room in self.rooms.values()]
@@ -0,0 +1,226 @@
+"""
+Shared-memory bus between the CV process and other local processes.
+
+A bus named NAME is three rings in multiprocessing.shared_memory segments:
+
+  NAME_frames  BGR camera frames (uint8, frame-sized slots)
+  NAME_depth   normalized depth maps (uint8, up to frame-sized)
+  NAME_poses   POSE_RECORD structs, same joint layout as the UDP packet
+
+One process writes, any number attach and read. Readers get NumPy views
+straight into the shared segment, so a preview process costs the writer
+nothing but the single copy into the ring. Each slot is guarded by a
+seqlock: the writer makes the slot's counter odd while it writes and even
+after, and a reader checks the counter again after using a view to know
+whether the slot was overwritten meanwhile.
+"""
+import math
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from transport import JOINT_NAMES
+
+MAGIC = b"DDRS"
+HEADER_SIZE = 64
+# per-slot control: seqlock counter, producer seq, capture time, used height / width
+SLOT_DTYPE = np.dtype([("lock", "<i8"), ("seq", "<i8"), ("timestamp", "<f8"), ("h", "<i4"), ("w", "<i4")])
+# x, y, depth, conf, vx, vy, vdepth per joint, like transport.JOINT
+POSE_RECORD = np.dtype([
+    ("seq", "<i8"),
+    ("timestamp", "<f8"),
+    ("player", "<i4"),
+    ("joints", "<f4", (len(JOINT_NAMES), 7)),
+])
+
+
+def _align(n, to=64):
+    return (n + to - 1) // to * to
+
+
+def _attach(name):
+    shm = shared_memory.SharedMemory(name=name)
+    # Python < 3.13 registers attached segments with the resource tracker too,
+    # which would unlink them when a reader exits; only the creator owns them
+    try:
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+    return shm
+
+
+class SlotView:
+    """One read of a ring slot; `data` is a view into shared memory, valid while valid() is True"""
+
+    __slots__ = ("ring", "index", "lock", "seq", "timestamp", "data")
+
+    def __init__(self, ring, index, lock, seq, timestamp, data):
+        self.ring = ring
+        self.index = index
+        self.lock = lock
+        self.seq = seq
+        self.timestamp = timestamp
+        self.data = data
+
+    def valid(self):
+        return int(self.ring.slots[self.index]["lock"]) == self.lock
+
+
+class SharedRing:
+    """
+    Single-writer ring of fixed-capacity array slots in one shared segment.
+
+    Slots hold arrays of up to `shape`; smaller 2-D+ arrays go in the
+    top-left corner and readers get a view cropped to their real size.
+    """
+
+    def __init__(self, name, shape=None, dtype=np.uint8, slots=4, create=False):
+        self.name = name
+        self.owner = create
+        if create:
+            self.shape = tuple(shape)
+            self.dtype = np.dtype(dtype)
+            self.capacity = slots
+            data_size = _align(int(np.prod(self.shape, dtype=np.int64)) * self.dtype.itemsize)
+            size = HEADER_SIZE + _align(slots * SLOT_DTYPE.itemsize) + slots * data_size
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            self._header()
+            self.shm.buf[:4] = MAGIC
+            self.meta[:] = 0
+            self.meta[0] = slots
+            self.meta[1] = len(self.shape)
+            self.meta[2:2 + len(self.shape)] = self.shape
+            encoded = self.dtype.descr[0][1].encode() if self.dtype.names is None else b"pose"
+            self.shm.buf[56:64] = encoded.ljust(8, b"\0")
+        else:
+            self.shm = _attach(name)
+            self._header()
+            if bytes(self.shm.buf[:4]) != MAGIC:
+                raise ValueError(f"{name} is not a shared ring")
+            self.capacity = int(self.meta[0])
+            self.shape = tuple(int(d) for d in self.meta[2:2 + int(self.meta[1])])
+            code = bytes(self.shm.buf[56:64]).rstrip(b"\0").decode()
+            self.dtype = POSE_RECORD if code == "pose" else np.dtype(code)
+        self._views()
+
+    def _header(self):
+        # slots, ndim, up to 3 dims, write count
+        self.meta = np.ndarray((6,), np.int64, self.shm.buf, 8)
+
+    def _views(self):
+        offset = HEADER_SIZE
+        self.slots = np.ndarray((self.capacity,), SLOT_DTYPE, self.shm.buf, offset)
+        if self.owner:
+            self.slots[:] = 0
+        offset += _align(self.capacity * SLOT_DTYPE.itemsize)
+        stride = _align(int(np.prod(self.shape, dtype=np.int64)) * self.dtype.itemsize)
+        self.data = [
+            np.ndarray(self.shape, self.dtype, self.shm.buf, offset + i * stride)
+            for i in range(self.capacity)
+        ]
+
+    @property
+    def count(self):
+        return int(self.meta[5])
+
+    # -- writer --
+
+    def begin(self):
+        """Slot array to fill in place (e.g. cap.read(image=...)); finish with commit()"""
+        index = self.count % self.capacity
+        self.slots[index]["lock"] += 1  # odd: being written
+        return self.data[index]
+
+    def commit(self, seq=0, timestamp=0.0, size=None):
+        index = self.count % self.capacity
+        slot = self.slots[index]
+        h, w = size if size is not None else (self.shape[:2] if len(self.shape) >= 2 else (0, 0))
+        slot["seq"], slot["timestamp"], slot["h"], slot["w"] = seq, timestamp, h, w
+        self.slots[index]["lock"] += 1  # even: complete
+        self.meta[5] += 1
+
+    def write(self, array, seq=0, timestamp=0.0):
+        """Copy array into the next slot (the only copy on the way to readers)"""
+        target = self.begin()
+        if target.ndim >= 2:
+            h, w = min(array.shape[0], self.shape[0]), min(array.shape[1], self.shape[1])
+            target[:h, :w] = array[:h, :w]
+            self.commit(seq, timestamp, (h, w))
+        else:
+            target[...] = array
+            self.commit(seq, timestamp)
+
+    # -- readers --
+
+    def latest(self, newer_than=-1):
+        """SlotView of the newest complete slot, or None if nothing newer than seq `newer_than`"""
+        count = self.count
+        # the newest slot may be mid-write; fall back to the one before it
+        for back in range(1, min(count, self.capacity) + 1):
+            index = (count - back) % self.capacity
+            slot = self.slots[index].copy()
+            if slot["lock"] % 2:
+                continue
+            if slot["seq"] <= newer_than:
+                return None
+            data = self.data[index]
+            if data.ndim >= 2:
+                data = data[:slot["h"], :slot["w"]]
+            view = SlotView(self, index, int(slot["lock"]), int(slot["seq"]), float(slot["timestamp"]), data)
+            return view if view.valid() else None
+        return None
+
+    def close(self):
+        self.data = self.slots = self.meta = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def pose_record(joints, timestamp, seq=0, player=0):
+    """{name: (x, y, depth, conf[, vx, vy, vdepth])} -> POSE_RECORD scalar (NaN velocity when absent)"""
+    record = np.zeros((), POSE_RECORD)
+    record["seq"], record["timestamp"], record["player"] = seq, timestamp, player
+    for i, name in enumerate(JOINT_NAMES):
+        values = joints[name]
+        record["joints"][i, :len(values)] = values
+        if len(values) == 4:
+            record["joints"][i, 4:] = math.nan
+    return record
+
+
+def record_joints(record):
+    """POSE_RECORD -> {name: {x, y, depth, conf[, vx, vy, vdepth]}} like transport.unpack_pose"""
+    joints = {}
+    for name, (x, y, depth, conf, vx, vy, vdepth) in zip(JOINT_NAMES, record["joints"].tolist()):
+        joint = {"x": x, "y": y, "depth": depth, "conf": conf}
+        if not math.isnan(vx):
+            joint.update(vx=vx, vy=vy, vdepth=vdepth)
+        joints[name] = joint
+    return joints
+
+
+class ShmBus:
+    """
+    The frame, depth and pose rings of one bus.
+    create=True needs frame_shape; attaching processes read it from the segments.
+    """
+
+    def __init__(self, name="ddr", frame_shape=None, create=False, slots=4):
+        self.name = name
+        depth_shape = tuple(frame_shape[:2]) if frame_shape is not None else None
+        self.frames = SharedRing(f"{name}_frames", frame_shape, np.uint8, slots, create)
+        self.depth = SharedRing(f"{name}_depth", depth_shape, np.uint8, slots, create)
+        self.poses = SharedRing(f"{name}_poses", (), POSE_RECORD, slots * 4, create)
+
+    def publish(self, seq, timestamp, frame=None, depth=None, joints=None, player=0):
+        if frame is not None:
+            self.frames.write(frame, seq, timestamp)
+        if depth is not None:
+            self.depth.write(depth, seq, timestamp)
+        if joints is not None:
+            self.poses.write(pose_record(joints, timestamp, seq, player), seq, timestamp)
+
+    def close(self):
+        for ring in (self.frames, self.depth, self.poses):
+            ring.close()
@@ -0,0 +1,86 @@
+"""
+Preview window in its own process, attached to a CV server's shared-memory bus.
+
+Draws the latest pose over the latest frame at its own rate; the CV server
+never waits for it, and it never sees a half-written frame.
+
+Usage: python main_cv_server.py --shm ddr --no-display
+       python shm_preview.py ddr [--fps 15]
+"""
+import argparse
+import time
+
+import cv2
+
+from shm_bus import ShmBus, record_joints
+
+LABELS = {"left_ankle": "LA", "right_ankle": "RA", "left_knee": "LK", "right_knee": "RK"}
+
+
+def attach(name, timeout):
+    deadline = time.time() + timeout
+    while True:
+        try:
+            return ShmBus(name)
+        except FileNotFoundError:
+            if time.time() > deadline:
+                raise
+            time.sleep(0.5)
+
+
+def draw(frame, joints):
+    for name, joint in joints.items():
+        x, y = int(joint["x"]), int(joint["y"])
+        color = (0, 0, 255) if "ankle" in name else (0, 255, 0)
+        cv2.circle(frame, (x, y), 8, color, -1)
+        cv2.putText(frame, f"{LABELS[name]}: {joint['depth']:.0f}", (x + 5, y - 5),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 2)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("name", nargs="?", default="ddr", help="bus name given to --shm")
+    parser.add_argument("--fps", type=float, default=15.0)
+    parser.add_argument("--wait", type=float, default=30.0, help="seconds to wait for the bus to appear")
+    args = parser.parse_args()
+
+    bus = attach(args.name, args.wait)
+    print(f"👀 Attached to {args.name}: frames {bus.frames.shape}, {bus.frames.capacity} slots")
+    interval = 1.0 / args.fps
+    last_seq = -1
+    torn = 0
+
+    try:
+        while True:
+            t0 = time.perf_counter()
+            view = bus.frames.latest(newer_than=last_seq)
+            if view is not None:
+                # the overlay needs a private copy; the shared slot stays untouched
+                frame = view.data.copy()
+                if view.valid():
+                    last_seq = view.seq
+                    pose = bus.poses.latest()
+                    if pose is not None and pose.seq == view.seq:
+                        draw(frame, record_joints(pose.data))
+                    cv2.imshow("Preview", frame)
+                else:
+                    torn += 1
+
+                depth = bus.depth.latest()
+                if depth is not None:
+                    # imshow copies into the window itself, no copy needed here
+                    cv2.imshow("Depth", depth.data)
+
+            if cv2.waitKey(max(1, int(1000 * (interval - (time.perf_counter() - t0))))) & 0xFF == ord('q'):
+                break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if torn:
+            print(f"⚠️  {torn} frames were overwritten while copying")
+        bus.close()
+        cv2.destroyAllWindows()
+
+
+if __name__ == "__main__":
+    main()
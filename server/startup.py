@@ -0,0 +1,28 @@
+import time
+
+
+class StartupProfile:
+    """
+    Named checkpoints from script start to the first pose packet.
+
+    Create it before the heavy imports; mark() each phase as it completes and
+    report() prints how long each one took and when it finished.
+    """
+
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.last = self.t0
+        self.phases = []  # (name, duration, finished at)
+        self.reported = False
+
+    def mark(self, name):
+        now = time.perf_counter()
+        self.phases.append((name, now - self.last, now - self.t0))
+        self.last = now
+
+    def report(self):
+        self.reported = True
+        lines = ["🚀 Startup profile"]
+        for name, duration, at in self.phases:
+            lines.append(f"  {name:<16} {1000 * duration:8.1f} ms   (at {at:6.2f} s)")
+        print("\n".join(lines))
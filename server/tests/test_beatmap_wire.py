@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+import beatmap_wire
+from osufile import CHART_DTYPE, CIRCLE, HOLD
+
+
+def chart(n):
+    c = np.zeros(n, dtype=CHART_DTYPE)
+    c["time"] = 1000 + 250 * np.arange(n)
+    c["end_time"] = c["time"]
+    c["lane"] = np.arange(n) % 4
+    c["type"] = CIRCLE
+    c["end_time"][1::3] += 400
+    c["type"][1::3] = HOLD
+    return c
+
+
+def test_chunks_reassemble_the_chart():
+    c = chart(10)
+    chunks = [beatmap_wire.decode_chunk(data) for data in beatmap_wire.iter_chunks(c, 4)]
+    assert [h["offset"] for h, *_ in chunks] == [0, 4, 8]
+    assert all(h["total"] == 10 for h, *_ in chunks)
+    times = np.concatenate([t for _, t, *_ in chunks])
+    durations = np.concatenate([d for _, _, d, *_ in chunks])
+    lanes = np.concatenate([l for *_, l, _ in chunks])
+    types = np.concatenate([t for *_, t in chunks])
+    np.testing.assert_array_equal(times, c["time"])
+    np.testing.assert_array_equal(durations, c["end_time"] - c["time"])
+    np.testing.assert_array_equal(lanes, c["lane"])
+    np.testing.assert_array_equal(types, c["type"])
+
+
+def test_empty_chart_is_one_empty_chunk():
+    (data,) = beatmap_wire.iter_chunks(chart(0))
+    header, times, *_ = beatmap_wire.decode_chunk(data)
+    assert header == {"total": 0, "offset": 0, "count": 0} and len(times) == 0
+
+
+def test_page_past_the_end_is_empty():
+    header, *_ = beatmap_wire.decode_chunk(beatmap_wire.encode_chunk(chart(5), offset=50, limit=10))
+    assert header == {"total": 5, "offset": 5, "count": 0}
+
+
+@pytest.mark.parametrize("requested, expected", [
+    (None, beatmap_wire.DEFAULT_CHUNK), ("abc", beatmap_wire.DEFAULT_CHUNK), (0, 1), (-5, 1),
+    ("512", 512), (10 ** 9, beatmap_wire.MAX_CHUNK),
+])
+def test_chunk_size_is_clamped(requested, expected):
+    assert beatmap_wire.clamp_chunk_size(requested) == expected
+
+
+def test_rejects_other_data():
+    with pytest.raises(ValueError):
+        beatmap_wire.decode_chunk(b"\0" * beatmap_wire.HEADER.size)
+
+
+def test_content_negotiation():
+    assert beatmap_wire.wants_binary("binary")
+    assert not beatmap_wire.wants_binary("json", beatmap_wire.MEDIA_TYPE)
+    assert beatmap_wire.wants_binary(None, f"{beatmap_wire.MEDIA_TYPE}, */*")
+    assert not beatmap_wire.wants_binary()
@@ -0,0 +1,52 @@
+import threading
+import zipfile
+
+from bench_osu import synthetic_chart
+from beatmaps import BeatmapStore
+
+
+def write_osz(path, objects=20000):
+    with zipfile.ZipFile(path, "w") as z:
+        z.writestr("chart.osu", synthetic_chart(objects))
+        z.writestr("audio.mp3", b"\0" * 1024)
+    return str(path)
+
+
+def test_concurrent_cold_requests_parse_once(tmp_path):
+    osz = write_osz(tmp_path / "a.osz")
+    store = BeatmapStore(cache_dir=tmp_path / "cache")
+    barrier = threading.Barrier(8)
+    charts = []
+
+    def request():
+        barrier.wait()
+        charts.append(store.get(osz))
+
+    threads = [threading.Thread(target=request) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert store.misses == 1 and store.hits == 7
+    assert all(chart is charts[0] for chart in charts)
+    assert charts[0]["audio"] == "audio.mp3"
+    assert store.loading == {}
+
+
+def test_cached_never_parses(tmp_path):
+    osz = write_osz(tmp_path / "a.osz", objects=10)
+    store = BeatmapStore(cache_dir=tmp_path / "cache")
+    assert store.cached(osz) is None
+    chart = store.get(osz)
+    assert store.cached(osz) is chart
+    assert store.misses == 1
+
+
+def test_audio_lookups_are_evicted_with_their_chart(tmp_path):
+    store = BeatmapStore(cache_dir=tmp_path / "cache", max_charts=2)
+    paths = [write_osz(tmp_path / f"{i}.osz", objects=10) for i in range(3)]
+    for path in paths:
+        assert store.audio_source(path)["size"] == 1024
+    assert len(store.charts) == len(store.audio_sources) == 2
+    assert set(store.audio_sources) == set(store.charts)
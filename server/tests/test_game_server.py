@@ -0,0 +1,30 @@
+import json
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import game_server
+
+
+def test_subscriber_is_dropped_when_the_handler_fails():
+    with TestClient(game_server.app) as client:
+        with pytest.raises(json.JSONDecodeError):
+            with client.websocket_connect("/ws?room=cleanup") as ws:
+                ws.send_text("not json")
+                ws.receive_text()
+        assert len(game_server.rooms.get("cleanup").subscribers) == 0
+
+
+def test_failed_pose_is_counted(monkeypatch):
+    def fail(room, data):
+        raise RuntimeError("judge blew up")
+
+    monkeypatch.setattr(game_server, "broadcast_pose", fail)
+    before = game_server.POSES_FAILED.values.get(("http",), 0)
+    with TestClient(game_server.app) as client:
+        assert client.post("/api/cv/pose?room=failing", json={"timestamp": time.time()}).status_code == 200
+        deadline = time.time() + 2.0
+        while game_server.POSES_FAILED.values.get(("http",), 0) == before and time.time() < deadline:
+            time.sleep(0.01)
+    assert game_server.POSES_FAILED.values.get(("http",), 0) == before + 1
@@ -0,0 +1,86 @@
+import email.utils
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from http_range import RangeNotSatisfiable, not_modified, parse_range, serve_bytes
+
+ETAG = '"abc-100"'
+MTIME = 1_700_000_000
+DATA = bytes(range(100))
+
+
+@pytest.mark.parametrize("header, span", [
+    (None, None), ("items=0-1", None), ("bytes=0-9", (0, 9)), ("bytes=90-", (90, 99)),
+    ("bytes=-10", (90, 99)), ("bytes=-500", (0, 99)), ("bytes=50-500", (50, 99)),
+    ("bytes=0-1,5-6", None), ("bytes=x-y", None),
+])
+def test_parse_range(header, span):
+    assert parse_range(header, 100) == span
+
+
+@pytest.mark.parametrize("header", ["bytes=100-", "bytes=9-5", "bytes=-0"])
+def test_unsatisfiable_ranges(header):
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range(header, 100)
+
+
+def test_not_modified():
+    assert not_modified({"if-none-match": f'W/{ETAG}, "other"'}, ETAG, MTIME)
+    assert not not_modified({"if-none-match": '"other"'}, ETAG, MTIME)
+    since = email.utils.formatdate(MTIME, usegmt=True)
+    assert not_modified({"if-modified-since": since}, ETAG, MTIME)
+    assert not not_modified({"if-modified-since": since}, ETAG, MTIME + 10)
+    # If-None-Match wins even when the date would match
+    assert not not_modified({"if-none-match": '"other"', "if-modified-since": since}, ETAG, MTIME)
+
+
+@pytest.fixture
+def client(tmp_path):
+    # the served bytes sit 7 bytes into the file, like a stored member of a zip
+    path = tmp_path / "archive.bin"
+    path.write_bytes(b"header!" + DATA + b"trailer")
+    app = FastAPI()
+
+    @app.api_route("/audio", methods=["GET", "HEAD"])
+    async def audio(request: Request):
+        return serve_bytes(request, path, 7, len(DATA), ETAG, MTIME, "audio/mpeg")
+
+    return TestClient(app)
+
+
+def test_full_body(client):
+    r = client.get("/audio")
+    assert r.status_code == 200 and r.content == DATA
+    assert r.headers["accept-ranges"] == "bytes" and r.headers["etag"] == ETAG
+    assert r.headers["content-length"] == "100"
+
+
+def test_range(client):
+    r = client.get("/audio", headers={"Range": "bytes=10-19"})
+    assert r.status_code == 206 and r.content == DATA[10:20]
+    assert r.headers["content-range"] == "bytes 10-19/100"
+
+
+def test_unsatisfiable(client):
+    r = client.get("/audio", headers={"Range": "bytes=200-"})
+    assert r.status_code == 416 and r.headers["content-range"] == "bytes */100"
+
+
+def test_conditional_get(client):
+    assert client.get("/audio", headers={"If-None-Match": ETAG}).status_code == 304
+
+
+def test_if_range(client):
+    r = client.get("/audio", headers={"Range": "bytes=0-4", "If-Range": ETAG})
+    assert r.status_code == 206 and r.content == DATA[:5]
+    # the client's copy is stale: send everything
+    r = client.get("/audio", headers={"Range": "bytes=0-4", "If-Range": '"old"'})
+    assert r.status_code == 200 and r.content == DATA
+
+
+def test_head(client):
+    r = client.head("/audio", headers={"Range": "bytes=-10"})
+    assert r.status_code == 206 and r.content == b""
+    assert r.headers["content-length"] == "10"
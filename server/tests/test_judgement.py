@@ -0,0 +1,81 @@
+import pytest
+
+from judgement import LEFT, RIGHT, JudgementEngine, StepDetector
+from note_index import LaneIndex
+
+START = 1000.0
+
+
+class Steps:
+    """Stands in for the StepDetector: one step on `lane` per pose"""
+
+    def __init__(self, lane):
+        self.lane = lane
+
+    def update(self, pose):
+        return [(self.lane, pose["timestamp"])]
+
+
+def test_judge_picks_closest_and_leaves_old_notes_for_expire():
+    index = LaneIndex([{"time": 1.0, "lane": 0}, {"time": 2.0, "lane": 0}, {"time": 2.1, "lane": 0}], 4)
+    assert index.judge(0, 1.3, 0.15) is None
+    note, delta = index.judge(0, 2.08, 0.15)
+    assert note == 2 and delta == pytest.approx(0.02)
+    assert index.expire(1.9) == [(0, 0)]
+    assert index.expire(1.9) == []
+
+
+def test_visible_skips_hit_notes():
+    index = LaneIndex([{"time": 1.0, "lane": 0}, {"time": 1.2, "lane": 1}], 4)
+    index.judge(0, 1.0, 0.15)
+    assert list(index.visible(0.0, 2.0)) == [(1, 1.2)]
+
+
+def test_step_after_a_missed_note_still_reports_it():
+    engine = JudgementEngine()
+    engine.start([{"time": 1.0, "lane": LEFT}, {"time": 2.0, "lane": LEFT}], START)
+    engine.detector = Steps(LEFT)
+
+    events = engine.on_pose({"timestamp": START + 1.3})
+    assert [(e["result"], e["note"]) for e in events] == [("miss", 0), ("stray", None)]
+    assert engine.combo == 0
+
+    events = engine.on_pose({"timestamp": START + 2.0})
+    assert [(e["result"], e["note"]) for e in events] == [("perfect", 1)]
+    assert engine.counts == {"perfect": 1, "great": 0, "good": 0, "miss": 1, "stray": 1}
+
+
+def test_grades_and_combo():
+    engine = JudgementEngine(hit_window=0.15)
+    notes = [{"time": t, "lane": LEFT} for t in (1.0, 2.0, 3.0)]
+    engine.start(notes, START)
+    engine.detector = Steps(LEFT)
+    results = [engine.on_pose({"timestamp": START + t})[0]["result"] for t in (1.02, 2.09, 3.14)]
+    assert results == ["perfect", "great", "good"]
+    assert engine.summary()["score"] == 450
+    assert engine.summary()["max_combo"] == 3
+
+
+def test_misses_count_notes_and_wrong_lane_steps_are_stray():
+    engine = JudgementEngine(hit_window=0.15)
+    notes = [{"time": t, "lane": LEFT} for t in (1.0, 2.0, 3.0)]
+    engine.start(notes, START)
+    engine.detector = Steps(RIGHT)
+    for t in (1.0, 1.5, 2.0, 3.0, 4.0):
+        engine.on_pose({"timestamp": START + t})
+    assert engine.counts["miss"] == len(notes)
+    assert engine.counts["stray"] == 5
+    assert engine.summary()["max_combo"] == 0
+
+
+def test_prediction_lands_a_frame_earlier():
+    def pose(t, x, vx):
+        knee = {"x": 300.0, "y": 300.0}
+        ankle = {"x": x, "y": 400.0, "depth": 100.0, "vx": vx, "vy": 0.0, "vdepth": 0.0}
+        return {"timestamp": t, "left_knee": knee, "right_knee": knee, "left_ankle": ankle}
+
+    # the ankle moves left to x 180 and stops; the filter already reads -1800 px/s mid-step
+    samples = [(0.0, 300.0, 0.0), (1 / 30, 240.0, -1800.0), (2 / 30, 180.0, 0.0), (3 / 30, 180.0, 0.0)]
+    predicted, measured = StepDetector(), StepDetector(horizon=0)
+    assert [predicted.update(pose(*s)) for s in samples][2] == [(LEFT, 2 / 30)]
+    assert [measured.update(pose(*s)) for s in samples][2:] == [[], [(LEFT, 3 / 30)]]
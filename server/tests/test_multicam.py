@@ -0,0 +1,27 @@
+import pytest
+
+from multicam import MAX_PLAYERS_PER_CAMERA, PlayerTracker, assign_rooms
+
+
+def test_ids_are_stable_and_freed_slots_are_released():
+    tracker = PlayerTracker(camera=1, max_age=2)
+    first = tracker.update([(100, 100), (400, 100)])
+    assert first == [MAX_PLAYERS_PER_CAMERA, MAX_PLAYERS_PER_CAMERA + 1]
+    assert tracker.update([(410, 105), (105, 98)]) == first[::-1]
+    assert tracker.released == []
+
+    for _ in range(3):
+        tracker.update([(400, 100)])
+    assert tracker.released == [first[0]]
+
+    # the freed slot goes to the next new person
+    assert tracker.update([(400, 100), (100, 300)]) == [first[1], first[0]]
+
+
+def test_assign_rooms_numbers_cameras_per_room():
+    rooms, cameras = assign_rooms(["cab1", "1=cab2", "3=cab2"], 4, "default")
+    assert rooms == ["cab1", "cab2", "cab1", "cab2"]
+    assert cameras == [0, 0, 1, 1]
+    assert assign_rooms([], 2, "default") == (["default", "default"], [0, 1])
+    with pytest.raises(ValueError):
+        assign_rooms(["2=cab2"], 2, "default")
@@ -0,0 +1,58 @@
+import numpy as np
+
+from osufile import CIRCLE, HOLD, SLIDER, SPINNER, OsuFile, parse_hit_objects, parse_timing_points, to_notes
+
+TIMING = parse_timing_points(["0,500,4,1,0,100,1,0"])
+
+
+def test_uniform_rows_take_the_fast_path():
+    lines = [
+        "64,192,1000,1,0,0:0:0:0:",
+        "448,192,1500,128,0,2000:0:0:0:0:",
+    ]
+    chart = parse_hit_objects(lines, TIMING)
+    assert chart["time"].tolist() == [1000, 1500]
+    assert chart["lane"].tolist() == [0, 3]
+    assert chart["type"].tolist() == [CIRCLE, HOLD]
+    assert chart["end_time"].tolist() == [1000, 2000]
+
+
+def test_short_circle_then_spinner():
+    # 4 + 6 commas add up to the fast path's total for two rows
+    lines = [
+        "64,192,1000,1,0",
+        "256,192,2000,12,0,3000,0:0:0:0:",
+    ]
+    chart = parse_hit_objects(lines, TIMING)
+    assert chart["time"].tolist() == [1000, 2000]
+    assert chart["type"].tolist() == [CIRCLE, SPINNER]
+    assert chart["end_time"].tolist() == [1000, 3000]
+
+
+def test_mixed_circles_sliders_and_spinners():
+    lines = [
+        "64,192,1000,1,0,0:0:0:0:",
+        "192,192,1250,1,0,0:0:0:0:",
+        "320,192,1500,1,0,0:0:0:0:",
+        "448,192,1750,1,0,0:0:0:0:",
+        "64,192,2000,1,0,0:0:0:0:",
+        "192,192,2500,2,0,B|300:192,1,140",
+        "256,192,4000,8,0,5000",
+    ]
+    chart = parse_hit_objects(lines, TIMING, slider_multiplier=1.4)
+    assert chart["time"].tolist() == [1000, 1250, 1500, 1750, 2000, 2500, 4000]
+    assert chart["type"].tolist() == [CIRCLE] * 5 + [SLIDER, SPINNER]
+    # 140 px at 1.4 * 100 px per beat is one 500 ms beat
+    np.testing.assert_allclose(chart["end_time"][5], 3000)
+    assert chart["end_time"][6] == 5000
+
+
+def test_to_notes_in_seconds():
+    osu = OsuFile.from_text(
+        "osu file format v14\n\n[TimingPoints]\n0,500,4,1,0,100,1,0\n\n"
+        "[HitObjects]\n448,192,1500,128,0,2000:0:0:0:0:\n64,192,1000,1,0,0:0:0:0:\n"
+    )
+    assert to_notes(osu.hit_objects()) == [
+        {"time": 1.0, "lane": 0},
+        {"time": 1.5, "lane": 3, "end": 2.0},
+    ]
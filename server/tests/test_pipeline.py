@@ -0,0 +1,29 @@
+import itertools
+
+from pipeline import Pipeline
+
+
+def test_stages_pass_items_through():
+    counter = itertools.count()
+    pipeline = Pipeline().add_source("source", lambda: next(counter)).add_stage("double", lambda x: 2 * x)
+    output = pipeline.output()
+    pipeline.start()
+    try:
+        items = [output.get(timeout=1.0) for _ in range(3)]
+    finally:
+        pipeline.stop()
+    assert all(item is not None and item % 2 == 0 for item in items)
+
+
+def test_a_failing_stage_stops_the_pipeline():
+    def explode(item):
+        raise ValueError("bad frame")
+
+    counter = itertools.count()
+    pipeline = Pipeline().add_source("source", lambda: next(counter)).add_stage("explode", explode)
+    pipeline.start()
+    assert pipeline.stop_event.wait(timeout=2.0)
+    pipeline.stop()
+    assert not pipeline.running
+    assert list(pipeline.errors()) == ["explode"]
+    assert isinstance(pipeline.errors()["explode"], ValueError)
@@ -0,0 +1,116 @@
+import asyncio
+
+import pytest
+
+from transport import (CLOCK, CLOCK_MAGIC, JOINT_NAMES, PACKET_SIZE, PING, PONG, PoseReceiver, PoseSender,
+                       pack_pose, start_pose_receiver, unpack_pose)
+
+JOINTS = {name: (10.0 * i, 20.0 * i, 100 + i, 0.9) for i, name in enumerate(JOINT_NAMES)}
+
+
+class FakeTransport:
+    def __init__(self):
+        self.sent = []
+
+    def sendto(self, data, addr):
+        self.sent.append((data, addr))
+
+
+def receiver():
+    poses = []
+    protocol = PoseReceiver(poses.append)
+    protocol.connection_made(FakeTransport())
+    return protocol, poses
+
+
+def test_pack_unpack_round_trip():
+    packet = pack_pose(7, 1234.5, JOINTS, player=2, room="cab1")
+    assert len(packet) == PACKET_SIZE
+    room, player, seq, timestamp, joints = unpack_pose(packet)
+    assert (room, player, seq, timestamp) == ("cab1", 2, 7, 1234.5)
+    assert joints["left_knee"] == pytest.approx({"x": 20.0, "y": 40.0, "depth": 102, "conf": 0.9}, rel=1e-6)
+    assert "vx" not in joints["left_ankle"]
+
+
+def test_velocities_survive_the_round_trip():
+    joints = {name: (1.0, 2.0, 3.0, 1.0, 4.0, 5.0, 6.0) for name in JOINT_NAMES}
+    _, _, _, _, unpacked = unpack_pose(pack_pose(1, 0.0, joints))
+    assert unpacked["right_ankle"] == {"x": 1.0, "y": 2.0, "depth": 3.0, "conf": 1.0, "vx": 4.0, "vy": 5.0, "vdepth": 6.0}
+
+
+def test_malformed_packets_are_rejected():
+    packet = pack_pose(1, 0.0, JOINTS)
+    assert unpack_pose(packet[:-1]) is None
+    assert unpack_pose(b"XXXX" + packet[4:]) is None
+    protocol, poses = receiver()
+    protocol.datagram_received(b"junk", ("127.0.0.1", 1))
+    assert protocol.malformed == 1 and poses == []
+
+
+def test_receiver_drops_stale_seq_per_room_and_player():
+    protocol, poses = receiver()
+    for seq, player, room in [(1, 0, "a"), (2, 0, "a"), (2, 0, "a"), (1, 1, "a"), (1, 0, "b"), (3, 0, "a")]:
+        protocol.datagram_received(pack_pose(seq, 0.0, JOINTS, player, room), ("127.0.0.1", 1))
+    assert [(p["room"], p["player"], p["seq"]) for p in poses] == [
+        ("a", 0, 1), ("a", 0, 2), ("a", 1, 1), ("b", 0, 1), ("a", 0, 3)
+    ]
+    assert protocol.dropped == 1
+
+
+def test_restarted_sender_is_accepted_for_every_player():
+    protocol, poses = receiver()
+    for player in (0, 1, 2):
+        for seq in range(1, 51):
+            protocol.datagram_received(pack_pose(seq, 0.0, JOINTS, player), ("127.0.0.1", 1))
+    # the CV server restarts: every player's counter starts over
+    for seq in range(1, 4):
+        for player in (0, 1, 2):
+            protocol.datagram_received(pack_pose(seq, 1.0, JOINTS, player), ("127.0.0.1", 1))
+    assert len(poses) == 150 + 9
+    assert protocol.dropped == 0
+
+
+def test_sender_counts_seq_per_player():
+    sender = PoseSender("127.0.0.1", 9, sync_interval=None)
+    try:
+        assert [sender.send(JOINTS, 0.0, player) for player in (0, 1, 0, 1, 2)] == [1, 1, 2, 2, 1]
+    finally:
+        sender.close()
+
+
+def test_clock_ping_is_answered():
+    protocol, _ = receiver()
+    protocol.datagram_received(CLOCK.pack(CLOCK_MAGIC, PING, 5.0, 0.0, 0.0), ("127.0.0.1", 1))
+    (data, addr), = protocol.transport.sent
+    magic, kind, t0, t1, t2 = CLOCK.unpack(data)
+    assert (magic, kind, t0, addr) == (CLOCK_MAGIC, PONG, 5.0, ("127.0.0.1", 1))
+    assert t1 <= t2
+
+
+def test_poses_cross_a_real_udp_socket():
+    async def main():
+        poses = []
+        transport, protocol = await start_pose_receiver(poses.append, host="127.0.0.1", port=0)
+        port = transport.get_extra_info("sockname")[1]
+        sender = PoseSender("127.0.0.1", port, room="cab2", sync_interval=0.05)
+        try:
+            for player in (0, 1):
+                sender.send(JOINTS, timestamp=100.0, player=player)
+                for _ in range(100):
+                    await asyncio.sleep(0.01)
+                    if len(poses) > player:
+                        break
+            for _ in range(100):
+                if sender.clock.synced:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            await asyncio.to_thread(sender.close)
+            transport.close()
+        return poses, protocol, sender
+
+    poses, protocol, sender = asyncio.run(main())
+    assert [(p["room"], p["player"], p["seq"]) for p in poses] == [("cab2", 0, 1), ("cab2", 1, 1)]
+    assert protocol.pings >= 1 and sender.clock.synced
+    # loopback: the estimated offset between identical clocks is tiny
+    assert abs(sender.clock.offset) < 0.05
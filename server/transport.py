@@ -0,0 +1,246 @@
+import asyncio
+import math
+import socket
+import struct
+import threading
+import time
+
+from clock_sync import ClockEstimator
+
+# Joint order on the wire; matches the keys of the JSON pose payload
+JOINT_NAMES = ("left_ankle", "right_ankle", "left_knee", "right_knee")
+
+POSE_PORT = 8001
+MAGIC = b"DDRP"
+VERSION = 4
+DEFAULT_ROOM = "default"
+ROOM_BYTES = 16
+
+# magic, version, joint count, player id, seq, capture timestamp, room id (ASCII, NUL padded)
+HEADER = struct.Struct(f"<4sBBBId{ROOM_BYTES}s")
+# x, y, depth, confidence, then per-second velocities of x, y, depth
+# (NaN when the sender does not filter keypoints)
+JOINT = struct.Struct("<fffffff")
+NO_VELOCITY = (math.nan, math.nan, math.nan)
+PACKET_SIZE = HEADER.size + JOINT.size * len(JOINT_NAMES)
+
+# Clock sync on the same port (see clock_sync.py):
+#   ping  magic, 0, t0 (sender clock), sender's current offset and RTT estimate
+#   pong  magic, 1, t0 echoed, t1 / t2 (server clock)
+CLOCK_MAGIC = b"DDRT"
+CLOCK = struct.Struct("<4sBddd")
+PING, PONG = 0, 1
+
+
+def room_bytes(room):
+    encoded = room.encode("ascii")
+    if not encoded or len(encoded) > ROOM_BYTES:
+        raise ValueError(f"room id must be 1-{ROOM_BYTES} ASCII characters, got {room!r}")
+    return encoded
+
+
+def pack_pose(seq, timestamp, joints, player=0, room=DEFAULT_ROOM):
+    """
+    Pack joints into a fixed-layout packet.
+    joints: {name: (x, y, depth, conf[, vx, vy, vdepth])} with every name in JOINT_NAMES.
+    """
+    buf = bytearray(PACKET_SIZE)
+    HEADER.pack_into(buf, 0, MAGIC, VERSION, len(JOINT_NAMES), player, seq & 0xFFFFFFFF, timestamp,
+                     room_bytes(room))
+    offset = HEADER.size
+    for name in JOINT_NAMES:
+        values = joints[name]
+        JOINT.pack_into(buf, offset, *values, *(NO_VELOCITY if len(values) == 4 else ()))
+        offset += JOINT.size
+    return bytes(buf)
+
+
+def unpack_pose(packet):
+    """
+    Unpack a packet into (room, player, seq, timestamp, {name: {x, y, depth, conf[, vx, vy, vdepth]}}),
+    or None if malformed. Velocities are only present when the sender filled them in.
+    """
+    if len(packet) < HEADER.size:
+        return None
+    magic, version, count, player, seq, timestamp, room = HEADER.unpack_from(packet, 0)
+    if magic != MAGIC or version != VERSION or count != len(JOINT_NAMES):
+        return None
+    if len(packet) != PACKET_SIZE:
+        return None
+
+    joints = {}
+    for name, (x, y, depth, conf, vx, vy, vdepth) in zip(JOINT_NAMES, JOINT.iter_unpack(packet[HEADER.size:])):
+        joint = {"x": x, "y": y, "depth": depth, "conf": conf}
+        if not math.isnan(vx):
+            joint.update(vx=vx, vy=vy, vdepth=vdepth)
+        joints[name] = joint
+    try:
+        room = room.rstrip(b"\0").decode("ascii")
+    except UnicodeDecodeError:
+        return None
+    return room, player, seq, timestamp, joints
+
+
+def pose_dict(player, seq, timestamp, joints, room=DEFAULT_ROOM):
+    """Same shape as the JSON body accepted by POST /api/cv/pose"""
+    data = dict(joints)
+    data["room"] = room
+    data["player"] = player
+    data["seq"] = seq
+    data["timestamp"] = timestamp
+    return data
+
+
+class PoseSender:
+    """
+    Streams pose packets over UDP from a background thread.
+
+    send() never blocks: it replaces the pending packet of that player, so
+    a slow network or server only ever sees each player's newest pose.
+    All packets are tagged with the sender's room. Each player has its own
+    seq counter starting at 1, which is how the receiver tells a restarted
+    sender from a reordered packet.
+
+    Every sync_interval seconds a second thread pings the server to estimate
+    the clock offset; send() converts timestamps (local time.time()) to the
+    server's clock before packing them. sync_interval=None sends them as is.
+    """
+
+    def __init__(self, host="127.0.0.1", port=POSE_PORT, room=DEFAULT_ROOM, sync_interval=1.0):
+        self.addr = (host, port)
+        self.room = room_bytes(room).decode()
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.clock = ClockEstimator()
+        self.pending = {}
+        self.cond = threading.Condition()
+        self.running = True
+        self.sent = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.seq = {}  # player -> last seq
+        self.thread = threading.Thread(target=self._run, name="pose-sender", daemon=True)
+        self.thread.start()
+        self.sync_interval = sync_interval
+        self.sync_thread = None
+        if sync_interval:
+            self.sock.settimeout(sync_interval)
+            self.sync_thread = threading.Thread(target=self._sync, name="clock-sync", daemon=True)
+            self.sync_thread.start()
+
+    def send(self, joints, timestamp=None, player=0):
+        """Queue a pose captured at timestamp (local clock); returns its seq"""
+        timestamp = self.clock.to_server(time.time() if timestamp is None else timestamp)
+        with self.cond:
+            seq = self.seq[player] = self.seq.get(player, 0) + 1
+            packet = pack_pose(seq, timestamp, joints, player, self.room)
+            if player in self.pending:
+                self.coalesced += 1
+            self.pending[player] = packet
+            self.cond.notify()
+            return seq
+
+    def _run(self):
+        while self.running:
+            with self.cond:
+                while not self.pending and self.running:
+                    self.cond.wait(0.5)
+                # oldest capture first
+                packets = sorted(self.pending.values(), key=lambda p: HEADER.unpack_from(p)[5])
+                self.pending = {}
+            for packet in packets:
+                try:
+                    self.sock.sendto(packet, self.addr)
+                    self.sent += 1
+                except OSError:
+                    self.errors += 1
+
+    def _sync(self):
+        while self.running:
+            rtt, offset = self.clock.best()
+            sent = time.time()
+            try:
+                self.sock.sendto(CLOCK.pack(CLOCK_MAGIC, PING, sent, offset, rtt or 0.0), self.addr)
+                while True:
+                    data = self.sock.recv(64)
+                    t3 = time.time()
+                    if len(data) != CLOCK.size or data[:4] != CLOCK_MAGIC:
+                        continue
+                    _, kind, t0, t1, t2 = CLOCK.unpack(data)
+                    if kind == PONG:
+                        # a late pong of an earlier ping is still a valid (slow) sample
+                        self.clock.add(t0, t1, t2, t3)
+                        if t0 == sent:
+                            break
+            except (socket.timeout, OSError):
+                pass  # no server yet, or the pong was lost
+            time.sleep(max(0.0, self.sync_interval - (time.time() - sent)))
+
+    def close(self):
+        self.running = False
+        with self.cond:
+            self.cond.notify()
+        self.thread.join(1.0)
+        if self.sync_thread is not None:
+            self.sync_thread.join(self.sync_interval + 0.5)
+        self.sock.close()
+
+
+class PoseReceiver(asyncio.DatagramProtocol):
+    """
+    asyncio UDP endpoint for pose packets.
+    Out-of-order packets (seq not newer than the room and player's last one) are dropped.
+    Clock pings are answered straight away; on_clock(addr, offset, rtt) gets the
+    sender's own estimate that came with each ping.
+    """
+
+    def __init__(self, on_pose, on_clock=None):
+        self.on_pose = on_pose
+        self.on_clock = on_clock
+        self.transport = None
+        self.last_seq = {}
+        self.received = 0
+        self.dropped = 0
+        self.malformed = 0
+        self.pings = 0
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        if data[:4] == CLOCK_MAGIC:
+            self.clock_ping(data, addr)
+            return
+        pose = unpack_pose(data)
+        if pose is None:
+            self.malformed += 1
+            return
+        room, player, seq, timestamp, joints = pose
+        # seq restarts from 1 when the CV server restarts
+        last = self.last_seq.get((room, player))
+        if last is not None and seq <= last and seq > 1:
+            self.dropped += 1
+            return
+        self.last_seq[(room, player)] = seq
+        self.received += 1
+        self.on_pose(pose_dict(player, seq, timestamp, joints, room))
+
+    def clock_ping(self, data, addr):
+        t1 = time.time()
+        if len(data) != CLOCK.size:
+            self.malformed += 1
+            return
+        _, kind, t0, offset, rtt = CLOCK.unpack(data)
+        if kind != PING:
+            return
+        self.pings += 1
+        self.transport.sendto(CLOCK.pack(CLOCK_MAGIC, PONG, t0, t1, time.time()), addr)
+        if self.on_clock is not None and rtt > 0:
+            self.on_clock(addr, offset, rtt)
+
+
+async def start_pose_receiver(on_pose, host="0.0.0.0", port=POSE_PORT, on_clock=None):
+    loop = asyncio.get_running_loop()
+    transport, protocol = await loop.create_datagram_endpoint(
+        lambda: PoseReceiver(on_pose, on_clock), local_addr=(host, port)
+    )
+    return transport, protocol